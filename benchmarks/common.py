@@ -0,0 +1,30 @@
+import time
+from typing import Callable
+
+import pandas as pd
+from example_strategies import data
+
+
+def synthetic_financial_data(num_days: int, seed: int = 0) -> pd.DataFrame:
+    """Generates daily OHLCV data following geometric Brownian motion.
+
+    Args:
+        num_days: Number of trading days.
+        seed: Random seed.
+
+    Returns:
+        Financial data in the same format as `data.load`.
+    """
+    dates = pd.bdate_range("1990-01-01", periods=num_days, name="Date")
+    return data.synthetic_financial_data(dates, seed=seed)
+
+
+def time_call(func: Callable, repeat: int = 5) -> float:
+    """Returns the best wall time of `repeat` calls to `func` in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    return best
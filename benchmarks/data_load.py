@@ -0,0 +1,43 @@
+"""Compares per-ticker load time of the legacy CSV cache, the binary cache and
+the in-memory cache.
+
+Run with `python -m benchmarks.data_load`.
+"""
+
+import os
+import tempfile
+
+import pandas as pd
+from example_strategies import data
+
+from benchmarks.common import synthetic_financial_data, time_call
+
+
+def main():
+    print(f"{'days':>8} {'csv (ms)':>10} {'binary (ms)':>12} {'speedup':>8} {'memory (ms)':>12}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for num_days in [1_000, 10_000, 50_000]:
+            financial_data = synthetic_financial_data(num_days)
+            csv_path = os.path.join(tmp_dir, f"{num_days}.csv")
+            binary_path = os.path.join(tmp_dir, f"{num_days}.cols")
+            financial_data.to_csv(csv_path)
+            data._write_columns(financial_data, binary_path)
+
+            csv_time = time_call(lambda: pd.read_csv(csv_path, index_col=0, parse_dates=True))
+            binary_time = time_call(lambda: data._read_columns(binary_path))
+            frame_cache = data._FrameCache(maxsize=1)
+            memory_time = time_call(
+                lambda: data._read_date_range(
+                    frame_cache.get(binary_path),
+                    financial_data.index[10],
+                    financial_data.index[-10],
+                )
+            )
+            print(
+                f"{num_days:>8} {1e3 * csv_time:>10.2f} {1e3 * binary_time:>12.2f} "
+                f"{csv_time / binary_time:>7.1f}x {1e3 * memory_time:>12.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
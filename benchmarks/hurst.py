@@ -0,0 +1,28 @@
+"""Compares estimating Hurst exponents of many series one at a time with
+estimating them all at once.
+
+Run with `python -m benchmarks.hurst`.
+"""
+
+import numpy as np
+from example_strategies import stats
+
+from benchmarks.common import time_call
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'series':>7} {'days':>6} {'one at a time (s)':>18} {'batched (s)':>12} {'speedup':>8}")
+    for num_series in [100, 1000]:
+        for num_days in [1000, 2500]:
+            series = np.cumsum(rng.normal(size=(num_series, num_days)), axis=1)
+            scalar_time = time_call(lambda: [stats.hurst_exponent(row) for row in series], repeat=1)
+            batched_time = time_call(lambda: stats.hurst_exponents(series))
+            print(
+                f"{num_series:>7} {num_days:>6} {scalar_time:>18.3f} {batched_time:>12.3f} "
+                f"{scalar_time / batched_time:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Compares the memory retained by the history of executed orders of
+`MeanRevertingStrategy` kept in lists of backtrader's order objects, as
+`BaseStrategy` used to, and in its journal, see `journal.Ledger`. The orders
+reference their data feeds, so the lists keep the whole backtest alive.
+
+Run with `python -m benchmarks.ledger`.
+"""
+
+import gc
+import tracemalloc
+from typing import Any, Callable
+
+from example_strategies import strategies, utils
+
+from benchmarks.common import synthetic_financial_data
+
+
+class ListHistoryStrategy(strategies.MeanRevertingStrategy):
+    """Also keeps the executed orders and their bars in lists."""
+
+    def __init__(self):
+        strategies.MeanRevertingStrategy.__init__(self)
+        self.executed_orders = []
+        self.executed_days = []
+
+    def notify_order(self, order):
+        if order.status == order.Completed:
+            self.executed_orders.append(order)
+            self.executed_days.append(len(self))
+        strategies.MeanRevertingStrategy.notify_order(self, order)
+
+
+def retained_memory(run: Callable[[], Any]) -> tuple[int, Any]:
+    """Returns the memory allocated by `run` that is still referenced by its
+    return value, in bytes, and the return value."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        history = run()
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0], history
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    params = {"k": 5, "num_std": 0.5}
+    print(f"{'bars':>8} {'orders':>8} {'lists (KiB)':>12} {'ledger (KiB)':>13}")
+    for num_bars in [2_500, 10_000, 40_000]:
+        financial_data = synthetic_financial_data(num_bars)
+
+        def run_lists():
+            strategy = utils.get_cerebro(
+                ListHistoryStrategy, financial_data, 1_000_000.00, params
+            ).run()[0]
+            return strategy.executed_orders, strategy.executed_days
+
+        def run_ledger():
+            strategy = utils.get_cerebro(
+                strategies.MeanRevertingStrategy, financial_data, 1_000_000.00, params
+            ).run()[0]
+            return strategy.ledger
+
+        lists_memory, _ = retained_memory(run_lists)
+        ledger_memory, ledger = retained_memory(run_ledger)
+        print(
+            f"{num_bars:>8} {len(ledger):>8} {lists_memory / 2**10:>12.1f} "
+            f"{ledger_memory / 2**10:>13.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""Compares the time per bar of `MeanRevertingStrategy` with the statistics
+updated incrementally and recomputed from the whole window every bar.
+
+Run with `python -m benchmarks.mean_reverting`.
+"""
+
+from example_strategies import strategies, utils
+
+from benchmarks.common import synthetic_financial_data, time_call
+from tests.helpers import WindowMeanRevertingStrategy
+
+
+def main():
+    num_days = 10_000
+    financial_data = synthetic_financial_data(num_days)
+    print(f"{'k':>6} {'window (us/bar)':>16} {'incremental (us/bar)':>21} {'speedup':>8}")
+    for k in [10, 30, 100, 300, 1000]:
+        params = {"k": k, "num_std": 1.0}
+        times = [
+            time_call(
+                lambda: utils.get_cerebro(strategy, financial_data, 1_000_000.00, params).run(),
+                repeat=1,
+            )
+            / num_days
+            for strategy in [WindowMeanRevertingStrategy, strategies.MeanRevertingStrategy]
+        ]
+        print(
+            f"{k:>6} {1e6 * times[0]:>16.1f} {1e6 * times[1]:>21.1f} {times[0] / times[1]:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
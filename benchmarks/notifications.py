@@ -0,0 +1,97 @@
+"""Compares the time `BaseStrategy` spends on order notifications at the
+default `WARNING` level before and after skipping the formatting of messages
+that are not logged.
+
+Run with `python -m benchmarks.notifications`.
+"""
+
+import logging
+
+import backtrader as bt
+from example_strategies import strategies, utils
+
+from benchmarks.common import synthetic_financial_data, time_call
+
+NUM_DAYS = 10_000
+
+
+class LegacyMeanRevertingStrategy(strategies.MeanRevertingStrategy):
+    """Formats the messages of all notifications, as `BaseStrategy` used to."""
+
+    def __init__(self):
+        strategies.MeanRevertingStrategy.__init__(self)
+        self.executed_orders = []
+        self.executed_days = []
+
+    def log(self, txt, dt=None, level=logging.INFO):
+        if dt is None:
+            dt = self.datas[0].datetime.date(0)
+        strategies.logger.log(level, "%s, %s", dt, txt)
+
+    def notify_order(self, order):
+        size = abs(order.size)
+        created_price = round(order.created.price, 2)
+        executed_price = round(order.executed.price, 2)
+        buy_str = "buy" if order.isbuy() else "sell"
+        status_name = order.getstatusname()
+
+        status_msg = f"{status_name}: {buy_str} {size} @"
+        created_msg = f"{status_msg} ${created_price}".upper()
+        executed_msg = f"{status_msg} ${executed_price}".upper()
+
+        if order.status in [order.Submitted, order.Accepted]:
+            self.log(created_msg, level=logging.DEBUG)
+            return
+        idx = self._data_idxs[id(order.data)]
+        if order.status in [order.Completed]:
+            self.log(executed_msg, level=logging.INFO)
+            self.executed_orders.append(order)
+            self.executed_days.append(len(self))
+            self.last_executed_days[idx] = len(self)
+        elif order.status in [order.Canceled, order.Margin, order.Rejected]:
+            self.log(created_msg, level=logging.WARNING)
+
+        self.orders[idx] = None
+
+    def notify_trade(self, trade):
+        if not trade.isclosed:
+            return
+
+        self.sum += trade.pnlcomm
+        self.log(
+            f"OPERATION PROFIT, GROSS {trade.pnl:.2f}, NET {trade.pnlcomm:.2f}, SUM {self.sum:.2f}"
+        )
+
+
+def replay_notifications(strategy: bt.Strategy, orders: list[bt.Order]):
+    """Notifies `strategy` of each of `orders` being submitted, accepted and
+    completed."""
+    for order in orders:
+        for status in [bt.Order.Submitted, bt.Order.Accepted, bt.Order.Completed]:
+            order.status = status
+            strategy.notify_order(order)
+
+
+def main():
+    strategies.logger.setLevel(logging.WARNING)
+    financial_data = synthetic_financial_data(NUM_DAYS)
+    params = {"k": 5, "num_std": 0.5}
+
+    print(f"{'strategy':<30} {'orders':>8} {'notify (ms)':>12} {'backtest (ms)':>14}")
+    for strategy in [LegacyMeanRevertingStrategy, strategies.MeanRevertingStrategy]:
+        cerebro = utils.get_cerebro(strategy, financial_data, 1_000_000.00, params)
+        instance = cerebro.run()[0]
+        orders = list(cerebro.broker.orders)
+        notify_time = time_call(lambda: replay_notifications(instance, orders), repeat=5)
+        backtest_time = time_call(
+            lambda: utils.get_cerebro(strategy, financial_data, 1_000_000.00, params).run(),
+            repeat=3,
+        )
+        print(
+            f"{strategy.__name__:<30} {len(orders):>8} {1e3 * notify_time:>12.1f} "
+            f"{1e3 * backtest_time:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
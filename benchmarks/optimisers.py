@@ -0,0 +1,93 @@
+"""Compares the number of backtests run by the optimisers, the number of
+backtests run until the parameters they return were first evaluated, and the
+quality of those parameters with those of the grid search.
+
+Run with `python -m benchmarks.optimisers`.
+"""
+
+import datetime
+import json
+import os
+import tempfile
+from typing import Any
+
+from example_strategies import optimisation, strategies
+
+TRAIN_TICKERS = [f"TRAIN{idx}" for idx in range(9)]
+TEST_TICKERS = [f"TEST{idx}" for idx in range(3)]
+PARAMS_GRID = {
+    "k": list(range(5, 105, 5)),
+    "num_std": [0.25 * idx for idx in range(1, 11)],
+}
+SETTINGS = {
+    "from_": datetime.date(2000, 1, 1),
+    "to": datetime.date(2009, 12, 31),
+    "source": "ou",
+    "engine": "vectorised",
+}
+OPTIMISERS = [
+    ("random", optimisation.random_search, {"num_samples": 40}),
+    ("successive halving", optimisation.successive_halving, {"eta": 3}),
+    ("bayesian", optimisation.bayesian_search, {"num_samples": 40}),
+]
+SEEDS = range(5)
+
+
+def run(optimiser, **kwargs) -> tuple[dict[str, Any], int, int, float, float]:
+    """Returns the optimal parameters, the number of training backtests, the
+    number of them run until the optimal parameters were first evaluated,
+    and the training and the test metric values."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # The checkpoint records the backtests in the order they were run.
+        checkpoint = os.path.join(tmp_dir, "checkpoint.jsonl")
+        optimal_params, train_metric, test_metric = optimiser(
+            strategies.MeanRevertingStrategy,
+            TRAIN_TICKERS,
+            TEST_TICKERS,
+            PARAMS_GRID,
+            checkpoint=checkpoint,
+            **SETTINGS,
+            **kwargs,
+        )
+        with open(checkpoint) as file:
+            records = [json.loads(line) for line in file][1:]
+
+    train_params = [
+        _encode(record["params"]) for record in records if record["ticker"] not in TEST_TICKERS
+    ]
+    evaluations_to_best = train_params.index(_encode(optimal_params)) + 1
+    return optimal_params, len(train_params), evaluations_to_best, train_metric, test_metric
+
+
+def _encode(params: dict[str, Any]) -> str:
+    # Parameters are compared as they are written to the checkpoint.
+    return json.dumps(json.loads(json.dumps(params, default=str)), sort_keys=True)
+
+
+def main():
+    print(
+        f"{'optimiser':>20} {'backtests':>10} {'to best':>8} {'grid best':>10} "
+        f"{'train Sharpe':>13} {'test Sharpe':>12}"
+    )
+    grid_params, num_backtests, to_best, train_metric, test_metric = run(optimisation.grid_search)
+    print(
+        f"{'grid':>20} {num_backtests:>10} {to_best:>8} {1.0:>10.0%} "
+        f"{train_metric:>13.3f} {test_metric:>12.3f}"
+    )
+    for name, optimiser, kwargs in OPTIMISERS:
+        runs = [run(optimiser, seed=seed, **kwargs) for seed in SEEDS]
+        found_grid_best = [_encode(result[0]) == _encode(grid_params) for result in runs]
+        print(
+            f"{name:>20} {sum(result[1] for result in runs) / len(runs):>10.0f} "
+            f"{sum(result[2] for result in runs) / len(runs):>8.0f} "
+            f"{sum(found_grid_best) / len(runs):>10.0%} "
+            f"{sum(result[3] for result in runs) / len(runs):>13.3f} "
+            f"{sum(result[4] for result in runs) / len(runs):>12.3f}"
+        )
+    print(
+        f"(Averages over {len(SEEDS)} seeds; 'grid best' is how often the grid's optimum is found.)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Times scanning synthetic universes of increasing size for pairs, and
+compares computing the hedge ratios of all pairs at once with fitting them
+one pair at a time.
+
+Run with `python -m benchmarks.pairs`.
+"""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+from example_strategies import pairs, stats
+
+from benchmarks.common import time_call
+
+
+def synthetic_universe(num_tickers: int, num_days: int = 1000, seed: int = 0) -> pd.DataFrame:
+    """Generates prices of stocks in sectors of ten, whose prices depend on a
+    random walk common to the sector.
+
+    Args:
+        num_tickers: Number of stocks.
+        num_days: Number of trading days.
+        seed: Random seed.
+
+    Returns:
+        Prices, one column per ticker.
+    """
+    rng = np.random.default_rng(seed)
+    num_sectors = -(-num_tickers // 10)
+    factors = np.cumsum(rng.normal(size=(num_sectors, num_days)), axis=1)
+    loadings = rng.uniform(0.5, 2.0, size=(num_tickers, 1))
+    noise = np.cumsum(rng.normal(scale=0.2, size=(num_tickers, num_days)), axis=1)
+    prices = 100.0 + loadings * factors[np.arange(num_tickers) // 10] + noise
+    return pd.DataFrame(prices.T, columns=[f"T{idx}" for idx in range(num_tickers)])
+
+
+def main():
+    print(
+        f"{'tickers':>8} {'pairs':>8} {'tested':>7} {'per-pair ratios (s)':>20} "
+        f"{'all ratios (ms)':>16} {'scan (s)':>9}"
+    )
+    for num_tickers in [50, 100, 200, 500]:
+        prices = synthetic_universe(num_tickers)
+        price_matrix = prices.to_numpy().T
+        pair_idxs = list(itertools.combinations(range(num_tickers), 2))
+
+        # Fitting is timed on a sample of pairs and extrapolated.
+        sample = pair_idxs[:: max(1, len(pair_idxs) // 200)]
+        per_pair_time = time_call(
+            lambda: [
+                stats.pairs_trading_hedge_ratio(price_matrix[idx_1], price_matrix[idx_2])
+                for idx_1, idx_2 in sample
+            ],
+            repeat=1,
+        ) * (len(pair_idxs) / len(sample))
+        all_time = time_call(lambda: pairs.hedge_ratios(price_matrix))
+        table = []
+        scan_time = time_call(
+            lambda: table.append(pairs.scan(prices, min_correlation=0.95, n_jobs=-1)), repeat=1
+        )
+        print(
+            f"{num_tickers:>8} {len(pair_idxs):>8} {len(table[0]):>7} {per_pair_time:>20.2f} "
+            f"{1e3 * all_time:>16.2f} {scan_time:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
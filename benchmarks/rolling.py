@@ -0,0 +1,40 @@
+"""Compares computing Hurst exponents and ADF test statistics of moving
+windows from scratch with updating them as the window slides.
+
+Run with `python -m benchmarks.rolling`.
+"""
+
+import warnings
+
+import numpy as np
+import statsmodels.tsa.stattools as ts
+from example_strategies import stats
+
+from benchmarks.common import time_call
+
+
+def main():
+    warnings.simplefilter("ignore", FutureWarning)
+    rng = np.random.default_rng(0)
+    window = 256
+    print(
+        f"{'days':>6} {'Hurst (s)':>10} {'rolling Hurst (s)':>18} "
+        f"{'ADF (s)':>8} {'rolling ADF (s)':>16}"
+    )
+    for num_days in [1000, 5000]:
+        prices = 1000.0 + np.cumsum(rng.normal(size=num_days))
+        windows = [prices[idx - window + 1 : idx + 1] for idx in range(window - 1, num_days)]
+        hurst_time = time_call(lambda: [stats.hurst_exponent(w) for w in windows], repeat=1)
+        rolling_hurst_time = time_call(lambda: stats.rolling_hurst_exponent(prices, window))
+        adf_time = time_call(
+            lambda: [ts.adfuller(w, maxlag=1, autolag=None)[0] for w in windows], repeat=1
+        )
+        rolling_adf_time = time_call(lambda: stats.rolling_adf_statistic(prices, window))
+        print(
+            f"{num_days:>6} {hurst_time:>10.3f} {rolling_hurst_time:>18.4f} "
+            f"{adf_time:>8.3f} {rolling_adf_time:>16.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Compares the peak memory of running `MeanRevertingStrategy` in a backtest
+and on streamed bars, and reports the decision latency per streamed bar.
+Memory of the streaming run only grows with the number of orders.
+
+Run with `python -m benchmarks.streaming`.
+"""
+
+import datetime
+import tracemalloc
+from typing import Callable, Iterator
+
+import numpy as np
+from example_strategies import live, strategies, utils
+
+from benchmarks.common import synthetic_financial_data
+
+
+def random_walk_bars(num_bars: int, seed: int = 0) -> Iterator[live.Bar]:
+    """Yields minute bars of a random walk without keeping their history."""
+    rng = np.random.default_rng(seed)
+    start = datetime.datetime(2020, 1, 2, 9, 30)
+    price = 100.0
+    for idx in range(num_bars):
+        price *= np.exp(rng.normal(0.0, 0.001))
+        yield live.Bar(start + datetime.timedelta(minutes=idx), price, price, price, price, 0.0)
+
+
+def peak_memory(func: Callable) -> int:
+    """Returns the peak memory allocated by `func` in bytes."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    params = {"k": 50}
+    print(
+        f"{'bars':>8} {'backtest (MiB)':>15} {'streaming (MiB)':>16} "
+        f"{'p50 (us)':>9} {'p99 (us)':>9}"
+    )
+    for num_bars in [10_000, 50_000]:
+        financial_data = synthetic_financial_data(num_bars)
+        backtest_memory = peak_memory(
+            lambda: utils.get_cerebro(
+                strategies.MeanRevertingStrategy, financial_data, 1_000_000.00, params
+            ).run()
+        )
+        latencies = []
+        streaming_memory = peak_memory(
+            lambda: latencies.append(
+                live.run(
+                    strategies.MeanRevertingStrategy, random_walk_bars(num_bars), params=params
+                )[1]
+            )
+        )
+        print(
+            f"{num_bars:>8} {backtest_memory / 2**20:>15.1f} {streaming_memory / 2**20:>16.1f} "
+            f"{1e6 * latencies[0].p50:>9.0f} {1e6 * latencies[0].p99:>9.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
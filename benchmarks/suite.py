@@ -0,0 +1,268 @@
+"""Times data loading, single backtests, grid searches and the statistics on
+synthetic data, and stores the results as JSON so that they can be compared
+between commits.
+
+Run with
+```text
+python -m benchmarks.suite run --output before.json
+python -m benchmarks.suite run --output after.json
+python -m benchmarks.suite compare before.json after.json
+```
+"""
+
+import argparse
+import collections
+import datetime
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import warnings
+from typing import Callable, Iterator, Optional
+
+import numpy as np
+from example_strategies import data, optimisation, stats, strategies, utils
+
+from benchmarks.common import synthetic_financial_data, time_call
+
+Case = collections.namedtuple("Case", ["name", "func", "repeat"])
+
+# Business days from 1990 must end before 2262 to fit in `datetime64[ns]`.
+SERIES_LENGTHS = [1_000, 10_000, 50_000]
+# ADF test is too slow for longer series.
+STATS_SERIES_LENGTHS = [1_000, 10_000, 30_000]
+BACKTEST_DAYS = 2_500
+GRID_SIZES = [4, 16]
+TICKER_COUNTS = [1, 4]
+
+
+def data_cases() -> Iterator[Case]:
+    """Loading from the on-disk cache and from the in-memory cache, and
+    selecting a date range."""
+    from_date, to_date = datetime.date(2000, 1, 1), datetime.date(2019, 12, 31)
+    # Populates the on-disk cache.
+    data.load("SUITE", source="gbm")
+
+    def load_from_disk():
+        data.cache_clear()
+        data.load("SUITE", from_date=from_date, to_date=to_date, source="gbm")
+
+    yield Case("data.load/disk", load_from_disk, 5)
+    yield Case(
+        "data.load/memory",
+        lambda: data.load("SUITE", from_date=from_date, to_date=to_date, source="gbm"),
+        20,
+    )
+    for num_days in SERIES_LENGTHS:
+        financial_data = synthetic_financial_data(num_days)
+        dates = financial_data.index
+        yield Case(
+            f"data._read_date_range/{num_days}",
+            lambda df=financial_data, dates=dates: data._read_date_range(
+                df, dates[len(dates) // 4], dates[-len(dates) // 4]
+            ),
+            20,
+        )
+
+
+def backtest_cases() -> Iterator[Case]:
+    """A single backtest of each strategy."""
+    financial_data = synthetic_financial_data(BACKTEST_DAYS)
+    for strategy in [
+        strategies.NaiveStrategy,
+        strategies.MeanRevertingStrategy,
+        strategies.MACrossoverStrategy,
+    ]:
+        yield Case(
+            f"backtest/{strategy.__name__}",
+            lambda strategy=strategy: utils.get_cerebro(
+                strategy, financial_data, 1_000_000.00, {}
+            ).run(),
+            3,
+        )
+
+    ticker_data = {
+        ticker: synthetic_financial_data(BACKTEST_DAYS, seed=seed)
+        for seed, ticker in enumerate(["A", "B"])
+    }
+    yield Case(
+        "backtest/CointegrationBollingerBandsStrategy",
+        lambda: utils.get_cerebro(
+            strategies.CointegrationBollingerBandsStrategy,
+            ticker_data,
+            1_000_000.00,
+            {"weights": [1.0, -1.0], "qty": 100},
+        ).run(),
+        3,
+    )
+
+
+def grid_search_cases() -> Iterator[Case]:
+    """Grid searches of `MeanRevertingStrategy` of several sizes."""
+    # Populates the on-disk cache, so that no search has to generate the data.
+    data.load_many([f"TRAIN{idx}" for idx in range(max(TICKER_COUNTS))] + ["TEST"], source="gbm")
+    for engine in ["backtrader", "vectorised"]:
+        for grid_size in GRID_SIZES:
+            params_grid = {
+                "k": list(range(10, 10 + 10 * (grid_size // 2), 10)),
+                "num_std": [1.0, 2.0],
+            }
+            for num_tickers in TICKER_COUNTS:
+                yield Case(
+                    f"grid_search/{engine}/{grid_size}x{num_tickers}",
+                    lambda params_grid=params_grid, num_tickers=num_tickers, engine=engine: (
+                        optimisation.grid_search(
+                            strategies.MeanRevertingStrategy,
+                            [f"TRAIN{idx}" for idx in range(num_tickers)],
+                            ["TEST"],
+                            params_grid,
+                            from_=datetime.date(2010, 1, 1),
+                            to=datetime.date(2014, 12, 31),
+                            source="gbm",
+                            engine=engine,
+                        )
+                    ),
+                    1,
+                )
+
+
+def stats_cases() -> Iterator[Case]:
+    """Statistics of series of increasing length."""
+    rng = np.random.default_rng(0)
+    for num_days in STATS_SERIES_LENGTHS:
+        prices_1 = 100.0 + np.cumsum(rng.normal(size=num_days))
+        prices_2 = prices_1 + rng.normal(size=num_days)
+        yield Case(
+            f"stats.hurst_exponent/{num_days}", lambda x=prices_1: stats.hurst_exponent(x), 5
+        )
+        yield Case(f"stats.adf_p_val/{num_days}", lambda x=prices_1: stats.adf_p_val(x), 3)
+        yield Case(
+            f"stats.pairs_trading_hedge_ratio/{num_days}",
+            lambda x=prices_1, y=prices_2: stats.pairs_trading_hedge_ratio(x, y),
+            5,
+        )
+
+
+GROUPS: dict[str, Callable[[], Iterator[Case]]] = {
+    "data": data_cases,
+    "backtest": backtest_cases,
+    "grid_search": grid_search_cases,
+    "stats": stats_cases,
+}
+
+
+def run(pattern: Optional[str] = None, repeat: Optional[int] = None) -> dict:
+    """Runs the benchmarks.
+
+    Args:
+        pattern: If given, only the benchmarks whose names contain it are run.
+        repeat: Number of calls to time, overriding that of each benchmark.
+
+    Returns:
+        Metadata of the run and the best wall time of each benchmark in
+        seconds.
+    """
+    timings = {}
+    # The data is cached in a temporary directory so that the user's cache is
+    # neither used nor modified.
+    data_dir_path = data._data_dir_path
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data._data_dir_path = lambda: tmp_dir
+        data.cache_clear()
+        try:
+            for cases in GROUPS.values():
+                for case in cases():
+                    if pattern is not None and pattern not in case.name:
+                        continue
+                    timings[case.name] = time_call(case.func, repeat=repeat or case.repeat)
+                    print(f"{case.name:<60} {1e3 * timings[case.name]:>12.3f} ms", flush=True)
+        finally:
+            data._data_dir_path = data_dir_path
+            data.cache_clear()
+
+    return {
+        "commit": _commit(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "timings": timings,
+    }
+
+
+def compare(before: dict, after: dict, threshold: float = 0.1) -> list[str]:
+    """Prints the relative change of the time of every benchmark in both
+    results.
+
+    Args:
+        before: Results of `run`, e.g. at the base commit.
+        after: Results of `run`, e.g. at the new commit.
+        threshold: Relative increase in time regarded as a regression.
+
+    Returns:
+        Names of the regressed benchmarks.
+    """
+    print(f"{before.get('commit')} -> {after.get('commit')}")
+    print(f"{'benchmark':<60} {'before (ms)':>12} {'after (ms)':>12} {'change':>8}")
+    regressions = []
+    for name, before_time in before["timings"].items():
+        if name not in after["timings"]:
+            continue
+        after_time = after["timings"][name]
+        change = after_time / before_time - 1.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = " !"
+        print(
+            f"{name:<60} {1e3 * before_time:>12.3f} {1e3 * after_time:>12.3f} "
+            f"{change:>+8.1%}{flag}"
+        )
+
+    return regressions
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(args: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Runs and compares benchmarks.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--output", help="path of the JSON file to write the results to")
+    run_parser.add_argument("-k", dest="pattern", help="only run benchmarks containing this")
+    run_parser.add_argument("--repeat", type=int, help="number of calls to time")
+    compare_parser = subparsers.add_parser("compare", help="compare two results")
+    compare_parser.add_argument("before", help="JSON file of the earlier results")
+    compare_parser.add_argument("after", help="JSON file of the later results")
+    compare_parser.add_argument(
+        "--threshold", type=float, default=0.1, help="relative slowdown regarded as a regression"
+    )
+    parsed = parser.parse_args(args)
+
+    if parsed.command == "run":
+        # Statsmodels warns about its own deprecations in `adf_p_val`.
+        warnings.simplefilter("ignore", FutureWarning)
+        results = run(parsed.pattern, parsed.repeat)
+        if parsed.output is not None:
+            with open(parsed.output, "w") as file:
+                json.dump(results, file, indent=2)
+    elif parsed.command == "compare":
+        with open(parsed.before) as file:
+            before = json.load(file)
+        with open(parsed.after) as file:
+            after = json.load(file)
+        regressions = compare(before, after, parsed.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmarks regressed by more than {parsed.threshold:.0%}.")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
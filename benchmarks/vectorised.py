@@ -0,0 +1,66 @@
+"""Compares the time of a single backtest in backtrader and in the vectorised
+engine, and of a parameter grid evaluated one backtest at a time and in a
+batch sharing indicators.
+
+Run with `python -m benchmarks.vectorised`.
+"""
+
+from example_strategies import strategies, utils, vectorised
+
+from benchmarks.common import synthetic_financial_data, time_call
+
+STRATEGIES = [
+    (strategies.NaiveStrategy, {}),
+    (strategies.MeanRevertingStrategy, {"k": 20, "num_std": 1.0}),
+    (strategies.MACrossoverStrategy, {"fast_length": 5, "slow_length": 50}),
+]
+
+
+def main():
+    print(
+        f"{'strategy':>24} {'days':>7} {'backtrader (ms)':>16} {'vectorised (ms)':>16} {'speedup':>8}"
+    )
+    for num_days in [2_500, 10_000]:
+        financial_data = synthetic_financial_data(num_days)
+        for strategy, params in STRATEGIES:
+            backtrader_time = time_call(
+                lambda: utils.get_cerebro(strategy, financial_data, 1_000_000.00, params).run(),
+                repeat=1,
+            )
+            vectorised_time = time_call(
+                lambda: vectorised.backtest(strategy, financial_data, params).sharpe_ratio()
+            )
+            print(
+                f"{strategy.__name__:>24} {num_days:>7} {1e3 * backtrader_time:>16.1f} "
+                f"{1e3 * vectorised_time:>16.2f} {backtrader_time / vectorised_time:>7.0f}x"
+            )
+
+    params_list = [
+        {"fast_length": fast_length, "slow_length": slow_length}
+        for fast_length in range(2, 21, 2)
+        for slow_length in range(20, 201, 20)
+    ]
+    print(f"\n{'grid size':>10} {'days':>7} {'one at a time (ms)':>19} {'batch (ms)':>11}")
+    for num_days in [2_500, 10_000]:
+        financial_data = synthetic_financial_data(num_days)
+        single_time = time_call(
+            lambda: [
+                vectorised.backtest(strategies.MACrossoverStrategy, financial_data, params)
+                for params in params_list
+            ],
+            repeat=1,
+        )
+        batch_time = time_call(
+            lambda: vectorised.grid_metrics(
+                strategies.MACrossoverStrategy, financial_data, params_list
+            ),
+            repeat=1,
+        )
+        print(
+            f"{len(params_list):>10} {num_days:>7} {1e3 * single_time:>19.1f} "
+            f"{1e3 * batch_time:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
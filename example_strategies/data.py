@@ -1,33 +1,84 @@
+import collections
+import concurrent.futures
 import datetime
 import glob
 import os
+import shutil
+import threading
+import zlib
 from pathlib import Path
+from typing import Callable, Optional, Union
 
+import numpy as np
+import numpy.typing as npt
 import pandas as pd
 import yfinance as yf
+from scipy import signal
+
+# Fetches data of `ticker` starting at the given date (inclusive), or its full
+# history if the date is `None`.
+Provider = Callable[[str, Optional[datetime.date]], pd.DataFrame]
+
+# Each ticker's history is cached as a directory of `.npy` files:
+# * `index.npy` -- sorted `datetime64[ns]` dates,
+# * `values.npy` -- `float64` matrix of shape `(len(index), len(columns))`,
+#   stored in column-major order so that every column is contiguous on disk,
+# * `columns.npy` -- column names.
+_CACHE_SUFFIX = ".cols"
+_INDEX_FILE = "index.npy"
+_VALUES_FILE = "values.npy"
+_COLUMNS_FILE = "columns.npy"
+# Number of the last cached bars fetched again when refreshing the cache
+# incrementally, to check that the history has not changed.
+_OVERLAP_BARS = 5
+# Relative difference of the overlapping bars regarded as a change.
+_OVERLAP_RTOL = 1e-6
 
 
 def _data_dir_path() -> str:
     return os.path.join(Path(__file__).parent.parent.absolute(), ".data")
 
 
-def ticker_data_path(ticker: str) -> str:
+def _source_dir_path(source: str) -> str:
+    # Yahoo data is kept at the top level for compatibility with older caches.
+    if source == "yahoo":
+        return _data_dir_path()
+    return os.path.join(_data_dir_path(), source)
+
+
+def ticker_data_path(ticker: str, source: str = "yahoo") -> str:
     """Returns ticker data's file path.
 
     Args:
         ticker: Stock symbol.
+        source: Source of financial information.
 
     Returns:
         Path.
     """
-    return os.path.join(_data_dir_path(), f"{ticker.upper()}__{datetime.date.today()}.csv")
+    return os.path.join(
+        _source_dir_path(source), f"{ticker.upper()}__{datetime.date.today()}{_CACHE_SUFFIX}"
+    )
 
 
-def ticker_data_path_pattern(ticker: str) -> str:
+def ticker_data_path_pattern(ticker: str, source: str = "yahoo") -> str:
     """Returns ticker data's file path pattern that may match data downloaded on different days.
 
     Args:
         ticker: Stock symbol.
+        source: Source of financial information.
+
+    Returns:
+        Path pattern.
+    """
+    return os.path.join(_source_dir_path(source), f"{ticker.upper()}__*{_CACHE_SUFFIX}")
+
+
+def legacy_ticker_data_path_pattern(ticker: str = "*") -> str:
+    """Returns file path pattern of ticker data saved in the legacy CSV format.
+
+    Args:
+        ticker: Stock symbol. By default, matches all tickers.
 
     Returns:
         Path pattern.
@@ -59,6 +110,8 @@ def load(
     from_date: datetime.date = None,
     to_date: datetime.date = None,
     source: str = "yahoo",
+    mmap: bool = False,
+    incremental: bool = True,
 ) -> pd.DataFrame:
     """Loads financial data.
 
@@ -66,47 +119,546 @@ def load(
         ticker: Stock symbol.
         from_date: Date to get the data from.
         to_date: Date to get the data to.
-        source: Source of financial information.
+        source: Name of the provider of financial information, see
+            `register_provider`.
+        mmap: Whether to memory-map the cached data instead of reading it into
+            memory. The returned data frame is then a read-only view of the
+            file, so processes loading the same ticker share memory.
+        incremental: Whether to only fetch the bars after the last cached one
+            when the cached data is out of date. The last few cached bars are
+            fetched as well, and if they have changed, e.g. because the prices
+            were adjusted for a split or a dividend, or if the columns have
+            changed, the whole history is fetched again, as it is when this
+            is not set.
+
+    Returns:
+        Financial data indexed by date. It is a read-only view of the data
+        cached in memory, see `cache_info`.
+    """
+    path = _update_cache(ticker, source, incremental)
+
+    return _read_date_range(_FRAME_CACHE.get(path, mmap), from_date, to_date)
+
+
+def load_columns(
+    ticker: str,
+    from_date: datetime.date = None,
+    to_date: datetime.date = None,
+    source: str = "yahoo",
+    incremental: bool = True,
+) -> dict[str, np.ndarray]:
+    """Loads financial data as read-only memory-mapped arrays.
+
+    Args:
+        ticker: Stock symbol.
+        from_date: Date to get the data from.
+        to_date: Date to get the data to.
+        source: See `load`.
+        incremental: See `load`.
+
+    Returns:
+        Arrays of each column, e.g. `"Close"`, and of the dates under `"Date"`.
+    """
+    path = _update_cache(ticker, source, incremental)
+    index = np.load(os.path.join(path, _INDEX_FILE), mmap_mode="r")
+    values = np.load(os.path.join(path, _VALUES_FILE), mmap_mode="r")
+    columns = np.load(os.path.join(path, _COLUMNS_FILE))
+
+    date_range = _date_range_slice(index, from_date, to_date)
+    arrays = {"Date": index[date_range]}
+    for idx, column in enumerate(columns):
+        arrays[str(column)] = values[date_range, idx]
+
+    return arrays
+
+
+def load_many(
+    tickers: list[str],
+    from_date: datetime.date = None,
+    to_date: datetime.date = None,
+    source: str = "yahoo",
+    mmap: bool = False,
+    incremental: bool = True,
+    max_workers: int = 8,
+    panel: bool = False,
+) -> Union[dict[str, pd.DataFrame], pd.DataFrame]:
+    """Loads financial data of multiple tickers.
+
+    Tickers whose data is already cached are found using a single directory
+    listing, while the rest are fetched concurrently.
+
+    Args:
+        tickers: Stock symbols.
+        from_date: Date to get the data from.
+        to_date: Date to get the data to.
+        source: See `load`.
+        mmap: See `load`.
+        incremental: See `load`.
+        max_workers: Maximum number of tickers fetched at the same time.
+        panel: Whether to return a single data frame instead of a dictionary.
+
+    Returns:
+        Financial data of each ticker, or, if `panel` is set, a data frame
+        whose columns are indexed by ticker and then by field, with the dates
+        of all the tickers aligned.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    get_provider(source)
+
+    source_dir_path = _source_dir_path(source)
+    cached_file_names = (
+        set(os.listdir(source_dir_path)) if os.path.isdir(source_dir_path) else set()
+    )
+    paths = {ticker: ticker_data_path(ticker, source) for ticker in tickers}
+    missing_tickers = [
+        ticker for ticker in tickers if os.path.basename(paths[ticker]) not in cached_file_names
+    ]
+
+    if missing_tickers:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Consume the iterator so that errors are raised.
+            list(
+                executor.map(
+                    lambda ticker: _update_cache(ticker, source, incremental), missing_tickers
+                )
+            )
+
+    financial_data = {}
+    for ticker in tickers:
+        financial_data[ticker] = _read_date_range(
+            _FRAME_CACHE.get(paths[ticker], mmap), from_date, to_date
+        )
+
+    if panel:
+        return pd.concat(financial_data, axis=1)
+
+    return financial_data
+
+
+CacheInfo = collections.namedtuple(
+    "CacheInfo", ["hits", "misses", "evictions", "maxsize", "currsize"]
+)
+
+
+class _FrameCache:
+    """Least-recently-used cache of full histories read from the disk.
+
+    Entries are keyed by the path and modification time of the cached data,
+    so refreshed data is never served from memory.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._frames = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str, mmap: bool = False) -> pd.DataFrame:
+        stat = os.stat(path)
+        key = (path, stat.st_ino, stat.st_mtime_ns, mmap)
+        with self._lock:
+            if key in self._frames:
+                self.hits += 1
+                self._frames.move_to_end(key)
+                return self._frames[key]
+            self.misses += 1
+
+        financial_data = _read_columns(path, mmap=mmap)
+
+        with self._lock:
+            self._frames[key] = financial_data
+            self._evict(self.maxsize)
+
+        return financial_data
+
+    def resize(self, maxsize: int):
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict(maxsize)
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(
+                self.hits, self.misses, self.evictions, self.maxsize, len(self._frames)
+            )
+
+    def _evict(self, maxsize: int):
+        while len(self._frames) > maxsize:
+            self._frames.popitem(last=False)
+            self.evictions += 1
+
+
+_FRAME_CACHE = _FrameCache(maxsize=128)
+
+
+def cache_info() -> CacheInfo:
+    """Returns statistics of the in-memory cache of loaded data.
 
     Returns:
+        Numbers of hits, misses and evictions, and the maximum and current
+        numbers of cached tickers.
     """
-    if source != "yahoo":
-        raise ValueError('Currently only "yahoo" is supported as a source.')
+    return _FRAME_CACHE.info()
 
-    path = ticker_data_path(ticker)
+
+def cache_clear():
+    """Clears the in-memory cache of loaded data and its statistics."""
+    _FRAME_CACHE.clear()
+
+
+def set_cache_size(maxsize: int):
+    """Sets the maximum number of tickers whose data is cached in memory.
+
+    Args:
+        maxsize: Maximum number of tickers. If zero, nothing is cached.
+    """
+    _FRAME_CACHE.resize(maxsize)
+
+
+def _update_cache(ticker: str, source: str, incremental: bool = True) -> str:
+    """Makes sure that today's data is cached and returns its path."""
+    provider = get_provider(source)
+    path = ticker_data_path(ticker, source)
+
+    if source == "yahoo" and not os.path.exists(path):
+        # Reuse today's data if it was saved before the switch to the binary format.
+        migrate_csv_cache(legacy_ticker_data_path_pattern(ticker))
 
     if os.path.exists(path) and ticker_data_path_metadata(path)[1] == datetime.date.today():
-        financial_data = pd.read_csv(path, index_col=0, parse_dates=True)
-        return _read_date_range(financial_data, from_date, to_date)
+        return path
+
+    old_file_paths = sorted(
+        glob.glob(ticker_data_path_pattern(ticker, source)),
+        key=lambda old_path: ticker_data_path_metadata(old_path)[1],
+    )
+    Path(_source_dir_path(source)).mkdir(parents=True, exist_ok=True)
 
-    old_file_paths = glob.glob(ticker_data_path_pattern(ticker))
+    financial_data = None
+    if incremental and old_file_paths:
+        financial_data = _append_new_bars(provider, ticker, _read_columns(old_file_paths[-1]))
+
+    if financial_data is None:
+        financial_data = provider(ticker, None)
+
+    # The new file replaces the old ones only after it has been written fully.
+    _write_columns(financial_data, path)
     for old_file_path in old_file_paths:
-        os.remove(old_file_path)
-    Path(_data_dir_path()).mkdir(parents=True, exist_ok=True)
+        shutil.rmtree(old_file_path)
 
-    financial_data = yf.download(ticker, period="max", timeout=60.0)
-    financial_data.to_csv(path)
+    return path
 
-    return _read_date_range(financial_data, from_date, to_date)
 
+def _append_new_bars(
+    provider: Provider, ticker: str, cached_data: pd.DataFrame
+) -> Optional[pd.DataFrame]:
+    """Appends the bars after the last cached one to `cached_data`.
 
-def _read_date_range(
-    financial_data: pd.DataFrame, from_date: datetime.date = None, to_date: datetime.date = None
+    Returns `None` if the history cannot be extended, i.e. if nothing is
+    cached, if the columns have changed, or if the last `_OVERLAP_BARS`
+    cached bars are different when they are fetched again.
+    """
+    if len(cached_data) == 0:
+        return None
+
+    overlap = cached_data.iloc[-_OVERLAP_BARS:]
+    new_data = _normalise_columns(provider(ticker, overlap.index[0].date()))
+    if set(new_data.columns) != set(cached_data.columns):
+        return None
+
+    new_data = new_data[cached_data.columns]
+    new_index = pd.to_datetime(new_data.index)
+    fetched_overlap = new_data[new_index <= overlap.index[-1]]
+    if not np.array_equal(
+        pd.to_datetime(fetched_overlap.index).to_numpy(dtype="datetime64[ns]"),
+        overlap.index.to_numpy(dtype="datetime64[ns]"),
+    ) or not np.allclose(
+        fetched_overlap.to_numpy(dtype=np.float64),
+        overlap.to_numpy(dtype=np.float64),
+        rtol=_OVERLAP_RTOL,
+        atol=0.0,
+        equal_nan=True,
+    ):
+        return None
+
+    return pd.concat([cached_data, new_data[new_index > overlap.index[-1]]])
+
+
+def register_provider(name: str, provider: Provider):
+    """Makes `provider` available as a `source` in `load`.
+
+    Args:
+        name: Name of the source. Data of sources other than `"yahoo"` is
+            cached in a subdirectory with this name.
+        provider: Function returning financial data of a ticker starting at
+            the given date, or its full history if the date is `None`.
+    """
+    _PROVIDERS[name] = provider
+
+
+def get_provider(name: str) -> Provider:
+    """Returns provider registered under `name`.
+
+    Args:
+        name: Name of the source.
+
+    Returns:
+        Provider of financial data.
+    """
+    try:
+        return _PROVIDERS[name]
+    except KeyError:
+        raise ValueError(
+            f'Source "{name}" is not recognised. Should be one of {sorted(_PROVIDERS)}.'
+        ) from None
+
+
+def _fetch_yahoo(ticker: str, start: datetime.date = None) -> pd.DataFrame:
+    if start is None:
+        return yf.download(ticker, period="max", timeout=60.0)
+
+    return yf.download(ticker, start=start, timeout=60.0)
+
+
+class LocalProvider:
+    """Reads financial data from a local directory.
+
+    The directory should contain either `TICKER.csv` files in the format saved
+    by `pd.DataFrame.to_csv`, or `TICKER.cols` directories in the binary
+    format used by the cache.
+
+    Args:
+        directory: Path of the directory.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def __call__(self, ticker: str, start: datetime.date = None) -> pd.DataFrame:
+        path = os.path.join(self.directory, ticker.upper())
+        if os.path.isdir(path + _CACHE_SUFFIX):
+            financial_data = _read_columns(path + _CACHE_SUFFIX)
+        elif os.path.exists(path + ".csv"):
+            financial_data = pd.read_csv(path + ".csv", index_col=0, parse_dates=True)
+        else:
+            raise FileNotFoundError(f'No data of "{ticker}" in "{self.directory}".')
+
+        return financial_data.iloc[_date_range_slice(financial_data.index, start)]
+
+
+class SyntheticProvider:
+    """Generates random financial data, e.g. for benchmarks.
+
+    The data of each ticker is deterministic and covers every business day
+    from `from_date` to today, so it can be cached and refreshed like
+    downloaded data.
+
+    Args:
+        model: Either `"gbm"` (geometric Brownian motion) or `"ou"`
+            (Ornstein-Uhlenbeck process of log prices, i.e. mean-reverting).
+        from_date: Date of the first bar.
+        seed: Random seed. It is combined with the ticker so that different
+            tickers get different prices.
+        **model_params: See `synthetic_financial_data`.
+    """
+
+    def __init__(
+        self,
+        model: str = "gbm",
+        from_date: datetime.date = datetime.date(1990, 1, 1),
+        seed: int = 0,
+        **model_params,
+    ):
+        self.model = model
+        self.from_date = from_date
+        self.seed = seed
+        self.model_params = model_params
+
+    def __call__(self, ticker: str, start: datetime.date = None) -> pd.DataFrame:
+        dates = pd.bdate_range(self.from_date, datetime.date.today(), name="Date")
+        financial_data = synthetic_financial_data(
+            dates,
+            model=self.model,
+            seed=[self.seed, zlib.crc32(ticker.upper().encode())],
+            **self.model_params,
+        )
+
+        return financial_data.iloc[_date_range_slice(financial_data.index, start)]
+
+
+def synthetic_financial_data(
+    dates: pd.DatetimeIndex,
+    model: str = "gbm",
+    initial_price: float = 100.0,
+    drift: float = 0.0002,
+    volatility: float = 0.01,
+    mean_reversion: float = 0.05,
+    seed=0,
 ) -> pd.DataFrame:
-    financial_data.index = pd.to_datetime(financial_data.index)
-    from_date_f = pd.to_datetime(from_date)
-    to_date_f = pd.to_datetime(to_date)
-    financial_data_index_f = pd.to_datetime(financial_data.index)
+    """Generates random daily OHLCV data.
 
-    if from_date is None and to_date is None:
-        return financial_data
+    Args:
+        dates: Dates of the bars.
+        model: Either `"gbm"` (geometric Brownian motion) or `"ou"`
+            (Ornstein-Uhlenbeck process of log prices, i.e. mean-reverting).
+        initial_price: Price at the first bar; also the long-term mean of the
+            OU process.
+        drift: Daily drift of log prices (GBM only).
+        volatility: Daily volatility of log prices.
+        mean_reversion: Speed of reversion to the mean (OU only).
+        seed: Random seed, anything accepted by `np.random.default_rng`.
 
-    if from_date is not None and to_date is None:
-        return financial_data[financial_data_index_f >= from_date_f]
+    Returns:
+        Financial data in the same format as `load`.
+    """
+    rng = np.random.default_rng(seed)
+    num_days = len(dates)
+    shocks = rng.normal(0.0, volatility, num_days)
 
-    if from_date is None and to_date is not None:
-        return financial_data[financial_data_index_f <= to_date_f]
+    if model == "gbm":
+        increments = shocks + drift
+        increments[0] = 0.0
+        log_prices = np.log(initial_price) + np.cumsum(increments)
+    elif model == "ou":
+        # Deviations from the mean follow $d_{t+1} = (1 - \theta) d_t + \epsilon_t$.
+        deviations = signal.lfilter([0.0, 1.0], [1.0, mean_reversion - 1.0], shocks)
+        log_prices = np.log(initial_price) + deviations
+    else:
+        raise ValueError(f'Model "{model}" is not recognised. Should be one of ["gbm", "ou"].')
 
-    return financial_data[
-        (from_date_f <= financial_data_index_f) & (financial_data_index_f <= to_date_f)
-    ]
+    close = np.exp(log_prices)
+    # Opening prices gap slightly from the previous close.
+    open_ = np.concatenate([[close[0]], close[:-1]]) * np.exp(
+        rng.normal(0.0, volatility / 5, num_days)
+    )
+    spread = np.abs(rng.normal(0.0, volatility / 2, num_days))
+
+    return pd.DataFrame(
+        {
+            "Open": open_,
+            "High": np.maximum(open_, close) * (1.0 + spread),
+            "Low": np.minimum(open_, close) * (1.0 - spread),
+            "Close": close,
+            "Adj Close": close,
+            "Volume": rng.integers(1_000_000, 10_000_000, num_days).astype(np.float64),
+        },
+        index=pd.DatetimeIndex(dates, name="Date"),
+    )
+
+
+_PROVIDERS: dict[str, Provider] = {
+    "yahoo": _fetch_yahoo,
+    "gbm": SyntheticProvider("gbm"),
+    "ou": SyntheticProvider("ou"),
+}
+
+
+def migrate_csv_cache(pattern: str = None) -> list[str]:
+    """Converts data saved in the legacy CSV format to the binary format.
+
+    Files downloaded on days other than today are deleted instead because
+    `load` would download them again anyway.
+
+    Args:
+        pattern: Path pattern of the CSV files to migrate. By default, all
+            the files in the data directory.
+
+    Returns:
+        Paths of the converted data.
+    """
+    if pattern is None:
+        pattern = legacy_ticker_data_path_pattern()
+
+    migrated_paths = []
+    for csv_path in glob.glob(pattern):
+        ticker, date = ticker_data_path_metadata(csv_path)
+        if date == datetime.date.today():
+            path = ticker_data_path(ticker)
+            financial_data = pd.read_csv(csv_path, index_col=0, parse_dates=True)
+            _write_columns(financial_data, path)
+            migrated_paths.append(path)
+        os.remove(csv_path)
+
+    return migrated_paths
+
+
+def _write_columns(financial_data: pd.DataFrame, path: str):
+    """Saves financial data in the binary format.
+
+    The data is first written to a temporary directory which is then renamed,
+    so that readers never see partially written data.
+    """
+    financial_data = _normalise_columns(financial_data).sort_index()
+    columns = financial_data.columns
+    dates = pd.to_datetime(financial_data.index)
+    # Dates outside the range of `datetime64[ns]` would silently wrap around.
+    if len(dates) > 0 and (dates[0] < pd.Timestamp.min or dates[-1] > pd.Timestamp.max):
+        raise pd.errors.OutOfBoundsDatetime(
+            f"Dates from {dates[0]} to {dates[-1]} cannot be stored in nanoseconds."
+        )
+    index = dates.to_numpy(dtype="datetime64[ns]")
+    values = np.asfortranarray(financial_data.to_numpy(dtype=np.float64))
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    Path(tmp_path).mkdir(parents=True)
+    np.save(os.path.join(tmp_path, _INDEX_FILE), index)
+    np.save(os.path.join(tmp_path, _VALUES_FILE), values)
+    np.save(os.path.join(tmp_path, _COLUMNS_FILE), np.array(columns, dtype=str))
+
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(tmp_path, path)
+
+
+def _normalise_columns(financial_data: pd.DataFrame) -> pd.DataFrame:
+    if isinstance(financial_data.columns, pd.MultiIndex):
+        # Newer versions of `yfinance` add ticker as the second level.
+        financial_data = financial_data.copy()
+        financial_data.columns = financial_data.columns.get_level_values(0)
+
+    return financial_data
+
+
+def _read_columns(path: str, mmap: bool = False) -> pd.DataFrame:
+    """Reads financial data saved in the binary format.
+
+    The values are read-only because they may be shared. If `mmap` is set,
+    they are not copied either, so the returned data frame is backed by a
+    memory map of the file.
+    """
+    mmap_mode = "r" if mmap else None
+    index = np.load(os.path.join(path, _INDEX_FILE), mmap_mode=mmap_mode)
+    values = np.load(os.path.join(path, _VALUES_FILE), mmap_mode=mmap_mode)
+    values.flags.writeable = False
+    columns = np.load(os.path.join(path, _COLUMNS_FILE))
+
+    return pd.DataFrame(
+        values, index=pd.DatetimeIndex(index, name="Date"), columns=list(columns), copy=False
+    )
+
+
+def _date_range_slice(
+    index: npt.ArrayLike, from_date: datetime.date = None, to_date: datetime.date = None
+) -> slice:
+    """Returns positions of the dates between `from_date` and `to_date`
+    (inclusive) in the sorted `index`."""
+    index = np.asarray(index, dtype="datetime64[ns]")
+    start, stop = 0, len(index)
+    if from_date is not None:
+        start = np.searchsorted(index, pd.Timestamp(from_date).to_datetime64(), side="left")
+    if to_date is not None:
+        stop = np.searchsorted(index, pd.Timestamp(to_date).to_datetime64(), side="right")
+
+    return slice(int(start), int(stop))
+
+
+def _read_date_range(
+    financial_data: pd.DataFrame, from_date: datetime.date = None, to_date: datetime.date = None
+) -> pd.DataFrame:
+    return financial_data.iloc[_date_range_slice(financial_data.index, from_date, to_date)]
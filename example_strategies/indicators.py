@@ -0,0 +1,174 @@
+import backtrader as bt
+import numpy as np
+
+from example_strategies import stats
+
+
+class RollingStats:
+    """Mean and variance of the last `period` values, updated in constant time
+    per value.
+
+    The values are kept in a preallocated ring buffer. The statistics are
+    updated using Welford's algorithm adapted to sliding windows and are
+    recomputed from the buffer every time it wraps around, so rounding
+    errors cannot accumulate.
+
+    Args:
+        period: Number of values in the window.
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._buffer = np.zeros(period)
+        self._head = 0
+
+    def push(self, value: float):
+        """Adds `value` to the window, removing the oldest value if the window
+        is full."""
+        if self.count < self.period:
+            self.count += 1
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self._m2 += delta * (value - self.mean)
+        else:
+            old_value = self._buffer[self._head]
+            old_mean = self.mean
+            self.mean += (value - old_value) / self.period
+            self._m2 += (value - old_value) * (value - self.mean + old_value - old_mean)
+
+        self._buffer[self._head] = value
+        self._head += 1
+        if self._head == self.period:
+            self._head = 0
+            self.mean = float(np.mean(self._buffer))
+            self._m2 = float(np.sum(np.square(self._buffer - self.mean)))
+
+    def var(self, ddof: int = 0) -> float:
+        """Variance of the values in the window, or NaN if there are not more
+        than `ddof` of them."""
+        if self.count <= ddof:
+            return float("nan")
+        return max(self._m2, 0.0) / (self.count - ddof)
+
+    def std(self, ddof: int = 0) -> float:
+        """Standard deviation of the values in the window, or NaN if there are
+        not more than `ddof` of them."""
+        return self.var(ddof) ** 0.5
+
+    def zscore(self, value: float, ddof: int = 0) -> float:
+        """Number of standard deviations `value` is away from the mean of the
+        window, or NaN if the standard deviation is zero or undefined."""
+        std = self.std(ddof)
+        if not std > 0.0:
+            return float("nan")
+        return (value - self.mean) / std
+
+    @property
+    def is_full(self) -> bool:
+        return self.count == self.period
+
+
+class RollingMeanStd(bt.Indicator):
+    """Moving average and moving standard deviation, each updated in constant
+    time per bar.
+
+    period (int): Number of bars in the window.
+    ddof (int): Delta degrees of freedom of the standard deviation, e.g. `1`
+        for the sample standard deviation.
+    """
+
+    lines = ("mean", "std")
+    params = (("period", 20), ("ddof", 0))
+
+    def __init__(self):
+        self.addminperiod(self.params.period)
+        self._stats = RollingStats(self.params.period)
+
+    def prenext(self):
+        self._stats.push(self.data[0])
+
+    def next(self):
+        self._stats.push(self.data[0])
+        self.lines.mean[0] = self._stats.mean
+        self.lines.std[0] = self._stats.std(self.params.ddof)
+
+    def once(self, start, end):
+        stats = RollingStats(self.params.period)
+        values = self.data.array
+        mean = self.lines.mean.array
+        std = self.lines.std.array
+        # The window is filled starting from the first bar.
+        for idx in range(0, end):
+            stats.push(values[idx])
+            if idx >= start:
+                mean[idx] = stats.mean
+                std[idx] = stats.std(self.params.ddof)
+
+
+class HurstExponent(bt.Indicator):
+    """Hurst exponent of a moving window, see `stats.RollingHurstExponent`.
+
+    period (int): Number of bars in the window.
+    num_lags (int): Number of lags to use in the estimation.
+    """
+
+    lines = ("hurst",)
+    params = (("period", 256), ("num_lags", 2**6))
+
+    def __init__(self):
+        self.addminperiod(self.params.period)
+        self._hurst = stats.RollingHurstExponent(self.params.period, self.params.num_lags)
+
+    def prenext(self):
+        self._hurst.push(self.data[0])
+
+    def next(self):
+        self._hurst.push(self.data[0])
+        self.lines.hurst[0] = self._hurst.value
+
+    def once(self, start, end):
+        hurst = stats.rolling_hurst_exponent(
+            self.data.array[:end], self.params.period, self.params.num_lags
+        )
+        hurst_line = self.lines.hurst.array
+        for idx in range(start, end):
+            hurst_line[idx] = hurst[idx]
+
+
+class ADF(bt.Indicator):
+    """Augmented Dickey-Fuller (ADF) test statistic and p-value of a moving
+    window, see `stats.RollingADF`.
+
+    period (int): Number of bars in the window.
+    num_lags (int): Number of lagged differences in the regression.
+    """
+
+    lines = ("statistic", "p_value")
+    params = (("period", 256), ("num_lags", 1))
+
+    def __init__(self):
+        self.addminperiod(self.params.period)
+        self._adf = stats.RollingADF(self.params.period, self.params.num_lags)
+
+    def prenext(self):
+        self._adf.push(self.data[0])
+
+    def next(self):
+        self._adf.push(self.data[0])
+        statistic = self._adf.statistic
+        self.lines.statistic[0] = statistic
+        self.lines.p_value[0] = stats.adf_p_vals(statistic)
+
+    def once(self, start, end):
+        statistic = stats.rolling_adf_statistic(
+            self.data.array[:end], self.params.period, self.params.num_lags
+        )
+        p_value = stats.adf_p_vals(statistic)
+        statistic_line = self.lines.statistic.array
+        p_value_line = self.lines.p_value.array
+        for idx in range(start, end):
+            statistic_line[idx] = statistic[idx]
+            p_value_line[idx] = p_value[idx]
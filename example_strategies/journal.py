@@ -0,0 +1,195 @@
+"""Compact in-memory records of what happens to the orders and the trades of
+a strategy, kept in NumPy structured arrays instead of lists of objects."""
+
+import logging
+from typing import Iterator
+
+import backtrader as bt
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+
+from example_strategies import utils
+
+# Kinds of journal events.
+ORDER = 0
+TRADE = 1
+
+JOURNAL_DTYPE = np.dtype(
+    [
+        # Backtrader's date number of the bar, or of the fill of a completed
+        # order.
+        ("datetime", np.float64),
+        # Length of the strategy when the event was notified.
+        ("bar", np.int64),
+        # Index of the data feed.
+        ("data", np.int32),
+        ("kind", np.uint8),
+        # Status of an order, see `bt.Order.Status`.
+        ("status", np.uint8),
+        # `1` for buying, `-1` for selling.
+        ("side", np.int8),
+        ("size", np.float64),
+        # Execution price of a completed order, otherwise the price it was
+        # created with.
+        ("price", np.float64),
+        ("commission", np.float64),
+        # Gross and net profit of a trade.
+        ("pnl", np.float64),
+        ("pnl_comm", np.float64),
+    ]
+)
+
+# Fields of the executed orders, see `Ledger`.
+LEDGER_FIELDS = ["datetime", "bar", "data", "side", "size", "price", "commission"]
+
+
+class _Records:
+    """Structured array whose capacity is doubled whenever it is full."""
+
+    def __init__(self, dtype: np.dtype, capacity: int = 64):
+        self._array = np.zeros(capacity, dtype=dtype)
+        self._size = 0
+
+    def _append(self) -> np.void:
+        """Returns a new zeroed record at the end."""
+        if self._size == len(self._array):
+            array = np.zeros(2 * len(self._array), dtype=self._array.dtype)
+            array[: self._size] = self._array
+            self._array = array
+        self._size += 1
+        return self._array[self._size - 1]
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def records(self) -> npt.NDArray[np.void]:
+        """View of the records."""
+        return self._array[: self._size]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the array, including its unused capacity."""
+        return self._array.nbytes
+
+
+class Journal(_Records):
+    """Orders that were completed, cancelled, rejected or for which there was
+    not enough margin, and closed trades.
+
+    The records take tens of bytes each and hold what `BaseStrategy` would
+    log, so the messages can be produced afterwards, see `messages`, rather
+    than while backtesting.
+    """
+
+    def __init__(self, capacity: int = 64):
+        super().__init__(JOURNAL_DTYPE, capacity)
+
+    def record_order(self, dt: float, bar: int, data_idx: int, order: bt.Order):
+        record = self._append()
+        record["bar"] = bar
+        record["data"] = data_idx
+        record["kind"] = ORDER
+        record["status"] = order.status
+        record["side"] = 1 if order.isbuy() else -1
+        if order.status == bt.Order.Completed:
+            record["datetime"] = order.executed.dt
+            record["size"] = abs(order.executed.size)
+            record["price"] = order.executed.price
+            record["commission"] = order.executed.comm
+        else:
+            record["datetime"] = dt
+            record["size"] = abs(order.size)
+            record["price"] = order.created.price
+
+    def record_trade(self, dt: float, bar: int, data_idx: int, trade: bt.Trade):
+        record = self._append()
+        record["datetime"] = dt
+        record["bar"] = bar
+        record["data"] = data_idx
+        record["kind"] = TRADE
+        record["pnl"] = trade.pnl
+        record["pnl_comm"] = trade.pnlcomm
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Returns the records as a data frame with dates and names of the
+        kinds, the statuses and the sides."""
+        records = self.records
+        table = pd.DataFrame(records)
+        table["datetime"] = utils.num2datetimeindex(records["datetime"])
+        table["kind"] = np.array(["order", "trade"])[records["kind"]]
+        table["status"] = np.array(bt.Order.Status)[records["status"]]
+        table["side"] = np.where(records["side"] > 0, "buy", "sell")
+        table.loc[records["kind"] == TRADE, ["status", "side"]] = None
+        return table
+
+    def messages(self) -> Iterator[tuple[int, float, str]]:
+        """Yields the level, the date number and the text of the message that
+        `BaseStrategy` logs about each record."""
+        pnl_sum = 0.0
+        for record in self.records:
+            if record["kind"] == TRADE:
+                pnl_sum += record["pnl_comm"]
+                yield (
+                    logging.INFO,
+                    record["datetime"],
+                    trade_message(record["pnl"], record["pnl_comm"], pnl_sum),
+                )
+                continue
+
+            level = logging.INFO if record["status"] == bt.Order.Completed else logging.WARNING
+            yield (
+                level,
+                record["datetime"],
+                order_message(
+                    bt.Order.Status[record["status"]],
+                    record["side"] > 0,
+                    record["size"],
+                    record["price"],
+                ),
+            )
+
+
+class Ledger:
+    """Executed orders of `journal`, holding only what is needed to analyse
+    them rather than backtrader's order objects.
+
+    The ledger is a view of the completed orders in the journal, so it is
+    always up to date.
+    """
+
+    def __init__(self, journal: Journal):
+        self.journal = journal
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._is_executed(self.journal.records)))
+
+    @property
+    def records(self) -> npt.NDArray[np.void]:
+        """Fields `LEDGER_FIELDS` of the executed orders."""
+        records = self.journal.records
+        return records[self._is_executed(records)][LEDGER_FIELDS]
+
+    @staticmethod
+    def _is_executed(records: npt.NDArray[np.void]) -> npt.NDArray[np.bool_]:
+        return (records["kind"] == ORDER) & (records["status"] == bt.Order.Completed)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Returns the records as a data frame with dates and names of the
+        sides."""
+        records = self.records
+        table = pd.DataFrame({name: records[name] for name in LEDGER_FIELDS})
+        table["datetime"] = utils.num2datetimeindex(records["datetime"])
+        table["side"] = np.where(records["side"] > 0, "buy", "sell")
+        return table
+
+
+def order_message(status_name: str, is_buy: bool, size: float, price: float) -> str:
+    """Formats the message about an order."""
+    return f"{status_name}: {'buy' if is_buy else 'sell'} {size} @ ${round(price, 2)}".upper()
+
+
+def trade_message(pnl: float, pnl_comm: float, pnl_sum: float) -> str:
+    """Formats the message about a closed trade."""
+    return f"OPERATION PROFIT, GROSS {pnl:.2f}, NET {pnl_comm:.2f}, SUM {pnl_sum:.2f}"
@@ -0,0 +1,223 @@
+"""Running strategies on bars as they arrive, e.g. for paper trading.
+
+Bars are pulled one at a time from iterables, such as `dataframe_bars` for
+replaying history or `tail_csv` for following a file that another process
+appends to. Only the history needed by the strategy's indicators is kept, so
+memory does not grow with the number of bars, only with the number of orders,
+which the broker keeps.
+"""
+
+import collections
+import datetime
+import os
+import time
+from typing import Any, Iterable, Iterator, Optional, Union
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+from example_strategies import utils
+
+Bar = collections.namedtuple("Bar", ["datetime", "open", "high", "low", "close", "volume"])
+LatencyReport = collections.namedtuple("LatencyReport", ["count", "p50", "p90", "p99", "max"])
+
+
+class StreamingData(bt.feed.DataBase):
+    """Data feed loading bars from an iterable only when they are needed.
+
+    bars (Iterable[Bar]): Bars in chronological order. The feed ends when the
+        iterable is exhausted.
+    history (int): Minimum number of bars to keep, for strategies that index
+        the feed directly, e.g. `data[-1]`, rather than through indicators.
+        Subclasses of `BaseStrategy` keep the number of bars they declare as
+        their `data_history` as well.
+    """
+
+    params = (("bars", None), ("history", 2))
+
+    def qbuffer(self, savemem=0, replaying=False):
+        super().qbuffer(savemem=savemem, replaying=replaying)
+        self.minbuffer(self.params.history)
+
+    def start(self):
+        super().start()
+        self._bars = iter(self.params.bars)
+        # When the last bar was received, see `DecisionLatency`.
+        self.received_at = float("nan")
+
+    def _load(self):
+        bar = next(self._bars, None)
+        if bar is None:
+            return False
+
+        self.received_at = time.perf_counter()
+        self.lines.datetime[0] = bt.date2num(bar[0])
+        self.lines.open[0] = bar[1]
+        self.lines.high[0] = bar[2]
+        self.lines.low[0] = bar[3]
+        self.lines.close[0] = bar[4]
+        self.lines.volume[0] = bar[5]
+        self.lines.openinterest[0] = 0.0
+        return True
+
+
+class DecisionLatency(bt.Analyzer):
+    """Measures the time from receiving a bar to the end of the strategy's
+    decision on it, including the broker and the indicators.
+
+    Only the last `max_samples` latencies are kept. `get_analysis` returns a
+    `LatencyReport` of the number of bars and the latency percentiles in
+    seconds.
+
+    max_samples (int): Number of latencies the percentiles are computed from.
+    """
+
+    params = (("max_samples", 10_000),)
+
+    def start(self):
+        self._latencies = np.zeros(self.params.max_samples)
+        self._count = 0
+
+    def prenext(self):
+        self.next()
+
+    def next(self):
+        received_at = max(data.received_at for data in self.datas)
+        self._latencies[self._count % self.params.max_samples] = time.perf_counter() - received_at
+        self._count += 1
+
+    def get_analysis(self) -> LatencyReport:
+        latencies = self._latencies[: min(self._count, self.params.max_samples)]
+        if len(latencies) == 0:
+            return LatencyReport(0, float("nan"), float("nan"), float("nan"), float("nan"))
+
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+        return LatencyReport(self._count, p50, p90, p99, float(np.max(latencies)))
+
+
+def get_cerebro(
+    strategy: bt.Strategy,
+    bars: Union[Iterable[Bar], dict[str, Iterable[Bar]]],
+    value,
+    params,
+    percent_size=90,
+    **feed_kwargs,
+):
+    """Creates a streaming run of `strategy`, in the same way as
+    `utils.get_cerebro`.
+
+    The data feeds are not preloaded and only keep the bars that the
+    indicators need, see `exactbars` of `bt.Cerebro`. The run's
+    `DecisionLatency` analyzer is named `"latency"`.
+
+    Args:
+        strategy: Strategy to run.
+        bars: Bars of a stock, or a dictionary of the bars of each stock.
+        value: Starting cash.
+        params: Parameters of the strategy.
+        percent_size: Percentage of the portfolio to invest.
+        feed_kwargs: Arguments of the data feeds, e.g. `timeframe` and
+            `compression` of intraday bars, see `StreamingData`.
+    """
+    cerebro = bt.Cerebro(preload=False, runonce=False, exactbars=1, stdstats=False)
+    cerebro.addstrategy(strategy, **params)
+    cerebro.broker.setcash(value)
+    if isinstance(bars, dict):
+        for ticker, ticker_bars in bars.items():
+            cerebro.adddata(StreamingData(bars=ticker_bars, **feed_kwargs), name=ticker)
+        cerebro.addsizer(utils.PortfolioPercentSizer, percents=percent_size)
+    else:
+        cerebro.adddata(StreamingData(bars=bars, **feed_kwargs))
+        cerebro.addsizer(bt.sizers.PercentSizer, percents=percent_size)
+    cerebro.addanalyzer(DecisionLatency, _name="latency")
+
+    return cerebro
+
+
+def run(
+    strategy: bt.Strategy,
+    bars: Union[Iterable[Bar], dict[str, Iterable[Bar]]],
+    value: float = 1_000_000.0,
+    params: Optional[dict[str, Any]] = None,
+    **kwargs,
+) -> tuple[bt.Strategy, LatencyReport]:
+    """Runs `strategy` until the bars run out.
+
+    Args:
+        strategy: Strategy to run.
+        bars: Bars of a stock, or a dictionary of the bars of each stock.
+        value: Starting cash.
+        params: Parameters of the strategy.
+        kwargs: Other arguments of `get_cerebro`.
+
+    Returns:
+        Strategy instance and the decision latencies.
+    """
+    cerebro = get_cerebro(strategy, bars, value, params or {}, **kwargs)
+    instance = cerebro.run()[0]
+    return instance, instance.analyzers.latency.get_analysis()
+
+
+def dataframe_bars(financial_data: pd.DataFrame) -> Iterator[Bar]:
+    """Yields the rows of `financial_data`, in the format of `data.load`, as
+    bars."""
+    columns = [financial_data[name].to_numpy() for name in ["Open", "High", "Low", "Close"]]
+    if "Volume" in financial_data:
+        columns.append(financial_data["Volume"].to_numpy())
+    else:
+        columns.append(np.zeros(len(financial_data)))
+
+    for dt, *values in zip(financial_data.index.to_pydatetime(), *columns):
+        yield Bar(dt, *values)
+
+
+def tail_csv(
+    path: str, poll_interval: float = 0.1, timeout: Optional[float] = None
+) -> Iterator[Bar]:
+    """Yields bars appended to a CSV file by another process.
+
+    Each line is `datetime,open,high,low,close,volume` with the date and time
+    in ISO 8601 format; other lines, such as a header, are skipped. Lines are
+    only read once they are complete.
+
+    Args:
+        path: Path of the file. It does not have to exist yet.
+        poll_interval: Seconds to wait before checking the file again.
+        timeout: Seconds without new bars after which to stop. If `None`,
+            waits forever.
+    """
+    position = 0
+    partial = ""
+    last_bar_at = time.monotonic()
+    while True:
+        lines = []
+        if os.path.exists(path):
+            with open(path) as file:
+                file.seek(position)
+                chunk = file.read()
+                position = file.tell()
+            partial += chunk
+            *lines, partial = partial.split("\n")
+
+        for line in lines:
+            bar = _parse_bar(line)
+            if bar is not None:
+                last_bar_at = time.monotonic()
+                yield bar
+
+        if timeout is not None and time.monotonic() - last_bar_at > timeout:
+            return
+        if not lines:
+            time.sleep(poll_interval)
+
+
+def _parse_bar(line: str) -> Optional[Bar]:
+    fields = line.strip().split(",")
+    if len(fields) != len(Bar._fields):
+        return None
+    try:
+        dt = datetime.datetime.fromisoformat(fields[0])
+        return Bar(dt, *(float(field) for field in fields[1:]))
+    except ValueError:
+        return None
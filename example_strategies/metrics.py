@@ -0,0 +1,304 @@
+"""Performance metrics computed from equity curves.
+
+Every function accepts either a single equity curve or many of them stacked
+in an array whose last dimension corresponds to the bars, and returns a float
+or an array of the metric values, respectively.
+"""
+
+from typing import Union
+
+import backtrader as bt
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+
+from example_strategies import utils
+
+# Metrics that can be optimised; higher values are better for all of them.
+METRICS = ["sharpe", "returns", "annualised_returns", "sortino"]
+
+_RATE_FACTORS = {
+    bt.TimeFrame.Days: 252,
+    bt.TimeFrame.Weeks: 52,
+    bt.TimeFrame.Months: 12,
+    bt.TimeFrame.Years: 1,
+}
+
+
+class EquityCurve(bt.Analyzer):
+    """Records the portfolio value at the end of every bar.
+
+    Unlike the analyzers computing metrics, it only does a constant amount of
+    work per bar; the metrics are then computed from the recorded curve.
+    `get_analysis` returns a dictionary with the dates (`index`) and the
+    values (`value`) of the bars.
+    """
+
+    def start(self):
+        self._datetimes = []
+        self._values = []
+
+    def next(self):
+        self._datetimes.append(self.strategy.datetime[0])
+        self._values.append(self.strategy.broker.getvalue())
+
+    def get_analysis(self):
+        return {
+            "index": utils.num2datetimeindex(self._datetimes),
+            "value": np.array(self._values, dtype=np.float64),
+        }
+
+
+def evaluate(
+    metric: str,
+    value: npt.NDArray[np.float64],
+    index: pd.DatetimeIndex,
+    cash: float,
+    timeframe=bt.TimeFrame.Years,
+) -> Union[float, npt.NDArray[np.float64]]:
+    """Computes one of the `METRICS`.
+
+    Args:
+        metric: Name of the metric: `"sharpe"` (see `sharpe_ratio`),
+            `"returns"` (see `total_return`), `"annualised_returns"` (see
+            `annualised_return`) or `"sortino"` (see `sortino_ratio`).
+        value: Portfolio value at the close of each bar.
+        index: Dates of the bars.
+        cash: Starting cash.
+        timeframe: Timeframe of the returns.
+
+    Returns:
+        Metric value of each portfolio.
+    """
+    if metric == "sharpe":
+        return sharpe_ratio(value, index, cash, timeframe)
+
+    if metric == "returns":
+        return total_return(value, cash)
+
+    if metric == "annualised_returns":
+        return annualised_return(value, index, cash, timeframe)
+
+    if metric == "sortino":
+        return sortino_ratio(value, index, cash, timeframe)
+
+    raise ValueError(f'Metric "{metric}" is not recognised.')
+
+
+def period_returns(
+    value: npt.NDArray[np.float64],
+    index: pd.DatetimeIndex,
+    cash: float,
+    timeframe=bt.TimeFrame.Years,
+) -> npt.NDArray[np.float64]:
+    """Computes returns in each period of `timeframe` in the same way as
+    `bt.analyzers.TimeReturn`.
+
+    Args:
+        value: Portfolio value at the close of each bar.
+        index: Dates of the bars.
+        cash: Starting cash.
+        timeframe: Timeframe of the returns.
+
+    Returns:
+        Returns, with the last dimension corresponding to the periods.
+    """
+    value = np.asarray(value, dtype=np.float64)
+    keys = _period_keys(index, timeframe)
+    is_period_end = np.append(keys[1:] != keys[:-1], True)
+    period_values = value[..., is_period_end]
+    previous_values = np.concatenate(
+        [np.full(value.shape[:-1] + (1,), cash), period_values[..., :-1]], axis=-1
+    )
+    return period_values / previous_values - 1.0
+
+
+def sharpe_ratio(
+    value: npt.NDArray[np.float64],
+    index: pd.DatetimeIndex,
+    cash: float,
+    timeframe=bt.TimeFrame.Years,
+    risk_free_rate: float = 0.01,
+) -> Union[float, npt.NDArray[np.float64]]:
+    """Computes Sharpe ratio in the same way as `bt.analyzers.SharpeRatio`
+    with default parameters.
+
+    Args:
+        value: Portfolio value at the close of each bar.
+        index: Dates of the bars.
+        cash: Starting cash.
+        timeframe: Timeframe of the returns.
+        risk_free_rate: Annual risk-free rate.
+
+    Returns:
+        Sharpe ratio of each portfolio, or NaN if its returns do not vary.
+    """
+    excess_returns = _excess_returns(value, index, cash, timeframe, risk_free_rate)
+    std = np.std(excess_returns, axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(std == 0.0, np.nan, np.mean(excess_returns, axis=-1) / std)
+
+    return _to_float(ratio)
+
+
+def sortino_ratio(
+    value: npt.NDArray[np.float64],
+    index: pd.DatetimeIndex,
+    cash: float,
+    timeframe=bt.TimeFrame.Years,
+    risk_free_rate: float = 0.01,
+) -> Union[float, npt.NDArray[np.float64]]:
+    """Computes Sortino ratio: the mean excess return divided by the root mean
+    square of the negative excess returns. Like `sharpe_ratio`, it is not
+    annualised.
+
+    Args:
+        value: Portfolio value at the close of each bar.
+        index: Dates of the bars.
+        cash: Starting cash.
+        timeframe: Timeframe of the returns.
+        risk_free_rate: Annual risk-free rate.
+
+    Returns:
+        Sortino ratio of each portfolio, or NaN if its excess returns are
+        never negative.
+    """
+    excess_returns = _excess_returns(value, index, cash, timeframe, risk_free_rate)
+    downside_deviation = np.sqrt(np.mean(np.square(np.minimum(excess_returns, 0.0)), axis=-1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(
+            downside_deviation == 0.0,
+            np.nan,
+            np.mean(excess_returns, axis=-1) / downside_deviation,
+        )
+
+    return _to_float(ratio)
+
+
+def total_return(
+    value: npt.NDArray[np.float64], cash: float
+) -> Union[float, npt.NDArray[np.float64]]:
+    """Computes total compound (logarithmic) return in the same way as
+    `bt.analyzers.Returns`.
+
+    Args:
+        value: Portfolio value at the close of each bar.
+        cash: Starting cash.
+
+    Returns:
+        Total return of each portfolio.
+    """
+    ratio = np.asarray(value, dtype=np.float64)[..., -1] / cash
+    with np.errstate(divide="ignore"):
+        returns = np.where(ratio <= 0.0, -np.inf, np.log(np.maximum(ratio, 0.0)))
+
+    return _to_float(returns)
+
+
+def annualised_return(
+    value: npt.NDArray[np.float64],
+    index: pd.DatetimeIndex,
+    cash: float,
+    timeframe=bt.TimeFrame.Years,
+) -> Union[float, npt.NDArray[np.float64]]:
+    """Computes annualised return in the same way as `bt.analyzers.Returns`
+    (its `rnorm`), i.e. by compounding the average logarithmic return per
+    period of `timeframe`.
+
+    Args:
+        value: Portfolio value at the close of each bar.
+        index: Dates of the bars.
+        cash: Starting cash.
+        timeframe: Timeframe of the periods.
+
+    Returns:
+        Annualised return of each portfolio.
+    """
+    keys = _period_keys(index, timeframe)
+    num_periods = 1 + np.count_nonzero(keys[1:] != keys[:-1])
+    average_return = np.asarray(total_return(value, cash)) / num_periods
+    with np.errstate(invalid="ignore"):
+        returns = np.where(
+            np.isneginf(average_return),
+            average_return,
+            np.expm1(average_return * _RATE_FACTORS[timeframe]),
+        )
+
+    return _to_float(returns)
+
+
+def max_drawdown(value: npt.NDArray[np.float64]) -> Union[float, npt.NDArray[np.float64]]:
+    """Computes the largest relative decline of the portfolio value from its
+    previous peak, in the same way as `bt.analyzers.DrawDown` but as a
+    fraction rather than a percentage.
+
+    Args:
+        value: Portfolio value at the close of each bar.
+
+    Returns:
+        Maximum drawdown of each portfolio, between 0 and 1 unless the value
+        becomes negative.
+    """
+    value = np.asarray(value, dtype=np.float64)
+    peak = np.maximum.accumulate(value, axis=-1)
+    return _to_float(np.max((peak - value) / peak, axis=-1))
+
+
+def turnover(
+    position: npt.NDArray[np.float64],
+    price: npt.NDArray[np.float64],
+    value: npt.NDArray[np.float64],
+) -> Union[float, npt.NDArray[np.float64]]:
+    """Computes turnover: the total value of the traded shares divided by the
+    average portfolio value.
+
+    Args:
+        position: Number of shares held at the close of each bar.
+        price: Prices at which the changes of position are valued, e.g. the
+            closing prices of the bars.
+        value: Portfolio value at the close of each bar.
+
+    Returns:
+        Turnover of each portfolio.
+    """
+    position = np.asarray(position, dtype=np.float64)
+    # The position before the first bar is zero.
+    traded = np.abs(np.diff(position, axis=-1, prepend=0.0))
+    traded_value = np.sum(traded * np.asarray(price, dtype=np.float64), axis=-1)
+    return _to_float(traded_value / np.mean(value, axis=-1))
+
+
+def _period_keys(index: pd.DatetimeIndex, timeframe) -> npt.NDArray[np.int64]:
+    """Identifies the period of `timeframe` that each date belongs to, in the
+    same way as backtrader's `TimeFrameAnalyzerBase`."""
+    index = pd.DatetimeIndex(index)
+    if timeframe == bt.TimeFrame.Years:
+        return index.year.to_numpy()
+    if timeframe == bt.TimeFrame.Months:
+        return index.year.to_numpy() * 100 + index.month.to_numpy()
+    if timeframe == bt.TimeFrame.Weeks:
+        iso_calendar = index.isocalendar()
+        return iso_calendar["year"].to_numpy(dtype=np.int64) * 100 + iso_calendar["week"].to_numpy(
+            dtype=np.int64
+        )
+    if timeframe == bt.TimeFrame.Days:
+        return index.year.to_numpy() * 10000 + index.month.to_numpy() * 100 + index.day.to_numpy()
+
+    raise ValueError(f"Timeframe {bt.TimeFrame.getname(timeframe)} is not supported.")
+
+
+def _excess_returns(
+    value: npt.NDArray[np.float64],
+    index: pd.DatetimeIndex,
+    cash: float,
+    timeframe,
+    risk_free_rate: float,
+) -> npt.NDArray[np.float64]:
+    rate = pow(1.0 + risk_free_rate, 1.0 / _RATE_FACTORS[timeframe]) - 1.0
+    return period_returns(value, index, cash, timeframe) - rate
+
+
+def _to_float(x: npt.NDArray[np.float64]) -> Union[float, npt.NDArray[np.float64]]:
+    if np.ndim(x) == 0:
+        return float(x)
+    return x
@@ -1,11 +1,30 @@
+import collections
+import concurrent.futures
+import contextlib
+import dataclasses
 import datetime
 import itertools
-from typing import Any
+import json
+import math
+import os
+import time
+from typing import IO, Any, Callable, Iterator, Optional, Union
 
 import backtrader as bt
-import backtrader.analyzers as btanalyzers
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+from scipy import linalg
+from scipy.stats import norm
 
-from example_strategies import data, utils
+from example_strategies import data, metrics, profiling, results, utils, vectorised
+
+# A single backtest: parameters, ticker (or a tuple of tickers traded as a
+# portfolio) and starting cash.
+_Task = tuple[dict[str, Any], Union[str, tuple[str, ...]], float]
+# Called with positions in a list of tasks and the metric values of those
+# tasks as soon as they are known.
+_ResultsCallback = Callable[[list[int], list[float]], None]
 
 
 def grid_search(
@@ -17,6 +36,13 @@ def grid_search(
     to: datetime.date = datetime.date(2019, 12, 31),
     metric: str = "sharpe",
     timeframe=bt.TimeFrame.Years,
+    source: str = "yahoo",
+    n_jobs: int = 1,
+    engine: str = "backtrader",
+    portfolio: bool = False,
+    result_cache: Optional[results.ResultCache] = None,
+    checkpoint: Optional[str] = None,
+    profile: Optional[profiling.Profile] = None,
 ) -> tuple[dict[str, Any], float, float]:
     """Optimises mean-reverting strategy using grid search.
 
@@ -27,8 +53,30 @@ def grid_search(
         params_grid: The values to try for each parameter.
         from_: The date to test from.
         to: The date to test to.
-        metric: Metric to optimise. Should be one of `["sharpe", "returns"]`.
+        metric: Metric to optimise. Should be one of `metrics.METRICS`.
         timeframe: Timeframe on which to calculate the metrics.
+        source: Source of financial information, see `data.load`.
+        n_jobs: Number of processes running the backtests. If `-1`, all the
+            CPUs are used. The results do not depend on it.
+        engine: Should be one of `["backtrader", "vectorised"]`. The
+            vectorised engine, see `vectorised.backtest`, only supports some
+            of the strategies, but evaluates all the parameter combinations
+            of a ticker at once.
+        portfolio: If `True`, the training and the test tickers are each
+            traded as a single portfolio in one backtest, and the metric is
+            computed from the value of the whole portfolio instead of being
+            averaged over the tickers. Only supported by the backtrader engine.
+        result_cache: If given, the metric values of the backtests are looked
+            up in and stored to it, so that only the backtests that have not
+            been run before with the same strategy, parameters and data are
+            executed.
+        checkpoint: Path of a file to which the metric value of every
+            backtest is appended as soon as it is computed. If the file
+            already exists, the search is resumed from it and only the
+            backtests missing from it are run.
+        profile: If given, the time spent loading data, constructing and
+            running the backtests and extracting the metrics, and in the
+            strategy's `next`, is recorded in it; see `profiling.Profile`.
 
     Returns:
         optimal_params: Optimal parameters.
@@ -37,76 +85,1065 @@ def grid_search(
         test_avg_metric: Test portfolio's average metric value when using
             optimised parameters.
     """
-    base_amount = 1_000_000.00
-    if train_tickers:
-        train_amount = base_amount / len(train_tickers)
-    if test_tickers:
-        test_amount = base_amount / len(test_tickers)
-
-    train_avg_metric = 0.0
-
     optimal_params = {}
     # Set to the first value in the grid.
     for param in params_grid:
         optimal_params[param] = params_grid[param][0]
 
-    # Download the data now because it will be reused.
-    ticker_data = {}
-    for ticker in train_tickers + test_tickers:
-        ticker_data[ticker] = data.load(ticker, from_date=from_, to_date=to)
-
     # Cartesian product.
-    for values in itertools.product(*params_grid.values()):
-        params = dict(zip(params_grid.keys(), values))
-        total_value = 0
-        for ticker in train_tickers:
-            cerebro = utils.get_cerebro(strategy, ticker_data[ticker], train_amount, params)
-            cerebro.addanalyzer(btanalyzers.SharpeRatio, timeframe=timeframe, _name="sharpe")
-            cerebro.addanalyzer(btanalyzers.Returns, timeframe=timeframe, _name="returns")
-            run = cerebro.run()
-
-            # TODO: Support multi-stock strategies instead of averaging metrics.
-            total_value += _get_metric_value(run, metric)
-
-        avg_value = total_value / len(train_tickers)
-        if _is_improved(metric, avg_value, train_avg_metric):
-            for param in params:
-                optimal_params[param] = params[param]
-            train_avg_metric = avg_value
-
-    test_avg_metric = 0.0
-    for ticker in test_tickers:
-        cerebro = utils.get_cerebro(strategy, ticker_data[ticker], test_amount, optimal_params)
-        cerebro.addanalyzer(btanalyzers.SharpeRatio, timeframe=timeframe, _name="sharpe")
-        cerebro.addanalyzer(btanalyzers.Returns, timeframe=timeframe, _name="returns")
-        run = cerebro.run()
-        test_avg_metric += _get_metric_value(run, metric)
-
-    if test_tickers:
-        test_avg_metric /= len(test_tickers)
+    params_list = [
+        dict(zip(params_grid.keys(), values)) for values in itertools.product(*params_grid.values())
+    ]
+
+    with _searching(
+        strategy=strategy,
+        train_tickers=train_tickers,
+        test_tickers=test_tickers,
+        from_=from_,
+        to=to,
+        metric=metric,
+        timeframe=timeframe,
+        source=source,
+        n_jobs=n_jobs,
+        engine=engine,
+        portfolio=portfolio,
+        result_cache=result_cache,
+        checkpoint=checkpoint,
+        profile=profile,
+    ) as search:
+        train_avg_metric = 0.0
+        for params, avg_value in zip(params_list, search.train(params_list)):
+            if _is_improved(metric, avg_value, train_avg_metric):
+                for param in params:
+                    optimal_params[param] = params[param]
+                train_avg_metric = avg_value
+
+        test_avg_metric = search.test(optimal_params)
 
     return optimal_params, train_avg_metric, test_avg_metric
 
 
-def _get_metric_value(run, metric_name):
-    analyzers = run[0].analyzers
+def random_search(
+    strategy: bt.Strategy,
+    train_tickers: list[str],
+    test_tickers: list[str],
+    params_grid: dict[str, Any],
+    num_samples: int = 20,
+    seed: Optional[int] = None,
+    from_: datetime.date = datetime.date(2000, 1, 1),
+    to: datetime.date = datetime.date(2019, 12, 31),
+    metric: str = "sharpe",
+    timeframe=bt.TimeFrame.Years,
+    source: str = "yahoo",
+    n_jobs: int = 1,
+    engine: str = "backtrader",
+    portfolio: bool = False,
+    result_cache: Optional[results.ResultCache] = None,
+    checkpoint: Optional[str] = None,
+    profile: Optional[profiling.Profile] = None,
+) -> tuple[dict[str, Any], float, float]:
+    """Optimises strategy by evaluating randomly chosen parameter
+    combinations from the grid.
 
-    if metric_name == "sharpe":
-        return analyzers.sharpe.get_analysis()["sharperatio"]
+    Args:
+        num_samples: Number of distinct parameter combinations to evaluate.
+            If it exceeds the size of the grid, the whole grid is evaluated.
+        seed: Random seed.
 
-    if metric_name == "returns":
-        return analyzers.returns.get_analysis()["rtot"]
+    See `grid_search` for the rest of the arguments and the return values.
+    """
+    rng = np.random.default_rng(seed)
+    params_list = _sample_params(params_grid, num_samples, rng)
 
-    raise ValueError(f'Metric "{metric_name}" is not recognised.')
+    with _searching(
+        strategy=strategy,
+        train_tickers=train_tickers,
+        test_tickers=test_tickers,
+        from_=from_,
+        to=to,
+        metric=metric,
+        timeframe=timeframe,
+        source=source,
+        n_jobs=n_jobs,
+        engine=engine,
+        portfolio=portfolio,
+        result_cache=result_cache,
+        checkpoint=checkpoint,
+        profile=profile,
+    ) as search:
+        optimal_params, train_avg_metric = _best(metric, params_list, search.train(params_list))
+        test_avg_metric = search.test(optimal_params)
 
+    return optimal_params, train_avg_metric, test_avg_metric
+
+
+def successive_halving(
+    strategy: bt.Strategy,
+    train_tickers: list[str],
+    test_tickers: list[str],
+    params_grid: dict[str, Any],
+    num_samples: Optional[int] = None,
+    eta: int = 3,
+    seed: Optional[int] = None,
+    from_: datetime.date = datetime.date(2000, 1, 1),
+    to: datetime.date = datetime.date(2019, 12, 31),
+    metric: str = "sharpe",
+    timeframe=bt.TimeFrame.Years,
+    source: str = "yahoo",
+    n_jobs: int = 1,
+    engine: str = "backtrader",
+    portfolio: bool = False,
+    result_cache: Optional[results.ResultCache] = None,
+    checkpoint: Optional[str] = None,
+    profile: Optional[profiling.Profile] = None,
+) -> tuple[dict[str, Any], float, float]:
+    """Optimises strategy using successive halving.
+
+    All the candidate parameter combinations are first evaluated on a small
+    random subset of the training tickers. Only the best `1 / eta` of them
+    are promoted to the next round, which uses `eta` times as many tickers,
+    until the remaining candidates are evaluated on all the training tickers.
+
+    Args:
+        num_samples: Number of randomly chosen candidate parameter
+            combinations. By default, the whole grid is used.
+        eta: Factor by which the number of candidates is reduced and the
+            number of tickers is increased every round.
+        seed: Random seed.
+
+    See `grid_search` for the rest of the arguments and the return values.
+    """
+    rng = np.random.default_rng(seed)
+    if num_samples is None:
+        params_list = [
+            dict(zip(params_grid.keys(), values))
+            for values in itertools.product(*params_grid.values())
+        ]
+    else:
+        params_list = _sample_params(params_grid, num_samples, rng)
+    tickers = [train_tickers[idx] for idx in rng.permutation(len(train_tickers))]
+    num_rounds = max(1, math.ceil(math.log(len(params_list), eta)))
+
+    with _searching(
+        strategy=strategy,
+        train_tickers=train_tickers,
+        test_tickers=test_tickers,
+        from_=from_,
+        to=to,
+        metric=metric,
+        timeframe=timeframe,
+        source=source,
+        n_jobs=n_jobs,
+        engine=engine,
+        portfolio=portfolio,
+        result_cache=result_cache,
+        checkpoint=checkpoint,
+        profile=profile,
+    ) as search:
+        for round_idx in range(num_rounds):
+            num_tickers = math.ceil(len(tickers) / eta ** (num_rounds - 1 - round_idx))
+            values = search.train(params_list, tickers[:num_tickers])
+            if round_idx < num_rounds - 1:
+                order = _ranking(values)
+                num_promoted = math.ceil(len(params_list) / eta)
+                params_list = [params_list[idx] for idx in order[:num_promoted]]
+
+        optimal_params, train_avg_metric = _best(metric, params_list, values)
+        test_avg_metric = search.test(optimal_params)
+
+    return optimal_params, train_avg_metric, test_avg_metric
+
+
+def bayesian_search(
+    strategy: bt.Strategy,
+    train_tickers: list[str],
+    test_tickers: list[str],
+    params_grid: dict[str, Any],
+    num_samples: int = 20,
+    num_initial_samples: int = 5,
+    batch_size: int = 1,
+    seed: Optional[int] = None,
+    from_: datetime.date = datetime.date(2000, 1, 1),
+    to: datetime.date = datetime.date(2019, 12, 31),
+    metric: str = "sharpe",
+    timeframe=bt.TimeFrame.Years,
+    source: str = "yahoo",
+    n_jobs: int = 1,
+    engine: str = "backtrader",
+    portfolio: bool = False,
+    result_cache: Optional[results.ResultCache] = None,
+    checkpoint: Optional[str] = None,
+    profile: Optional[profiling.Profile] = None,
+) -> tuple[dict[str, Any], float, float]:
+    """Optimises strategy using Bayesian optimisation.
+
+    After evaluating `num_initial_samples` random parameter combinations, the
+    average training metric is modelled as a Gaussian process of the
+    positions of the parameter values in the grid. The combinations with the
+    highest expected improvement according to the model are evaluated next.
+
+    Args:
+        num_samples: Total number of distinct parameter combinations to
+            evaluate.
+        num_initial_samples: Number of random parameter combinations to
+            evaluate before using the model.
+        batch_size: Number of parameter combinations evaluated at once, e.g.
+            to keep multiple processes busy.
+        seed: Random seed.
+
+    See `grid_search` for the rest of the arguments and the return values.
+    """
+    rng = np.random.default_rng(seed)
+    shape = tuple(len(values) for values in params_grid.values())
+    num_samples = min(num_samples, math.prod(shape))
+
+    with _searching(
+        strategy=strategy,
+        train_tickers=train_tickers,
+        test_tickers=test_tickers,
+        from_=from_,
+        to=to,
+        metric=metric,
+        timeframe=timeframe,
+        source=source,
+        n_jobs=n_jobs,
+        engine=engine,
+        portfolio=portfolio,
+        result_cache=result_cache,
+        checkpoint=checkpoint,
+        profile=profile,
+    ) as search:
+        flat_idxs = _sample_flat_idxs(shape, min(num_initial_samples, num_samples), rng)
+        values = search.train(_params_at(params_grid, flat_idxs))
+        while len(flat_idxs) < num_samples:
+            new_flat_idxs = _expected_improvement_idxs(
+                shape,
+                flat_idxs,
+                values,
+                min(batch_size, num_samples - len(flat_idxs)),
+                rng,
+            )
+            if len(new_flat_idxs) == 0:
+                break
+            flat_idxs = np.concatenate([flat_idxs, new_flat_idxs])
+            values = values + search.train(_params_at(params_grid, new_flat_idxs))
+
+        optimal_params, train_avg_metric = _best(metric, _params_at(params_grid, flat_idxs), values)
+        test_avg_metric = search.test(optimal_params)
+
+    return optimal_params, train_avg_metric, test_avg_metric
+
+
+@dataclasses.dataclass
+class WalkForwardWindow:
+    """Result of optimising a strategy in one window of a walk-forward
+    analysis.
+
+    Attributes:
+        train_from: First date of the training period.
+        train_to: Last date of the training period.
+        test_from: First date of the test period.
+        test_to: Last date of the test period.
+        optimal_params: Optimal parameters in the training period.
+        train_avg_metric: Average metric value of the optimal parameters in the
+            training period.
+        test_avg_metric: Average out-of-sample metric value of the optimal
+            parameters in the test period.
+    """
+
+    train_from: datetime.date
+    train_to: datetime.date
+    test_from: datetime.date
+    test_to: datetime.date
+    optimal_params: dict[str, Any]
+    train_avg_metric: float
+    test_avg_metric: float
+
+
+def walk_forward(
+    strategy: bt.Strategy,
+    tickers: list[str],
+    params_grid: dict[str, Any],
+    from_: datetime.date = datetime.date(2000, 1, 1),
+    to: datetime.date = datetime.date(2019, 12, 31),
+    train_length: pd.DateOffset = pd.DateOffset(years=2),
+    test_length: pd.DateOffset = pd.DateOffset(years=1),
+    step: Optional[pd.DateOffset] = None,
+    metric: str = "sharpe",
+    timeframe=bt.TimeFrame.Years,
+    source: str = "yahoo",
+    n_jobs: int = 1,
+    engine: str = "backtrader",
+) -> list[WalkForwardWindow]:
+    """Performs walk-forward analysis: optimises the strategy using grid
+    search in a training period and evaluates the optimal parameters in the
+    test period following it, sliding both periods forward by `step`.
+
+    The data of each ticker is loaded once and sliced for every window. With
+    the vectorised engine, the indicators of each ticker are computed once for
+    all the windows, so the strategy starts trading each window with
+    indicators warmed up by the preceding bars, see
+    `vectorised.window_metrics`; with backtrader, each window is backtested
+    separately.
+
+    Args:
+        strategy: Strategy to optimise.
+        tickers: Tickers whose average metric value is optimised.
+        params_grid: The values to try for each parameter.
+        from_: The date of the start of the first training period.
+        to: The date after which no test period may end.
+        train_length: Length of the training periods.
+        test_length: Length of the test periods.
+        step: How far the periods are moved each time. By default, equal to
+            `test_length`, so that the test periods do not overlap.
+        metric: Metric to optimise. Should be one of `metrics.METRICS`.
+        timeframe: Timeframe on which to calculate the metrics.
+        source: Source of financial information, see `data.load`.
+        n_jobs: Number of processes running the backtests. If `-1`, all the
+            CPUs are used. The results do not depend on it.
+        engine: Should be one of `["backtrader", "vectorised"]`.
+
+    Returns:
+        Results of each window in chronological order.
+    """
+    if step is None:
+        step = test_length
+
+    train_periods, test_periods = [], []
+    train_from = pd.Timestamp(from_)
+    while train_from + train_length + test_length <= pd.Timestamp(to) + pd.Timedelta(days=1):
+        test_from = train_from + train_length
+        train_periods.append((train_from, test_from - pd.Timedelta(days=1)))
+        test_periods.append((test_from, test_from + test_length - pd.Timedelta(days=1)))
+        train_from += step
+
+    ticker_data = data.load_many(tickers, from_date=from_, to_date=to, source=source)
+    amount = 1_000_000.00 / len(tickers)
+    params_list = [
+        dict(zip(params_grid.keys(), values)) for values in itertools.product(*params_grid.values())
+    ]
+
+    with _window_runner(strategy, ticker_data, metric, timeframe, n_jobs, engine) as run_backtests:
+        # Every window is kept together with the vectorised engine, so that the
+        # indicators of a ticker are shared by all of them.
+        split_windows = engine != "vectorised"
+        window_groups = [[period] for period in train_periods] if split_windows else [train_periods]
+        train_tasks = [
+            (ticker, params_list, periods, amount)
+            for ticker in tickers
+            for periods in window_groups
+        ]
+        train_values = np.mean(
+            np.reshape(
+                np.concatenate(run_backtests(train_tasks), axis=1),
+                (len(params_list), len(tickers), len(train_periods)),
+            ),
+            axis=1,
+        )
+
+        windows = []
+        for window_idx, (train_period, test_period) in enumerate(zip(train_periods, test_periods)):
+            optimal_params, train_avg_metric = _best(
+                metric, params_list, list(train_values[:, window_idx])
+            )
+            windows.append(
+                WalkForwardWindow(
+                    train_period[0].date(),
+                    train_period[1].date(),
+                    test_period[0].date(),
+                    test_period[1].date(),
+                    optimal_params,
+                    float(train_avg_metric),
+                    0.0,
+                )
+            )
+
+        test_values = run_backtests(
+            [
+                (ticker, [window.optimal_params], [test_period], amount)
+                for ticker in tickers
+                for window, test_period in zip(windows, test_periods)
+            ]
+        )
+        test_values = np.reshape(
+            np.concatenate(test_values, axis=1), (len(tickers), len(windows))
+        ).mean(axis=0)
+        for window, test_avg_metric in zip(windows, test_values):
+            window.test_avg_metric = float(test_avg_metric)
+
+    return windows
+
+
+class _Search:
+    """Evaluates parameter combinations by their average metric values over
+    the training or the test tickers."""
+
+    def __init__(
+        self,
+        run_backtests: Callable[[list[_Task]], list[float]],
+        train_tickers: list[str],
+        test_tickers: list[str],
+        portfolio: bool,
+    ):
+        self.run_backtests = run_backtests
+        self.train_tickers = train_tickers
+        self.test_tickers = test_tickers
+        self.portfolio = portfolio
+
+    def train(
+        self, params_list: list[dict[str, Any]], tickers: Optional[list[str]] = None
+    ) -> list[float]:
+        """Returns the average metric value of every parameter combination over
+        `tickers`, by default all the training tickers."""
+        groups, amount = self._groups(self.train_tickers if tickers is None else tickers)
+        values = self.run_backtests(
+            [(params, group, amount) for params in params_list for group in groups]
+        )
+
+        avg_values = []
+        for idx in range(len(params_list)):
+            total_value = 0
+            for value in values[idx * len(groups) : (idx + 1) * len(groups)]:
+                total_value += value
+
+            avg_values.append(total_value / len(groups))
+
+        return avg_values
+
+    def test(self, params: dict[str, Any]) -> float:
+        """Returns the average metric value of `params` over the test
+        tickers, or zero if there are none."""
+        groups, amount = self._groups(self.test_tickers)
+        test_avg_metric = 0.0
+        for value in self.run_backtests([(params, group, amount) for group in groups]):
+            test_avg_metric += value
+
+        if groups:
+            test_avg_metric /= len(groups)
+
+        return test_avg_metric
+
+    def _groups(self, tickers: list[str]) -> tuple[list[Union[str, tuple[str, ...]]], float]:
+        base_amount = 1_000_000.00
+        if self.portfolio:
+            # Each portfolio is backtested as if it were a single ticker.
+            groups = [tuple(tickers)] if tickers else []
+        else:
+            groups = tickers
+
+        if not groups:
+            return groups, base_amount
+        return groups, base_amount / len(groups)
+
+
+@contextlib.contextmanager
+def _searching(
+    *,
+    strategy: bt.Strategy,
+    train_tickers: list[str],
+    test_tickers: list[str],
+    from_: datetime.date,
+    to: datetime.date,
+    metric: str,
+    timeframe,
+    source: str,
+    n_jobs: int,
+    engine: str,
+    portfolio: bool,
+    result_cache: Optional[results.ResultCache],
+    checkpoint: Optional[str],
+    profile: Optional[profiling.Profile],
+) -> Iterator[_Search]:
+    """Provides a `_Search` with the settings of an optimisation, which are
+    keyword-only because there are so many of them."""
+    if portfolio and engine != "backtrader":
+        raise ValueError(f'Engine "{engine}" does not support portfolios.')
+
+    start = time.perf_counter()
+    # Download the data now because it will be reused.
+    with _phase(profile, "data loading"):
+        ticker_data = data.load_many(
+            train_tickers + test_tickers, from_date=from_, to_date=to, source=source
+        )
+
+    with _backtest_runner(
+        strategy, ticker_data, metric, timeframe, n_jobs, engine, profile
+    ) as run_backtests:
+        if result_cache is not None:
+            run_backtests = _cached(
+                run_backtests,
+                result_cache,
+                strategy,
+                ticker_data,
+                from_=from_,
+                to=to,
+                metric=metric,
+                timeframe=timeframe,
+                engine=engine,
+            )
+        if checkpoint is not None:
+            run_backtests = _checkpointed(
+                run_backtests,
+                checkpoint,
+                strategy=f"{strategy.__module__}.{strategy.__qualname__}",
+                from_=from_,
+                to=to,
+                metric=metric,
+                timeframe=timeframe,
+                source=source,
+                engine=engine,
+            )
+
+        yield _Search(run_backtests, train_tickers, test_tickers, portfolio)
+
+    if profile is not None:
+        profile.search_time += time.perf_counter() - start
+
+
+def _sample_flat_idxs(shape: tuple[int, ...], num_samples: int, rng: np.random.Generator):
+    """Returns distinct random indices into the flattened grid of `shape`."""
+    size = math.prod(shape)
+    if num_samples >= size:
+        return rng.permutation(size)
+    # Sampling with `choice` would create an array of the size of the grid.
+    flat_idxs = np.unique(rng.integers(size, size=num_samples))
+    while len(flat_idxs) < num_samples:
+        flat_idxs = np.union1d(flat_idxs, rng.integers(size, size=num_samples - len(flat_idxs)))
+    return rng.permutation(flat_idxs)
+
+
+def _params_at(params_grid: dict[str, Any], flat_idxs) -> list[dict[str, Any]]:
+    shape = tuple(len(values) for values in params_grid.values())
+    idxs = np.unravel_index(np.asarray(flat_idxs, dtype=int), shape)
+    return [
+        {
+            param: values[param_idxs[sample_idx]]
+            for (param, values), param_idxs in zip(params_grid.items(), idxs)
+        }
+        for sample_idx in range(len(flat_idxs))
+    ]
+
+
+def _sample_params(
+    params_grid: dict[str, Any], num_samples: int, rng: np.random.Generator
+) -> list[dict[str, Any]]:
+    """Returns distinct random parameter combinations from the grid."""
+    shape = tuple(len(values) for values in params_grid.values())
+    return _params_at(params_grid, _sample_flat_idxs(shape, num_samples, rng))
+
+
+def _ranking(values: list[float]) -> list[int]:
+    """Returns the indices of `values` from the best to the worst, with
+    missing values last."""
+    scores = [-math.inf if value is None or math.isnan(value) else value for value in values]
+    return sorted(range(len(values)), key=lambda idx: scores[idx], reverse=True)
+
+
+def _best(
+    metric: str, params_list: list[dict[str, Any]], values: list[float]
+) -> tuple[dict[str, Any], float]:
+    """Returns the best evaluated parameter combination and its metric value."""
+    if metric not in metrics.METRICS:
+        raise ValueError(f'Metric "{metric}" is not recognised.')
+    best_idx = _ranking(values)[0]
+    return dict(params_list[best_idx]), values[best_idx]
+
+
+def _expected_improvement_idxs(
+    shape: tuple[int, ...],
+    flat_idxs: npt.NDArray[np.int_],
+    values: list[float],
+    num_samples: int,
+    rng: np.random.Generator,
+    max_candidates: int = 10_000,
+) -> npt.NDArray[np.int_]:
+    """Returns the not yet evaluated indices into the flattened grid with the
+    highest expected improvement under a Gaussian process model."""
+    size = math.prod(shape)
+    if size - len(flat_idxs) <= max_candidates:
+        candidates = np.setdiff1d(np.arange(size), flat_idxs)
+    else:
+        # Large grids are only searched in part.
+        candidates = np.setdiff1d(_sample_flat_idxs(shape, max_candidates, rng), flat_idxs)
+
+    # Positions of the parameter values in the grid, scaled to [0, 1].
+    scale = np.maximum(np.array(shape) - 1, 1)
+    x = np.stack(np.unravel_index(flat_idxs, shape), axis=-1) / scale
+    x_candidates = np.stack(np.unravel_index(candidates, shape), axis=-1) / scale
+
+    y = np.array([np.nan if value is None else value for value in values], dtype=float)
+    # Combinations without a metric value are treated as the worst ones.
+    y[np.isnan(y)] = np.nanmin(y) if np.any(~np.isnan(y)) else 0.0
+    y_std = y.std() if y.std() > 0 else 1.0
+    y = (y - y.mean()) / y_std
+
+    length_scale = max(
+        _LENGTH_SCALES, key=lambda length_scale: _log_marginal_likelihood(x, y, length_scale)
+    )
+    mean, std = _gaussian_process(x, y, x_candidates, length_scale)
+    z = (mean - y.max()) / std
+    expected_improvement = (mean - y.max()) * norm.cdf(z) + std * norm.pdf(z)
+
+    return candidates[np.argsort(-expected_improvement, kind="stable")[:num_samples]]
+
+
+# Length scales of the squared exponential kernel from which the most likely
+# one is chosen.
+_LENGTH_SCALES = [0.05, 0.1, 0.2, 0.5, 1.0]
+# Variance of the noise of the Gaussian process, relative to the standardised
+# metric values.
+_NOISE = 1e-4
 
-def _is_improved(metric_name: str, current, previous_best):
-    if metric_name == "sharpe":
-        if current > previous_best:
-            return True
-        return False
 
-    if metric_name == "returns":
+def _kernel(x_1: npt.NDArray, x_2: npt.NDArray, length_scale: float) -> npt.NDArray:
+    squared_distances = np.sum((x_1[:, np.newaxis, :] - x_2[np.newaxis, :, :]) ** 2, axis=-1)
+    return np.exp(-0.5 * squared_distances / length_scale**2)
+
+
+def _log_marginal_likelihood(x: npt.NDArray, y: npt.NDArray, length_scale: float) -> float:
+    covariance = _kernel(x, x, length_scale) + _NOISE * np.eye(len(x))
+    try:
+        cholesky = linalg.cho_factor(covariance, lower=True)
+    except linalg.LinAlgError:
+        return -np.inf
+    return (
+        -0.5 * y @ linalg.cho_solve(cholesky, y)
+        - np.sum(np.log(np.diag(cholesky[0])))
+        - 0.5 * len(x) * np.log(2 * np.pi)
+    )
+
+
+def _gaussian_process(
+    x: npt.NDArray, y: npt.NDArray, x_new: npt.NDArray, length_scale: float
+) -> tuple[npt.NDArray, npt.NDArray]:
+    """Returns the posterior means and standard deviations at `x_new`."""
+    covariance = _kernel(x, x, length_scale) + _NOISE * np.eye(len(x))
+    cholesky = linalg.cho_factor(covariance, lower=True)
+    cross_covariance = _kernel(x, x_new, length_scale)
+    mean = cross_covariance.T @ linalg.cho_solve(cholesky, y)
+    variance = 1.0 - np.sum(cross_covariance * linalg.cho_solve(cholesky, cross_covariance), axis=0)
+    return mean, np.sqrt(np.maximum(variance, _NOISE))
+
+
+class _Backtester:
+    """Runs backtests of `strategy` and returns the values of `metric`."""
+
+    def __init__(
+        self,
+        strategy: bt.Strategy,
+        ticker_data: dict[str, pd.DataFrame],
+        metric: str,
+        timeframe,
+        engine: str = "backtrader",
+        profile: Optional[profiling.Profile] = None,
+    ):
+        if engine not in ["backtrader", "vectorised"]:
+            raise ValueError(f'Engine "{engine}" is not recognised.')
+
+        self.strategy = strategy
+        self.ticker_data = ticker_data
+        self.metric = metric
+        self.timeframe = timeframe
+        self.engine = engine
+        self.profile = profile
+
+    def __call__(
+        self, tasks: list[_Task], on_results: Optional[_ResultsCallback] = None
+    ) -> list[float]:
+        if self.engine == "vectorised":
+            return self._run_vectorised(tasks, on_results)
+
+        values = []
+        for idx, task in enumerate(tasks):
+            values.append(self._run_backtrader(task))
+            if on_results is not None:
+                on_results([idx], values[-1:])
+        return values
+
+    def _run_backtrader(self, task: _Task) -> float:
+        params, ticker, amount = task
+        profile = self.profile
+        with _profiled(profile, self.strategy.__name__, task):
+            with _phase(profile, "cerebro construction"):
+                if isinstance(ticker, tuple):
+                    ticker_data = {name: self.ticker_data[name] for name in ticker}
+                else:
+                    ticker_data = self.ticker_data[ticker]
+                cerebro = utils.get_cerebro(self.strategy, ticker_data, amount, params)
+                cerebro.addanalyzer(metrics.EquityCurve, _name="equity")
+                if profile is not None:
+                    cerebro.addanalyzer(profiling.Timing, _name="timing")
+            with _phase(profile, "backtest"):
+                run = cerebro.run()
+            if profile is not None:
+                profile.record_strategy(run[0])
+            with _phase(profile, "metric extraction"):
+                equity = run[0].analyzers.equity.get_analysis()
+                return metrics.evaluate(
+                    self.metric, equity["value"], equity["index"], amount, self.timeframe
+                )
+
+    def _run_vectorised(
+        self, tasks: list[_Task], on_results: Optional[_ResultsCallback] = None
+    ) -> list[float]:
+        # All the parameter combinations of the same backtest are evaluated at once.
+        task_idxs = collections.defaultdict(list)
+        for idx, (_, ticker, amount) in enumerate(tasks):
+            task_idxs[(ticker, amount)].append(idx)
+
+        values = [0.0] * len(tasks)
+        for (ticker, amount), idxs in task_idxs.items():
+            params_list = [tasks[idx][0] for idx in idxs]
+            with _phase(self.profile, "backtest"), _profiled(
+                self.profile, self.strategy.__name__, (params_list, ticker, amount)
+            ):
+                metric_values = vectorised.grid_metrics(
+                    self.strategy,
+                    self.ticker_data[ticker],
+                    params_list,
+                    self.metric,
+                    self.timeframe,
+                    cash=amount,
+                )
+            for idx, value in zip(idxs, metric_values):
+                values[idx] = float(value)
+            if on_results is not None:
+                on_results(idxs, [values[idx] for idx in idxs])
+
+        return values
+
+
+# Backtests of one ticker in some periods: ticker, parameters, first and last
+# dates of the periods, and starting cash.
+_WindowTask = tuple[str, list[dict[str, Any]], list[tuple[pd.Timestamp, pd.Timestamp]], float]
+
+
+class _WindowBacktester:
+    """Runs backtests of `strategy` in windows of the financial data and
+    returns the values of `metric` of every parameter combination in every
+    window."""
+
+    def __init__(
+        self,
+        strategy: bt.Strategy,
+        ticker_data: dict[str, pd.DataFrame],
+        metric: str,
+        timeframe,
+        engine: str = "backtrader",
+    ):
+        self.backtester = _Backtester(strategy, ticker_data, metric, timeframe, engine)
+
+    def __call__(self, tasks: list[_WindowTask]) -> list[npt.NDArray[np.float64]]:
+        return [self._run(*task) for task in tasks]
+
+    def _run(
+        self,
+        ticker: str,
+        params_list: list[dict[str, Any]],
+        periods: list[tuple[pd.Timestamp, pd.Timestamp]],
+        amount: float,
+    ) -> npt.NDArray[np.float64]:
+        backtester = self.backtester
+        financial_data = backtester.ticker_data[ticker]
+        windows = [
+            (
+                financial_data.index.searchsorted(first, side="left"),
+                financial_data.index.searchsorted(last, side="right"),
+            )
+            for first, last in periods
+        ]
+        if backtester.engine == "vectorised":
+            return vectorised.window_metrics(
+                backtester.strategy,
+                financial_data,
+                params_list,
+                windows,
+                backtester.metric,
+                backtester.timeframe,
+                cash=amount,
+            )
+
+        values = np.full((len(params_list), len(windows)), np.nan)
+        for window_idx, (start, end) in enumerate(windows):
+            if end <= start:
+                continue
+            # Positional slices are views of the data.
+            window_backtester = _Backtester(
+                backtester.strategy,
+                {ticker: financial_data.iloc[start:end]},
+                backtester.metric,
+                backtester.timeframe,
+            )
+            for params_idx, params in enumerate(params_list):
+                value = window_backtester._run_backtrader((params, ticker, amount))
+                values[params_idx, window_idx] = np.nan if value is None else value
+
+        return values
+
+
+@contextlib.contextmanager
+def _window_runner(
+    strategy: bt.Strategy,
+    ticker_data: dict[str, pd.DataFrame],
+    metric: str,
+    timeframe,
+    n_jobs: int = 1,
+    engine: str = "backtrader",
+) -> Iterator[Callable[[list[_WindowTask]], list[npt.NDArray[np.float64]]]]:
+    """Provides a function running a list of window backtests, each in a
+    separate worker process if there are multiple jobs."""
+    backtester = _WindowBacktester(strategy, ticker_data, metric, timeframe, engine)
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+
+    if n_jobs == 1:
+        yield backtester
+        return
+
+    def run_backtests(tasks: list[_WindowTask]) -> list[npt.NDArray[np.float64]]:
+        return [values for (values,) in executor.map(_run_in_worker, [[task] for task in tasks])]
+
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=n_jobs, initializer=_init_worker, initargs=(backtester,)
+    ) as executor:
+        yield run_backtests
+
+
+def _cached(
+    run_backtests: Callable[..., list[float]],
+    result_cache: results.ResultCache,
+    strategy: bt.Strategy,
+    ticker_data: dict[str, pd.DataFrame],
+    **settings,
+) -> Callable[..., list[float]]:
+    """Wraps `run_backtests` so that only the backtests missing from
+    `result_cache` are run."""
+    fingerprints = {}
+    source = results.source_hash(strategy)
+
+    def task_key(task: _Task) -> str:
+        params, ticker, amount = task
+        tickers = ticker if isinstance(ticker, tuple) else (ticker,)
+        for name in tickers:
+            if name not in fingerprints:
+                fingerprints[name] = results.fingerprint(ticker_data[name])
+        return result_cache.key(
+            strategy,
+            params,
+            ticker,
+            ",".join(fingerprints[name] for name in tickers),
+            source=source,
+            amount=amount,
+            **settings,
+        )
+
+    def run_cached_backtests(
+        tasks: list[_Task], on_results: Optional[_ResultsCallback] = None
+    ) -> list[float]:
+        keys = [task_key(task) for task in tasks]
+        cached_values = result_cache.get_many(keys)
+        missing_idxs = [idx for idx, key in enumerate(keys) if key not in cached_values]
+        if on_results is not None:
+            hit_idxs = [idx for idx, key in enumerate(keys) if key in cached_values]
+            if hit_idxs:
+                on_results(hit_idxs, [cached_values[keys[idx]] for idx in hit_idxs])
+            missing_values = run_backtests(
+                [tasks[idx] for idx in missing_idxs],
+                lambda idxs, values: on_results([missing_idxs[idx] for idx in idxs], values),
+            )
+        else:
+            missing_values = run_backtests([tasks[idx] for idx in missing_idxs])
+        result_cache.set_many(
+            (keys[idx], strategy.__name__, tasks[idx][1], value)
+            for idx, value in zip(missing_idxs, missing_values)
+        )
+        cached_values.update((keys[idx], value) for idx, value in zip(missing_idxs, missing_values))
+
+        return [cached_values[key] for key in keys]
+
+    return run_cached_backtests
+
+
+# Number of results written to a checkpoint between flushes to the disk.
+_CHECKPOINT_FLUSH_INTERVAL = 64
+
+
+def _checkpointed(
+    run_backtests: Callable[..., list[float]], path: str, **settings
+) -> Callable[[list[_Task]], list[float]]:
+    """Wraps `run_backtests` so that the results are appended to the
+    checkpoint at `path` as they are completed, and the backtests already in
+    it are skipped.
+
+    The checkpoint is a JSON Lines file. Its first line holds `settings`,
+    which must match those of the search being resumed; every other line
+    holds the parameters, the ticker, the starting cash and the metric value
+    of a backtest.
+    """
+    header = json.loads(json.dumps({"settings": settings}, default=str))
+    checkpoint_values = {}
+    if os.path.exists(path):
+        with open(path, "rb+") as file:
+            lines = file.readlines()
+            end = 0
+            for line_idx, line in enumerate(lines):
+                # Only the last line may be incomplete, if writing it was interrupted.
+                if line_idx == len(lines) - 1 and not line.endswith(b"\n"):
+                    break
+                record = json.loads(line)
+                if line_idx == 0:
+                    if record != header:
+                        raise ValueError(f'Checkpoint "{path}" belongs to a different search.')
+                else:
+                    task = (record["params"], record["ticker"], record["amount"])
+                    checkpoint_values[_task_key(task)] = record["value"]
+                end += len(line)
+            file.truncate(end)
+
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        with open(path, "a") as file:
+            file.write(json.dumps(header, default=str) + "\n")
+
+    def run_checkpointed_backtests(tasks: list[_Task]) -> list[float]:
+        keys = [_task_key(task) for task in tasks]
+        missing_idxs = [idx for idx, key in enumerate(keys) if key not in checkpoint_values]
+        if not missing_idxs:
+            return [checkpoint_values[key] for key in keys]
+
+        with open(path, "a") as file:
+            num_unflushed = 0
+
+            def write(idxs: list[int], values: list[float]):
+                nonlocal num_unflushed
+                for idx, value in zip(idxs, values):
+                    params, ticker, amount = tasks[missing_idxs[idx]]
+                    line = {"params": params, "ticker": ticker, "amount": amount, "value": value}
+                    file.write(json.dumps(line, default=str) + "\n")
+                    checkpoint_values[keys[missing_idxs[idx]]] = value
+                num_unflushed += len(idxs)
+                if num_unflushed >= _CHECKPOINT_FLUSH_INTERVAL:
+                    _sync(file)
+                    num_unflushed = 0
+
+            try:
+                run_backtests([tasks[idx] for idx in missing_idxs], write)
+            finally:
+                _sync(file)
+
+        return [checkpoint_values[key] for key in keys]
+
+    return run_checkpointed_backtests
+
+
+def _sync(file: IO):
+    file.flush()
+    os.fsync(file.fileno())
+
+
+def _task_key(task: _Task) -> str:
+    # Tuples of tickers are encoded in the same way as the lists they are read back as.
+    return json.dumps(list(task), sort_keys=True, default=str)
+
+
+# Backtester of the current worker process.
+_worker_backtester: Union[_Backtester, _WindowBacktester] = None
+
+
+def _init_worker(backtester: Union[_Backtester, _WindowBacktester]):
+    global _worker_backtester
+    _worker_backtester = backtester
+
+
+def _run_in_worker(tasks: list) -> list:
+    return _worker_backtester(tasks)
+
+
+def _run_profiled_in_worker(tasks: list) -> tuple[list, profiling.Profile]:
+    # Each chunk is timed separately and merged into the profile of the search.
+    profile = _worker_backtester.profile
+    _worker_backtester.profile = profiling.Profile(profile.profile_dir)
+    try:
+        return _worker_backtester(tasks), _worker_backtester.profile
+    finally:
+        _worker_backtester.profile = profile
+
+
+def _phase(profile: Optional[profiling.Profile], name: str) -> contextlib.AbstractContextManager:
+    if profile is None:
+        return contextlib.nullcontext()
+    return profile.phase(name)
+
+
+def _profiled(
+    profile: Optional[profiling.Profile], name: str, task: Any
+) -> contextlib.AbstractContextManager:
+    if profile is None:
+        return contextlib.nullcontext()
+    return profile.profiled(name, task)
+
+
+@contextlib.contextmanager
+def _backtest_runner(
+    strategy: bt.Strategy,
+    ticker_data: dict[str, pd.DataFrame],
+    metric: str,
+    timeframe,
+    n_jobs: int = 1,
+    engine: str = "backtrader",
+    profile: Optional[profiling.Profile] = None,
+) -> Iterator[Callable[..., list[float]]]:
+    """Provides a function running a list of backtests and returning their
+    metric values in the same order. The values are also passed to the
+    optional `_ResultsCallback` as soon as they are known.
+
+    With multiple jobs, the ticker data is sent to each worker process only
+    once, when it starts, rather than with every backtest.
+    """
+    backtester = _Backtester(strategy, ticker_data, metric, timeframe, engine, profile)
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+
+    if n_jobs == 1:
+        yield backtester
+        return
+
+    def run_backtests(
+        tasks: list[_Task], on_results: Optional[_ResultsCallback] = None
+    ) -> list[float]:
+        # Backtests of the same ticker are kept together so that the
+        # vectorised engine can evaluate them at once.
+        order = sorted(range(len(tasks)), key=lambda idx: tasks[idx][1])
+        chunk_size = max(1, math.ceil(len(tasks) / (4 * n_jobs)))
+        chunks = [order[start : start + chunk_size] for start in range(0, len(order), chunk_size)]
+
+        values = [0.0] * len(tasks)
+        worker = _run_in_worker if profile is None else _run_profiled_in_worker
+        futures = {
+            executor.submit(worker, [tasks[idx] for idx in chunk]): chunk for chunk in chunks
+        }
+        # Results are passed on as soon as each chunk is done, in any order.
+        for future in concurrent.futures.as_completed(futures):
+            chunk = futures[future]
+            if profile is None:
+                chunk_values = future.result()
+            else:
+                chunk_values, chunk_profile = future.result()
+                profile.merge(chunk_profile)
+            for idx, value in zip(chunk, chunk_values):
+                values[idx] = value
+            if on_results is not None:
+                on_results(chunk, chunk_values)
+
+        return values
+
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=n_jobs, initializer=_init_worker, initargs=(backtester,)
+    ) as executor:
+        yield run_backtests
+
+
+def _is_improved(metric_name: str, current, previous_best):
+    if metric_name in metrics.METRICS:
         if current > previous_best:
             return True
         return False
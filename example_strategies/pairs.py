@@ -0,0 +1,178 @@
+"""Scanning of a universe of stocks for pairs suitable for pairs trading."""
+
+import concurrent.futures
+import datetime
+import math
+import os
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+
+from example_strategies import data, stats
+
+# Columns of the table returned by `scan`.
+COLUMNS = ["ticker_1", "ticker_2", "correlation", "hedge_ratio", "adf_p_value", "hurst_exponent"]
+# Number of pairs whose Hurst exponents are estimated at once, which bounds
+# the memory used for their residuals.
+_HURST_CHUNK_SIZE = 1024
+
+
+def scan(
+    prices: pd.DataFrame,
+    min_correlation: float = 0.9,
+    num_lags: int = 2**6,
+    n_jobs: int = 1,
+) -> pd.DataFrame:
+    """Finds the pairs of stocks whose hedged price difference is the most
+    likely to be mean-reverting.
+
+    The hedge ratios and the correlations of all the pairs are computed at
+    once. Only the pairs whose prices are at least `min_correlation`
+    correlated are then tested for stationarity, see `stats.adf_p_val` and
+    `stats.hurst_exponents`; the ADF tests are run in parallel, while Hurst
+    exponents are estimated for many pairs at once.
+
+    Args:
+        prices: Prices of the stocks, one column per ticker, without missing
+            values.
+        min_correlation: Minimum correlation of the prices of a pair.
+        num_lags: Number of lags used to estimate Hurst exponent.
+        n_jobs: Number of processes running the ADF tests. If `-1`, all the
+            CPUs are used.
+
+    Returns:
+        Table with columns `COLUMNS`, one row for each of the tested pairs,
+        sorted from the lowest ADF test p-value. The residuals
+        `ticker_2 - hedge_ratio * ticker_1` are tested.
+    """
+    price_matrix = prices.to_numpy(dtype=np.float64).T
+    tickers = list(prices.columns)
+
+    correlations = correlation_matrix(price_matrix)
+    betas = hedge_ratios(price_matrix)
+    idxs_1, idxs_2 = np.triu_indices(len(tickers), k=1)
+    is_correlated = correlations[idxs_1, idxs_2] >= min_correlation
+    idxs_1, idxs_2 = idxs_1[is_correlated], idxs_2[is_correlated]
+    pair_betas = betas[idxs_1, idxs_2]
+
+    tasks = list(zip(idxs_1.tolist(), idxs_2.tolist(), pair_betas.tolist()))
+    adf_p_values = _run_tasks(price_matrix, tasks, n_jobs)
+    hurst_exponents = np.empty(len(tasks))
+    for start in range(0, len(tasks), _HURST_CHUNK_SIZE):
+        end = start + _HURST_CHUNK_SIZE
+        residuals = (
+            price_matrix[idxs_2[start:end]]
+            - pair_betas[start:end, np.newaxis] * price_matrix[idxs_1[start:end]]
+        )
+        hurst_exponents[start:end] = stats.hurst_exponents(residuals, num_lags=num_lags)
+
+    table = pd.DataFrame(
+        {
+            "ticker_1": [tickers[idx] for idx in idxs_1],
+            "ticker_2": [tickers[idx] for idx in idxs_2],
+            "correlation": correlations[idxs_1, idxs_2],
+            "hedge_ratio": pair_betas,
+            "adf_p_value": adf_p_values,
+            "hurst_exponent": hurst_exponents,
+        },
+        columns=COLUMNS,
+    )
+    return table.sort_values(["adf_p_value", "hurst_exponent"], kind="stable").reset_index(
+        drop=True
+    )
+
+
+def scan_tickers(
+    tickers: list[str],
+    from_date: datetime.date = None,
+    to_date: datetime.date = None,
+    source: str = "yahoo",
+    **kwargs,
+) -> pd.DataFrame:
+    """Loads closing prices of `tickers` and scans them for pairs, see `scan`.
+
+    Only the dates on which all the tickers were traded are used.
+
+    Args:
+        tickers: Stock symbols.
+        from_date: Date to get the data from.
+        to_date: Date to get the data to.
+        source: Source of financial information, see `data.load`.
+        kwargs: Arguments of `scan`.
+
+    Returns:
+        Table of the pairs, see `scan`.
+    """
+    ticker_data = data.load_many(tickers, from_date=from_date, to_date=to_date, source=source)
+    prices = pd.concat({ticker: ticker_data[ticker]["Close"] for ticker in ticker_data}, axis=1)
+    return scan(prices.dropna(), **kwargs)
+
+
+def hedge_ratios(prices: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    """Computes hedge ratios of all pairs of stocks, as computed by
+    `stats.pairs_trading_hedge_ratio`.
+
+    Args:
+        prices: Prices, one row per stock.
+
+    Returns:
+        Matrix whose element `[i, j]` is the hedge ratio of the `j`th stock
+        with respect to the `i`th one.
+    """
+    # Least squares solution without intercept: $\beta = x \cdot y / x \cdot x$.
+    gram = prices @ prices.T
+    return gram / np.diag(gram)[:, np.newaxis]
+
+
+def correlation_matrix(prices: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    """Computes Pearson correlations of the prices of all pairs of stocks.
+
+    Args:
+        prices: Prices, one row per stock.
+
+    Returns:
+        Correlation matrix.
+    """
+    return np.corrcoef(prices)
+
+
+def _run_tasks(
+    prices: npt.NDArray[np.float64], tasks: list[tuple[int, int, float]], n_jobs: int
+) -> list[float]:
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+
+    if n_jobs == 1 or len(tasks) < 2:
+        return _adf_p_values(prices, tasks)
+
+    chunk_size = max(1, math.ceil(len(tasks) / (4 * n_jobs)))
+    chunks = [tasks[start : start + chunk_size] for start in range(0, len(tasks), chunk_size)]
+    # The prices are sent to each worker process only once, when it starts.
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=n_jobs, initializer=_init_worker, initargs=(prices,)
+    ) as executor:
+        return [
+            p_value
+            for chunk_p_values in executor.map(_run_in_worker, chunks)
+            for p_value in chunk_p_values
+        ]
+
+
+def _adf_p_values(
+    prices: npt.NDArray[np.float64], tasks: list[tuple[int, int, float]]
+) -> list[float]:
+    return [stats.adf_p_val(prices[idx_2] - beta * prices[idx_1]) for idx_1, idx_2, beta in tasks]
+
+
+# Prices of the current worker process.
+_worker_prices: npt.NDArray[np.float64] = None
+
+
+def _init_worker(prices: npt.NDArray[np.float64]):
+    global _worker_prices
+    _worker_prices = prices
+
+
+def _run_in_worker(tasks: list[tuple[int, int, float]]) -> list[float]:
+    return _adf_p_values(_worker_prices, tasks)
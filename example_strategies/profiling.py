@@ -0,0 +1,171 @@
+"""Opt-in timing of optimisations, e.g.
+```python
+from example_strategies import optimisation, profiling
+
+profile = profiling.Profile(profile_dir="profiles")
+optimisation.grid_search(strategy, train_tickers, test_tickers, params_grid, profile=profile)
+print(profile.summary())
+```
+"""
+
+import collections
+import contextlib
+import cProfile
+import hashlib
+import json
+import os
+import time
+from typing import Any, Iterator, Optional
+
+import backtrader as bt
+
+# Phases of a search, in the order they happen.
+PHASES = ["data loading", "cerebro construction", "backtest", "metric extraction"]
+
+
+class Profile:
+    """Wall time spent in each phase of a search, and the number and the
+    duration of the calls to the strategies' `next`.
+
+    When backtests run in several processes, the times of the phases that
+    happen in the worker processes are summed over the processes, so they
+    can add up to more than the time of the whole search.
+
+    Args:
+        profile_dir: If given, every backtest (or, with the vectorised
+            engine, every batch of backtests of a ticker) is run under
+            `cProfile` and its statistics are dumped to a file in this
+            directory, which can be read using `pstats`.
+    """
+
+    def __init__(self, profile_dir: Optional[str] = None):
+        self.profile_dir = profile_dir
+        self.phase_times = collections.defaultdict(float)
+        self.phase_calls = collections.Counter()
+        self.num_backtests = 0
+        self.num_bars = 0
+        self.next_calls = collections.Counter()
+        self.next_times = collections.defaultdict(float)
+        self.profile_paths = []
+        self.search_time = 0.0
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Adds the wall time of the `with` block to phase `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_times[name] += time.perf_counter() - start
+            self.phase_calls[name] += 1
+
+    @contextlib.contextmanager
+    def profiled(self, name: str, task: Any) -> Iterator[None]:
+        """Runs the `with` block under `cProfile` if `profile_dir` is set, and
+        dumps the statistics to a file named after `name` and `task`."""
+        if self.profile_dir is None:
+            yield
+            return
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            encoded = json.dumps(task, sort_keys=True, default=str)
+            digest = hashlib.sha256(encoded.encode()).hexdigest()[:16]
+            os.makedirs(self.profile_dir, exist_ok=True)
+            path = os.path.join(self.profile_dir, f"{name}-{digest}.prof")
+            profiler.dump_stats(path)
+            self.profile_paths.append({"task": json.loads(encoded), "path": path})
+
+    def record_strategy(self, strategy: bt.Strategy):
+        """Records the bars and the calls to `next` of a finished backtest,
+        see `Timing`."""
+        self.num_backtests += 1
+        self.num_bars += len(strategy)
+        name = type(strategy).__name__
+        self.next_calls[name] += getattr(strategy, "next_calls", 0)
+        self.next_times[name] += getattr(strategy, "next_time", 0.0)
+
+    def merge(self, other: "Profile"):
+        """Adds the timings of `other`, e.g. of a worker process."""
+        for name, phase_time in other.phase_times.items():
+            self.phase_times[name] += phase_time
+        self.phase_calls.update(other.phase_calls)
+        self.num_backtests += other.num_backtests
+        self.num_bars += other.num_bars
+        self.next_calls.update(other.next_calls)
+        for name, next_time in other.next_times.items():
+            self.next_times[name] += next_time
+        self.profile_paths.extend(other.profile_paths)
+
+    def report(self) -> dict[str, Any]:
+        """Returns the timings as a JSON-serialisable dictionary.
+
+        The time of the backtests is split into the time of the strategies'
+        `next` and the rest (`"engine"`), i.e. the broker, the indicators, the
+        analyzers and the data feeds.
+        """
+        backtest_time = self.phase_times.get("backtest", 0.0)
+        next_time = sum(self.next_times.values())
+        phases = sorted(
+            self.phase_times, key=lambda name: PHASES.index(name) if name in PHASES else len(PHASES)
+        )
+        return {
+            "search_time": self.search_time,
+            "phases": {
+                name: {"time": self.phase_times[name], "calls": self.phase_calls[name]}
+                for name in phases
+            },
+            "backtests": self.num_backtests,
+            "bars": self.num_bars,
+            "bars_per_second": self.num_bars / backtest_time if backtest_time > 0.0 else None,
+            "engine_time": backtest_time - next_time if self.num_bars else None,
+            "strategies": {
+                name: {"next_calls": self.next_calls[name], "next_time": self.next_times[name]}
+                for name in self.next_calls
+            },
+            "profiles": self.profile_paths,
+        }
+
+    def summary(self) -> str:
+        """Returns the report formatted as a table."""
+        report = self.report()
+        lines = [f"{'phase':<30} {'time (s)':>10} {'calls':>8}"]
+        for name, phase in report["phases"].items():
+            lines.append(f"{name:<30} {phase['time']:>10.3f} {phase['calls']:>8}")
+        for name, strategy in report["strategies"].items():
+            lines.append(
+                f"{'  ' + name + '.next':<30} {strategy['next_time']:>10.3f} "
+                f"{strategy['next_calls']:>8}"
+            )
+        if report["engine_time"] is not None:
+            lines.append(f"{'  engine':<30} {report['engine_time']:>10.3f}")
+        lines.append(f"{'search':<30} {report['search_time']:>10.3f}")
+        if report["bars_per_second"] is not None:
+            lines.append(
+                f"{report['backtests']} backtests, {report['bars']} bars, "
+                f"{report['bars_per_second']:.0f} bars/s"
+            )
+        return "\n".join(lines)
+
+
+class Timing(bt.Analyzer):
+    """Starts timing the strategy's `next`, see `BaseStrategy.time_next`.
+
+    `get_analysis` returns the number of bars, the number of calls to `next`
+    and the time spent in them.
+    """
+
+    def start(self):
+        if hasattr(self.strategy, "time_next"):
+            self.strategy.time_next()
+
+    def get_analysis(self) -> dict[str, Any]:
+        return {
+            "bars": len(self.strategy),
+            "next_calls": getattr(self.strategy, "next_calls", 0),
+            "next_time": getattr(self.strategy, "next_time", 0.0),
+        }
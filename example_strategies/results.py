@@ -0,0 +1,281 @@
+"""Persistent cache of backtest results.
+
+The statistics of a cache can be printed, and its entries invalidated or
+evicted, from the command line, e.g.
+```text
+python -m example_strategies.results info
+python -m example_strategies.results invalidate --strategy MACrossoverStrategy
+python -m example_strategies.results evict 10000
+```
+"""
+
+import argparse
+import collections
+import contextlib
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Iterable, Optional, Union
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+from example_strategies import data
+
+# Maximum number of parameters of an SQLite statement, in versions before 3.32.
+_MAX_VARIABLES = 999
+
+ResultCacheInfo = collections.namedtuple("ResultCacheInfo", ["hits", "misses", "entries", "size"])
+
+
+def _escape_like(text: str) -> str:
+    """Escapes the wildcards of a `LIKE` pattern, using `\\` as the escape
+    character."""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _default_path() -> str:
+    return os.path.join(data._data_dir_path(), "results.sqlite")
+
+
+class ResultCache:
+    """Metric values of backtests stored in an SQLite database.
+
+    Each result is keyed by a hash of everything the backtest depends on, see
+    `ResultCache.key`, so results that are no longer valid are simply never
+    looked up again; they can be removed using `invalidate` or `evict`.
+
+    Args:
+        path: Path of the database. By default, it is kept next to the cached
+            financial data.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path if path is not None else _default_path()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    strategy TEXT NOT NULL,
+                    ticker TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    accessed REAL NOT NULL
+                )
+                """)
+            connection.execute("CREATE INDEX IF NOT EXISTS accessed ON results (accessed)")
+
+    @contextlib.contextmanager
+    def _connect(self):
+        connection = sqlite3.connect(self.path)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def key(
+        strategy: bt.Strategy,
+        params: dict[str, Any],
+        ticker: Union[str, tuple[str, ...]],
+        fingerprint: str,
+        source: Optional[str] = None,
+        **settings,
+    ) -> str:
+        """Returns the key of a backtest.
+
+        Args:
+            strategy: Strategy that was backtested. The key depends on the
+                source code of the strategy and its base classes.
+            params: Parameters of the strategy.
+            ticker: Ticker, or a tuple of tickers of a portfolio.
+            fingerprint: Fingerprint of the financial data, see `fingerprint`.
+            source: Hash of the source code of the strategy, see
+                `source_hash`. Computing it is slow, so it should be passed
+                when computing many keys of the same strategy.
+            settings: Any other settings of the backtest, e.g. the date range,
+                the starting cash and the metric.
+
+        Returns:
+            Hexadecimal digest.
+        """
+        fields = {
+            "strategy": f"{strategy.__module__}.{strategy.__qualname__}",
+            "source": source if source is not None else source_hash(strategy),
+            "params": params,
+            "ticker": ticker,
+            "fingerprint": fingerprint,
+            "settings": settings,
+        }
+        encoded = json.dumps(fields, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    def get_many(self, keys: list[str]) -> dict[str, Optional[float]]:
+        """Returns the cached values of those of `keys` that are in the
+        cache."""
+        unique_keys = list(dict.fromkeys(keys))
+        values = {}
+        with self._connect() as connection:
+            for start in range(0, len(unique_keys), _MAX_VARIABLES):
+                chunk = unique_keys[start : start + _MAX_VARIABLES]
+                rows = connection.execute(
+                    f"SELECT key, value FROM results WHERE key IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                )
+                values.update((key, json.loads(value)) for key, value in rows)
+            connection.executemany(
+                "UPDATE results SET accessed = ? WHERE key = ?",
+                [(time.time(), key) for key in values],
+            )
+
+        self.hits += len(values)
+        self.misses += len(unique_keys) - len(values)
+        return values
+
+    def set_many(self, results: Iterable[tuple[str, str, Union[str, tuple[str, ...]], float]]):
+        """Stores results.
+
+        Args:
+            results: Tuples of the key, the strategy's name, the ticker (or a
+                tuple of tickers) and the metric value.
+        """
+        now = time.time()
+        with self._connect() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                [
+                    (key, strategy, _ticker_str(ticker), _encode_value(value), now)
+                    for key, strategy, ticker, value in results
+                ],
+            )
+
+    def info(self) -> ResultCacheInfo:
+        """Returns the numbers of hits and misses since the cache was opened,
+        the number of stored results and the size of the database in bytes."""
+        with self._connect() as connection:
+            (entries,) = connection.execute("SELECT COUNT(*) FROM results").fetchone()
+
+        return ResultCacheInfo(self.hits, self.misses, entries, os.path.getsize(self.path))
+
+    def invalidate(self, strategy: Optional[str] = None, ticker: Optional[str] = None) -> int:
+        """Removes the results of `strategy` and/or `ticker`, or all of them if
+        neither is given.
+
+        Args:
+            strategy: Name of the strategy class.
+            ticker: Ticker. Results of portfolios containing it are removed
+                as well.
+
+        Returns:
+            Number of removed results.
+        """
+        conditions, args = [], []
+        if strategy is not None:
+            conditions.append("strategy = ?")
+            args.append(strategy)
+        if ticker is not None:
+            conditions.append("(',' || ticker || ',') LIKE ? ESCAPE '\\'")
+            args.append(f"%,{_escape_like(ticker.upper())},%")
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self._connect() as connection:
+            removed = connection.execute(f"DELETE FROM results{where}", args).rowcount
+
+        self._vacuum()
+        return removed
+
+    def evict(self, max_entries: int) -> int:
+        """Removes the least recently used results until at most
+        `max_entries` of them are left.
+
+        Returns:
+            Number of removed results.
+        """
+        with self._connect() as connection:
+            removed = connection.execute(
+                """
+                DELETE FROM results WHERE key NOT IN (
+                    SELECT key FROM results ORDER BY accessed DESC LIMIT ?
+                )
+                """,
+                (max_entries,),
+            ).rowcount
+
+        self._vacuum()
+        return removed
+
+    def _vacuum(self):
+        connection = sqlite3.connect(self.path)
+        try:
+            connection.execute("VACUUM")
+        finally:
+            connection.close()
+
+
+def fingerprint(financial_data: pd.DataFrame) -> str:
+    """Returns a hash of the dates, the column names and the values of
+    `financial_data`."""
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(financial_data.index.to_numpy(), "datetime64[ns]"))
+    digest.update(json.dumps([str(column) for column in financial_data.columns]).encode())
+    digest.update(np.ascontiguousarray(financial_data.to_numpy(dtype=float)))
+    return digest.hexdigest()
+
+
+def source_hash(strategy: bt.Strategy) -> str:
+    """Hashes the source code of `strategy` and its base classes, other than
+    those of backtrader itself."""
+    digest = hashlib.sha256()
+    for cls in strategy.__mro__:
+        if cls.__module__.split(".")[0] in ["backtrader", "builtins"]:
+            continue
+        try:
+            digest.update(inspect.getsource(cls).encode())
+        except (OSError, TypeError):
+            digest.update(cls.__qualname__.encode())
+
+    return digest.hexdigest()
+
+
+def _ticker_str(ticker: Union[str, tuple[str, ...]]) -> str:
+    if isinstance(ticker, tuple):
+        return ",".join(name.upper() for name in ticker)
+    return ticker.upper()
+
+
+def _encode_value(value) -> str:
+    # JSON, unlike SQLite, distinguishes NaN from a missing value.
+    return json.dumps(None if value is None else float(value))
+
+
+def main(args: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Manages the cache of backtest results.")
+    parser.add_argument("--path", help="path of the database", default=None)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("info", help="print statistics of the cache")
+    invalidate_parser = subparsers.add_parser("invalidate", help="remove results")
+    invalidate_parser.add_argument("--strategy", help="name of the strategy class")
+    invalidate_parser.add_argument("--ticker", help="ticker")
+    evict_parser = subparsers.add_parser("evict", help="remove least recently used results")
+    evict_parser.add_argument("max_entries", type=int, help="number of results to keep")
+    parsed = parser.parse_args(args)
+
+    cache = ResultCache(parsed.path)
+    if parsed.command == "info":
+        info = cache.info()
+        print(f"{info.entries} results, {info.size / 1024:.1f} KiB in {cache.path}")
+    elif parsed.command == "invalidate":
+        print(f"Removed {cache.invalidate(parsed.strategy, parsed.ticker)} results.")
+    elif parsed.command == "evict":
+        print(f"Removed {cache.evict(parsed.max_entries)} results.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,15 @@
+import math
+
 import numpy as np
 import numpy.typing as npt
 import statsmodels.tsa.stattools as ts
 from scipy import stats
 from statsmodels.regression.linear_model import OLS as ols
+from statsmodels.tsa.adfvalues import mackinnonp
+
+# Minimum number of windows whose ADF statistics are computed from the same
+# cumulative sums, see `rolling_adf_statistic`.
+_ADF_CHUNK_SIZE = 64
 
 
 def hurst_exponent(data: npt.NDArray[np.float64], num_lags: int = 2**6) -> float:
@@ -30,6 +37,45 @@ def hurst_exponent(data: npt.NDArray[np.float64], num_lags: int = 2**6) -> float
     return h
 
 
+def hurst_exponents(data: npt.NDArray[np.float64], num_lags: int = 2**6) -> npt.NDArray[np.float64]:
+    """Computes Hurst exponents of many time series at once, in the same way
+    as `hurst_exponent`.
+
+    Args:
+        data: Time series data, one row per series.
+        num_lags: Number of lags to use in the estimation.
+
+    Returns:
+        Hurst exponent of each series.
+    """
+    # Differences do not depend on the mean, and subtracting it reduces
+    # rounding errors in the sums below.
+    data = np.asarray(data, dtype=np.float64)
+    data = data - np.mean(data, axis=1, keepdims=True)
+    num_points = data.shape[1]
+    taus = np.arange(1, num_lags + 1)
+
+    # The sums of squared differences are expanded as
+    # $\sum_t (x_{t + \tau} - x_t)^2 = \sum_t x_{t + \tau}^2 + \sum_t x_t^2 - 2 \sum_t x_t x_{t + \tau}$.
+    # The sums of squares are read from the cumulative sums and the
+    # cross terms for all the lags are given by the autocorrelation, which is
+    # computed using the fast Fourier transform.
+    squares = np.cumsum(np.square(data), axis=1)
+    head_squares = squares[:, num_points - 1 - taus]
+    tail_squares = squares[:, -1:] - squares[:, taus - 1]
+    fft_size = 2 ** math.ceil(math.log2(num_points + num_lags))
+    spectrum = np.fft.rfft(data, n=fft_size, axis=1)
+    autocorrelation = np.fft.irfft(spectrum * np.conj(spectrum), n=fft_size, axis=1)
+    cross_terms = autocorrelation[:, taus]
+    y_hat = (head_squares + tail_squares - 2 * cross_terms) / (num_points - taus)
+
+    # All the slopes are fitted at once, see `hurst_exponent`.
+    design = np.stack([2 * np.log(taus), np.ones(num_lags)], axis=1)
+    coefficients, _, _, _ = np.linalg.lstsq(design, np.log(y_hat).T, rcond=None)
+
+    return coefficients[0]
+
+
 def pairs_trading_hedge_ratio(
     prices_1: npt.NDArray[np.float64], prices_2: npt.NDArray[np.float64]
 ) -> float:
@@ -62,3 +108,269 @@ def adf_p_val(prices: npt.NDArray[np.float64]) -> float:
         ADF test p-value.
     """
     return ts.adfuller(prices)[1]
+
+
+def rolling_hurst_exponent(
+    data: npt.NDArray[np.float64], window: int, num_lags: int = 2**6
+) -> npt.NDArray[np.float64]:
+    """Computes Hurst exponent of every `window` consecutive values, in the
+    same way as `hurst_exponent`.
+
+    Args:
+        data: Time series data.
+        window: Number of values in each window. Must be greater than
+            `num_lags`.
+        num_lags: Number of lags to use in the estimation.
+
+    Returns:
+        Hurst exponent of the window ending at each value, or NaN for the
+        first `window - 1` values.
+    """
+    _check_window(window, num_lags)
+    data = np.asarray(data, dtype=np.float64)
+    data = data - np.mean(data)
+    taus = np.arange(1, num_lags + 1)
+    result = np.full(len(data), np.nan)
+    if len(data) < window:
+        return result
+
+    # The sums of squared differences of all the windows are read from their
+    # cumulative sums; `sums[tau - 1, t]` sums the squared differences between
+    # the values `tau` apart up to the `t`th value.
+    sums = np.zeros((num_lags, len(data)))
+    for tau in taus:
+        np.cumsum(np.square(data[tau:] - data[:-tau]), out=sums[tau - 1, tau:])
+    starts = np.arange(len(data) - window + 1)[:, np.newaxis]
+    window_sums = sums[taus - 1, starts + window - 1] - sums[taus - 1, starts + taus - 1]
+    result[window - 1 :] = _hurst_slopes(window_sums / (window - taus), taus)
+    return result
+
+
+def rolling_adf_statistic(
+    prices: npt.NDArray[np.float64], window: int, num_lags: int = 1
+) -> npt.NDArray[np.float64]:
+    """Computes Augmented Dickey-Fuller (ADF) test statistic of every `window`
+    consecutive prices.
+
+    Unlike `adf_p_val`, the number of lagged differences is fixed rather than
+    chosen for every window, i.e. the statistic is the same as that of
+    `statsmodels.tsa.stattools.adfuller(prices, maxlag=num_lags, autolag=None)`.
+
+    Args:
+        prices: Prices of the stock.
+        window: Number of prices in each window. Must be greater than
+            `2 * num_lags + 3`.
+        num_lags: Number of lagged differences in the regression.
+
+    Returns:
+        ADF test statistic of the window ending at each price, or NaN for the
+        first `window - 1` prices.
+    """
+    _check_window(window, 2 * num_lags + 3)
+    prices = np.asarray(prices, dtype=np.float64)
+    result = np.full(len(prices), np.nan)
+    num_rows = window - num_lags - 1
+    num_windows = len(prices) - window + 1
+    # Moments of the windows are read from the cumulative sums of the outer
+    # products of the rows. The sums are restarted every `chunk_size` windows,
+    # and the prices are offset by the first price of each chunk, which the
+    # statistic does not depend on, so that rounding errors stay as small as
+    # those of a single window, see `RollingADF`.
+    chunk_size = max(num_rows, _ADF_CHUNK_SIZE)
+    for start in range(0, num_windows, chunk_size):
+        end = min(start + chunk_size, num_windows)
+        chunk_prices = prices[start : end + window - 1]
+        rows = _adf_rows(chunk_prices - chunk_prices[0], num_lags)
+        moments = np.cumsum(rows[:, :, np.newaxis] * rows[:, np.newaxis, :], axis=0)
+        moments[num_rows:] -= moments[:-num_rows].copy()
+        result[start + window - 1 : end + window - 1] = _adf_statistics(
+            moments[num_rows - 1 :], num_rows
+        )
+
+    return result
+
+
+def rolling_adf_p_val(
+    prices: npt.NDArray[np.float64], window: int, num_lags: int = 1
+) -> npt.NDArray[np.float64]:
+    """Computes p-value of Augmented Dickey-Fuller (ADF) test of every
+    `window` consecutive prices, see `rolling_adf_statistic`.
+
+    Returns:
+        ADF test p-value of the window ending at each price, or NaN for the
+        first `window - 1` prices.
+    """
+    return adf_p_vals(rolling_adf_statistic(prices, window, num_lags))
+
+
+def adf_p_vals(statistics: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    """Converts ADF test statistics of regressions with a constant to
+    p-values using MacKinnon's approximation, as done by `adf_p_val`. NaN
+    statistics are kept as NaN."""
+    statistics = np.asarray(statistics, dtype=np.float64)
+    return np.array(
+        [np.nan if np.isnan(statistic) else mackinnonp(statistic) for statistic in statistics.flat]
+    ).reshape(statistics.shape)
+
+
+class RollingHurstExponent:
+    """Hurst exponent of the last `window` values, updated in `O(num_lags)`
+    time per value.
+
+    The sums of squared differences of all the lags are updated as values
+    enter and leave the window, and are recomputed from the buffer every time
+    it wraps around, so rounding errors cannot accumulate.
+
+    Args:
+        window: Number of values in the window. Must be greater than
+            `num_lags`.
+        num_lags: Number of lags to use in the estimation, see
+            `hurst_exponent`.
+    """
+
+    def __init__(self, window: int, num_lags: int = 2**6):
+        _check_window(window, num_lags)
+        self.window = window
+        self.num_lags = num_lags
+        self.count = 0
+        self._taus = np.arange(1, num_lags + 1)
+        self._sums = np.zeros(num_lags)
+        self._buffer = np.zeros(window)
+        self._head = 0
+
+    def push(self, value: float):
+        """Adds `value` to the window, removing the oldest value if the window
+        is full."""
+        if self.count == self.window:
+            # The oldest value is at the head of the buffer.
+            oldest = self._buffer[self._head]
+            self._sums -= np.square(self._buffer[(self._head + self._taus) % self.window] - oldest)
+        else:
+            self.count += 1
+
+        num_pairs = min(self.count - 1, self.num_lags)
+        previous = self._buffer[(self._head - self._taus[:num_pairs]) % self.window]
+        self._sums[:num_pairs] += np.square(value - previous)
+        self._buffer[self._head] = value
+        self._head += 1
+        if self._head == self.window:
+            self._head = 0
+            for tau in self._taus:
+                self._sums[tau - 1] = np.sum(np.square(self._buffer[tau:] - self._buffer[:-tau]))
+
+    @property
+    def value(self) -> float:
+        """Hurst exponent, or NaN if the window is not full."""
+        if self.count < self.window:
+            return float("nan")
+        return float(_hurst_slopes(self._sums / (self.window - self._taus), self._taus))
+
+
+class RollingADF:
+    """Augmented Dickey-Fuller (ADF) test statistic of the last `window`
+    prices, see `rolling_adf_statistic`, updated in constant time per price.
+
+    The moments of the regression are updated as rows enter and leave the
+    window, and are recomputed from the buffer of rows every time it wraps
+    around, so rounding errors cannot accumulate.
+
+    Args:
+        window: Number of prices in the window. Must be greater than
+            `2 * num_lags + 3`.
+        num_lags: Number of lagged differences in the regression.
+    """
+
+    def __init__(self, window: int, num_lags: int = 1):
+        _check_window(window, 2 * num_lags + 3)
+        self.window = window
+        self.num_lags = num_lags
+        self.count = 0
+        self._offset = None
+        self._prices = np.zeros(num_lags + 2)
+        self._num_rows = window - num_lags - 1
+        self._rows = np.zeros((self._num_rows, num_lags + 3))
+        self._head = 0
+        self._moments = np.zeros((num_lags + 3, num_lags + 3))
+
+    def push(self, price: float):
+        """Adds `price` to the window, removing the oldest price if the window
+        is full."""
+        # The statistic does not depend on a constant offset of the prices.
+        if self._offset is None:
+            self._offset = price
+        self._prices[:-1] = self._prices[1:]
+        self._prices[-1] = price - self._offset
+        self.count = min(self.count + 1, self.window)
+        if self.count < self.num_lags + 2:
+            return
+
+        # Until the window is full, the rows being replaced are zero.
+        row = _adf_rows(self._prices, self.num_lags)[0]
+        self._moments += np.outer(row, row) - np.outer(
+            self._rows[self._head], self._rows[self._head]
+        )
+        self._rows[self._head] = row
+        self._head += 1
+        if self._head == self._num_rows:
+            self._head = 0
+            self._moments = self._rows.T @ self._rows
+
+    @property
+    def statistic(self) -> float:
+        """ADF test statistic, or NaN if the window is not full."""
+        if self.count < self.window:
+            return float("nan")
+        return float(_adf_statistics(self._moments[np.newaxis], self._num_rows)[0])
+
+    @property
+    def p_value(self) -> float:
+        """ADF test p-value, or NaN if the window is not full."""
+        return float(adf_p_vals(self.statistic))
+
+
+def _check_window(window: int, min_window: int):
+    if window <= min_window:
+        raise ValueError(f"Window of {window} values is too short; it must exceed {min_window}.")
+
+
+def _hurst_slopes(
+    y_hat: npt.NDArray[np.float64], taus: npt.NDArray[np.int64]
+) -> npt.NDArray[np.float64]:
+    """Fits the slopes of `log(y_hat)` against `2 log(taus)`, see
+    `hurst_exponent`, along the last dimension of `y_hat`."""
+    x = 2 * np.log(taus)
+    weights = (x - np.mean(x)) / np.sum(np.square(x - np.mean(x)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.log(y_hat) @ weights
+
+
+def _adf_rows(prices: npt.NDArray[np.float64], num_lags: int) -> npt.NDArray[np.float64]:
+    """Returns the rows `[1, x_{t - 1}, dx_{t - 1}, ..., dx_{t - num_lags}, dx_t]`
+    of the ADF regression with a constant, one for each price that has
+    `num_lags + 1` predecessors."""
+    diffs = np.diff(prices)
+    num_rows = len(diffs) - num_lags
+    if num_rows <= 0:
+        return np.zeros((0, num_lags + 3))
+
+    columns = [np.ones(num_rows), prices[num_lags:-1]]
+    columns += [diffs[num_lags - lag : len(diffs) - lag] for lag in range(1, num_lags + 1)]
+    columns.append(diffs[num_lags:])
+    return np.stack(columns, axis=1)
+
+
+def _adf_statistics(moments: npt.NDArray[np.float64], num_rows: int) -> npt.NDArray[np.float64]:
+    """Computes ADF test statistics from the moments of the rows, see
+    `_adf_rows`, stacked along the first dimension of `moments`."""
+    xtx = moments[:, :-1, :-1]
+    xty = moments[:, :-1, -1]
+    yty = moments[:, -1, -1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        try:
+            inverse = np.linalg.inv(xtx)
+        except np.linalg.LinAlgError:
+            return np.full(len(moments), np.nan)
+        coefficients = np.einsum("nij,nj->ni", inverse, xty)
+        residual_ss = yty - np.einsum("ni,ni->n", coefficients, xty)
+        variance = residual_ss / (num_rows - xtx.shape[1])
+        return coefficients[:, 1] / np.sqrt(variance * inverse[:, 1, 1])
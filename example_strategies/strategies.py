@@ -1,10 +1,12 @@
 import datetime
 import logging
-from collections import deque
+import time
 
 import backtrader as bt
 import numpy as np
 
+from example_strategies import indicators, journal
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,48 +22,91 @@ class NoStrategy(bt.Strategy):
 
 class BaseStrategy(bt.Strategy):
     """A class meant to be inherited by the actual strategy classes. Provides a
-    few useful functions"""
+    few useful functions.
+
+    Unless `next` is overridden, each data feed is traded independently by
+    `next_data`, so the same strategy can run on a portfolio of stocks."""
+
+    # Number of bars of each data feed that the strategy reads directly rather
+    # than through indicators, e.g. 3 if it reads `data[-2]`.
+    data_history = 1
 
     def __init__(self):
-        self.order = None
+        # Pending order of each data feed.
+        self.orders = [None] * len(self.datas)
         self.sum = 0.0
-        self.executed_orders = []
-        self.executed_days = []
+        # Outcomes of the orders and the closed trades, see `dump_journal`.
+        self.journal = journal.Journal()
+        # Executed orders, a view of the journal.
+        self.ledger = journal.Ledger(self.journal)
+        # Bar of the last executed order of each data feed.
+        self.last_executed_days = [None] * len(self.datas)
+        # Data feeds overload comparison operators, so they are looked up by identity.
+        self._data_idxs = {id(data): idx for idx, data in enumerate(self.datas)}
+        # Calls to `next` and the time spent in them, once `time_next` is called.
+        self.next_calls = 0
+        self.next_time = 0.0
+
+    def time_next(self):
+        """Starts counting the calls to `next` and the time spent in them, see
+        `profiling.Timing`. Strategies that are not timed have no overhead."""
+        next_ = self.next
+
+        def timed_next():
+            start = time.perf_counter()
+            next_()
+            self.next_time += time.perf_counter() - start
+            self.next_calls += 1
+
+        # Backtrader looks `next` up on the instance every bar.
+        self.next = timed_next
+
+    def qbuffer(self, savemem=0, replaying=False):
+        super().qbuffer(savemem=savemem, replaying=replaying)
+        # Data feeds saving memory only keep the bars the indicators need.
+        if savemem > 0:
+            for data in self.datas:
+                data.minbuffer(self.data_history)
 
-    @staticmethod
-    def _is_buy_str(order) -> str:
-        if order.isbuy():
-            return "buy"
-        return "sell"
+    def next(self):
+        for idx, data in enumerate(self.datas):
+            self.next_data(idx, data)
+
+    def next_data(self, idx: int, data):
+        """Decides whether to trade data feed `data` at index `idx`."""
+        pass
 
     def log(self, txt: str, dt: datetime.date = None, level: int = logging.INFO):
+        if not logger.isEnabledFor(level):
+            return
         if dt is None:
             dt = self.datas[0].datetime.date(0)
         pattern = "%s, %s"
         logger.log(level, pattern, dt, txt)
 
     def notify_order(self, order):
-        size = abs(order.size)
-        created_price = round(order.created.price, 2)
-        executed_price = round(order.executed.price, 2)
-        buy_str = self._is_buy_str(order)
-        status_name = order.getstatusname()
-
-        status_msg = f"{status_name}: {buy_str} {size} @"
-        created_msg = f"{status_msg} ${created_price}".upper()
-        executed_msg = f"{status_msg} ${executed_price}".upper()
-
+        # Messages are only formatted if they are going to be logged.
         if order.status in [order.Submitted, order.Accepted]:
-            self.log(created_msg, level=logging.DEBUG)
+            if logger.isEnabledFor(logging.DEBUG):
+                self.log(self._order_message(order, order.created.price), level=logging.DEBUG)
             return
+
+        idx = self._data_idxs[id(order.data)]
         if order.status in [order.Completed]:
-            self.log(executed_msg, level=logging.INFO)
-            self.executed_orders.append(self.order)
-            self.executed_days.append(len(self))
+            self.journal.record_order(self.datas[0].datetime[0], len(self), idx, order)
+            if logger.isEnabledFor(logging.INFO):
+                self.log(self._order_message(order, order.executed.price), level=logging.INFO)
+            self.last_executed_days[idx] = len(self)
         elif order.status in [order.Canceled, order.Margin, order.Rejected]:
-            self.log(created_msg, level=logging.WARNING)
+            self.journal.record_order(self.datas[0].datetime[0], len(self), idx, order)
+            if logger.isEnabledFor(logging.WARNING):
+                self.log(self._order_message(order, order.created.price), level=logging.WARNING)
 
-        self.order = None
+        self.orders[idx] = None
+
+    @staticmethod
+    def _order_message(order, price: float) -> str:
+        return journal.order_message(order.getstatusname(), order.isbuy(), abs(order.size), price)
 
     def notify_trade(self, trade):
         """Adapted from <https://community.backtrader.com/topic/1802/problem-with-multiple-stocks>."""
@@ -69,32 +114,50 @@ class BaseStrategy(bt.Strategy):
             return
 
         self.sum += trade.pnlcomm
-
-        self.log(
-            f"OPERATION PROFIT, GROSS {trade.pnl:.2f}, NET {trade.pnlcomm:.2f}, SUM {self.sum:.2f}"
+        self.journal.record_trade(
+            self.datas[0].datetime[0], len(self), self._data_idxs[id(trade.data)], trade
         )
 
+        if logger.isEnabledFor(logging.INFO):
+            self.log(journal.trade_message(trade.pnl, trade.pnlcomm, self.sum))
+
+    def dump_journal(self, level: int = None):
+        """Logs the messages about the orders and the trades in the journal.
+
+        Args:
+            level: Level to log all the messages at. By default, each message
+                is logged at the level it would have been logged at during the
+                backtest.
+        """
+        for message_level, dt, txt in self.journal.messages():
+            self.log(
+                txt, dt=bt.num2date(dt).date(), level=message_level if level is None else level
+            )
+
 
 class NaiveStrategy(BaseStrategy):
     """Adapted from <https://www.backtrader.com/docu/quickstart/quickstart>."""
 
+    data_history = 3
+
     def __init__(self):
         BaseStrategy.__init__(self)
 
-    def next(self):
-        # Check if order is pending.
-        if self.order:
+    def next_data(self, idx: int, data):
+        # Check if order is pending, or if there are not enough bars yet; the
+        # first bars would otherwise be compared with the last ones.
+        if self.orders[idx] or len(data) < self.data_history:
             return
 
         # Check if we are in the market
-        if not self.position:
+        if not self.getposition(data):
             # Check if closes are decreasing two days in a row.
-            if self.data[0] < self.data[-1] and self.data[-1] < self.data[-2]:
-                self.order = self.buy()
+            if data[0] < data[-1] and data[-1] < data[-2]:
+                self.orders[idx] = self.buy(data=data)
         else:
             # Sell after 5 days.
-            if len(self) >= self.executed_days[-1] + 5:
-                self.order = self.sell()
+            if len(self) >= self.last_executed_days[idx] + 5:
+                self.orders[idx] = self.sell(data=data)
 
 
 class MeanRevertingStrategy(BaseStrategy):
@@ -110,29 +173,29 @@ class MeanRevertingStrategy(BaseStrategy):
 
     def __init__(self):
         BaseStrategy.__init__(self)
+        # `next` is only called once there is enough history for moving average.
+        self.rolling = [
+            indicators.RollingMeanStd(data, period=self.params.k, ddof=1) for data in self.datas
+        ]
 
-    def next(self):
-        if self.order:
+    def next_data(self, idx: int, data):
+        if self.orders[idx]:
             return
 
-        # Not enough history for moving average.
-        if len(self) < self.params.k:
-            return
-
-        data = np.array(self.data.get(size=self.params.k))
-        std = np.std(data, ddof=1)
-        mean = np.mean(data)
-        current_price = data[-1]
-        deviation = np.abs(current_price - mean)
+        std = self.rolling[idx].std[0]
+        mean = self.rolling[idx].mean[0]
+        current_price = data[0]
+        deviation = abs(current_price - mean)
 
         if deviation < self.params.num_std * std:
             return
 
-        if current_price < mean and not self.position:
-            self.order = self.buy()
+        position = self.getposition(data)
+        if current_price < mean and not position:
+            self.orders[idx] = self.buy(data=data)
 
-        if current_price > mean and self.position:
-            self.order = self.sell()
+        if current_price > mean and position:
+            self.orders[idx] = self.sell(data=data)
 
 
 class MACrossoverStrategy(BaseStrategy):
@@ -146,17 +209,18 @@ class MACrossoverStrategy(BaseStrategy):
 
     def __init__(self):
         BaseStrategy.__init__(self)
-        ma_fast = bt.ind.SMA(period=self.params.fast_length)
-        ma_slow = bt.ind.SMA(period=self.params.slow_length)
-
-        self.crossover = bt.ind.CrossOver(ma_fast, ma_slow)
+        self.crossovers = []
+        for data in self.datas:
+            ma_fast = bt.ind.SMA(data, period=self.params.fast_length)
+            ma_slow = bt.ind.SMA(data, period=self.params.slow_length)
+            self.crossovers.append(bt.ind.CrossOver(ma_fast, ma_slow))
 
-    def next(self):
-        if not self.position:
-            if self.crossover > 0:
-                self.buy()
-        elif self.crossover < 0:
-            self.sell()
+    def next_data(self, idx: int, data):
+        if not self.getposition(data):
+            if self.crossovers[idx] > 0:
+                self.buy(data=data)
+        elif self.crossovers[idx] < 0:
+            self.sell(data=data)
 
 
 class CointegrationBollingerBandsStrategy(BaseStrategy):
@@ -164,8 +228,13 @@ class CointegrationBollingerBandsStrategy(BaseStrategy):
     and sell cointegrated stocks.
 
     Adapted from "Advanced Algorithmic Trading" by Michael L. Halls-Moore.
+
+    The z-score of the portfolio value is computed relative to the mean and
+    the standard deviation of its last `lookback` values.
     """
 
+    data_history = 2
+
     params = (
         ("lookback", 15),
         ("qty", 10000),
@@ -178,7 +247,11 @@ class CointegrationBollingerBandsStrategy(BaseStrategy):
         BaseStrategy.__init__(self)
 
         self.invested: str = None
-        self.portfolio_value = deque(maxlen=self.params.lookback)
+        self.zscore = float("nan")
+        self.weights = np.asarray(self.params.weights, dtype=float)
+        # Preallocated so that no arrays are created every bar.
+        self.prices = np.zeros(len(self.weights))
+        self.portfolio_value = indicators.RollingStats(self.params.lookback)
 
     def long(self):
         for weight, data in zip(self.params.weights, self.datas):
@@ -197,12 +270,13 @@ class CointegrationBollingerBandsStrategy(BaseStrategy):
                 self.sell(data=data, size=amount)
 
     def next(self):
-        self.portfolio_value.append(np.dot([data[-1] for data in self.datas], self.params.weights))
-        if len(self.portfolio_value) < self.params.lookback:
+        for idx, data in enumerate(self.datas[: len(self.weights)]):
+            self.prices[idx] = data[-1]
+        portfolio_value = float(np.dot(self.prices, self.weights))
+        self.portfolio_value.push(portfolio_value)
+        if not self.portfolio_value.is_full:
             return
-        zscore = (self.portfolio_value[-1] - np.mean(self.portfolio_value[0])) / np.std(
-            self.portfolio_value
-        )
+        self.zscore = zscore = self.portfolio_value.zscore(portfolio_value)
 
         if self.invested is None:
             if zscore < -self.params.z_entry:
@@ -1,12 +1,65 @@
+from typing import Union
+
 import backtrader as bt
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+
+
+class PortfolioPercentSizer(bt.Sizer):
+    """Invests a percentage of an equal share of the portfolio in each stock.
+
+    When there is no position in a stock, buys for `percents` of the smaller of
+    the available cash and the portfolio value divided by the number of data
+    feeds. Otherwise, closes the position.
+
+    percents (float): Percentage of the share to invest.
+    """
+
+    params = (("percents", 90),)
 
+    def _getsizing(self, comminfo, cash, data, isbuy):
+        position = self.broker.getposition(data)
+        if position:
+            return position.size
 
-def get_cerebro(strategy: bt.Strategy, ticker_data, value, params, percent_size=90):
+        share = min(cash, self.broker.getvalue() / len(self.strategy.datas))
+        return share / data.close[0] * (self.params.percents / 100)
+
+
+def get_cerebro(
+    strategy: bt.Strategy,
+    ticker_data: Union[pd.DataFrame, dict[str, pd.DataFrame]],
+    value,
+    params,
+    percent_size=90,
+):
+    """Creates a backtest of `strategy`.
+
+    If `ticker_data` maps tickers to their financial data, all of them are
+    added as separate data feeds sharing the same broker, and `percent_size`
+    applies to an equal share of the portfolio, see `PortfolioPercentSizer`.
+    """
     cerebro = bt.Cerebro()
     cerebro.addstrategy(strategy, **params)
-    data = bt.feeds.PandasData(dataname=ticker_data)
-    cerebro.adddata(data)
     cerebro.broker.setcash(value)
-    cerebro.addsizer(bt.sizers.PercentSizer, percents=percent_size)
+    if isinstance(ticker_data, pd.DataFrame):
+        data = bt.feeds.PandasData(dataname=ticker_data)
+        cerebro.adddata(data)
+        cerebro.addsizer(bt.sizers.PercentSizer, percents=percent_size)
+    else:
+        for ticker, financial_data in ticker_data.items():
+            data = bt.feeds.PandasData(dataname=financial_data)
+            cerebro.adddata(data, name=ticker)
+        cerebro.addsizer(PortfolioPercentSizer, percents=percent_size)
 
     return cerebro
+
+
+def num2datetimeindex(dates: npt.ArrayLike) -> pd.DatetimeIndex:
+    """Converts backtrader's date numbers to dates, like `bt.num2date` but for
+    many dates at once."""
+    # Backtrader represents dates as the number of days since the start of
+    # the proleptic Gregorian calendar, in which 1970-01-01 is day 719163.
+    days = np.asarray(dates, dtype=np.float64) - 719163.0
+    return pd.DatetimeIndex(np.round(days * 86400e6).astype("datetime64[us]"))
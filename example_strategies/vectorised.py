@@ -0,0 +1,416 @@
+import dataclasses
+from typing import Any, Callable, Optional
+
+import backtrader as bt
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+
+from example_strategies import metrics, strategies
+
+
+@dataclasses.dataclass
+class Backtest:
+    """Result of a vectorised backtest.
+
+    Attributes:
+        index: Dates of the bars.
+        value: Portfolio value at the close of each bar.
+        position: Number of shares held at the close of each bar.
+        entries: Bars at whose open each position was opened.
+        exits: Bars at whose open each position was closed, or `-1` if it is
+            still open at the end.
+        cash: Starting cash.
+    """
+
+    index: pd.DatetimeIndex
+    value: npt.NDArray[np.float64]
+    position: npt.NDArray[np.float64]
+    entries: npt.NDArray[np.int64]
+    exits: npt.NDArray[np.int64]
+    cash: float
+
+    def sharpe_ratio(self, timeframe=bt.TimeFrame.Years) -> float:
+        """Sharpe ratio, as computed by `bt.analyzers.SharpeRatio`."""
+        return metrics.sharpe_ratio(self.value, self.index, self.cash, timeframe)
+
+    def total_return(self) -> float:
+        """Total compound return, as computed by `bt.analyzers.Returns`."""
+        return metrics.total_return(self.value, self.cash)
+
+    def max_drawdown(self) -> float:
+        """Maximum drawdown as a fraction, see `metrics.max_drawdown`."""
+        return metrics.max_drawdown(self.value)
+
+
+def backtest(
+    strategy: bt.Strategy,
+    financial_data: pd.DataFrame,
+    params: dict[str, Any] = None,
+    cash: float = 1_000_000.00,
+    percent_size: float = 90,
+) -> Backtest:
+    """Backtests one of the built-in strategies using array operations.
+
+    The results match running the strategy in a Cerebro created by
+    `utils.get_cerebro`: market orders are executed at the next bar's opening
+    price and each position is opened using `percent_size` percent of the
+    available cash.
+
+    Args:
+        strategy: Strategy to backtest. Should be one of
+            `strategies.NaiveStrategy`, `strategies.MeanRevertingStrategy`
+            and `strategies.MACrossoverStrategy`.
+        financial_data: Financial data, e.g. returned by `data.load`.
+        params: Parameters of the strategy. Unspecified ones take the
+            strategy's default values.
+        cash: Starting cash.
+        percent_size: Percentage of the cash to invest in each position.
+
+    Returns:
+        Backtest result.
+    """
+    return backtest_grid(strategy, financial_data, [params or {}], cash, percent_size)[0]
+
+
+def backtest_grid(
+    strategy: bt.Strategy,
+    financial_data: pd.DataFrame,
+    params_list: list[dict[str, Any]],
+    cash: float = 1_000_000.00,
+    percent_size: float = 90,
+) -> list[Backtest]:
+    """Backtests a strategy with each of the given parameters.
+
+    Indicators, such as moving averages, are computed once for each distinct
+    window length and shared by all the parameter combinations using them.
+
+    Args:
+        strategy: Strategy to backtest, see `backtest`.
+        financial_data: Financial data, e.g. returned by `data.load`.
+        params_list: Parameters of each backtest.
+        cash: Starting cash.
+        percent_size: Percentage of the cash to invest in each position.
+
+    Returns:
+        Backtest results in the same order as `params_list`.
+    """
+    signals = _get_signals(strategy)
+    open_ = financial_data["Open"].to_numpy(dtype=np.float64)
+    close = financial_data["Close"].to_numpy(dtype=np.float64)
+    indicators = _Indicators(close)
+
+    results = []
+    for params in params_list:
+        all_params = dict(strategy.params._getitems())
+        all_params.update(params)
+        entry_signals, exit_signals, holding_period = signals(indicators, **all_params)
+        entries, exits, sizes = _trade(
+            entry_signals, exit_signals, holding_period, open_, close, cash, percent_size / 100
+        )
+        value, position = _value(open_, close, entries, exits, sizes, cash)
+        results.append(Backtest(financial_data.index, value, position, entries, exits, cash))
+
+    return results
+
+
+def grid_metrics(
+    strategy: bt.Strategy,
+    financial_data: pd.DataFrame,
+    params_list: list[dict[str, Any]],
+    metric: str = "sharpe",
+    timeframe=bt.TimeFrame.Years,
+    cash: float = 1_000_000.00,
+    percent_size: float = 90,
+) -> npt.NDArray[np.float64]:
+    """Backtests a strategy with each of the given parameters and computes the
+    metric of all of them at once.
+
+    Args:
+        strategy: Strategy to backtest, see `backtest`.
+        financial_data: Financial data, e.g. returned by `data.load`.
+        params_list: Parameters of each backtest.
+        metric: Should be one of `metrics.METRICS`.
+        timeframe: Timeframe on which to calculate the metric.
+        cash: Starting cash.
+        percent_size: Percentage of the cash to invest in each position.
+
+    Returns:
+        Metric value of each backtest in the same order as `params_list`.
+    """
+    results = backtest_grid(strategy, financial_data, params_list, cash, percent_size)
+    value = np.stack([result.value for result in results])
+
+    return metrics.evaluate(metric, value, financial_data.index, cash, timeframe)
+
+
+def window_metrics(
+    strategy: bt.Strategy,
+    financial_data: pd.DataFrame,
+    params_list: list[dict[str, Any]],
+    windows: list[tuple[int, int]],
+    metric: str = "sharpe",
+    timeframe=bt.TimeFrame.Years,
+    cash: float = 1_000_000.00,
+    percent_size: float = 90,
+) -> npt.NDArray[np.float64]:
+    """Backtests a strategy with each of the given parameters separately in
+    each window of the financial data.
+
+    The indicators are computed once on the whole history, so at the start of
+    a window they are already warmed up by the preceding bars, as if the
+    strategy had been running without trading. Every window starts with
+    `cash` and no position.
+
+    Args:
+        strategy: Strategy to backtest, see `backtest`.
+        financial_data: Financial data, e.g. returned by `data.load`.
+        params_list: Parameters of each backtest.
+        windows: Start (inclusive) and end (exclusive) bar of each window.
+        metric: Should be one of `metrics.METRICS`.
+        timeframe: Timeframe on which to calculate the metric.
+        cash: Starting cash.
+        percent_size: Percentage of the cash to invest in each position.
+
+    Returns:
+        Metric values of shape `(len(params_list), len(windows))`, NaN for
+        windows without bars.
+    """
+    if metric not in metrics.METRICS:
+        raise ValueError(f'Metric "{metric}" is not recognised.')
+    signals = _get_signals(strategy)
+
+    open_ = financial_data["Open"].to_numpy(dtype=np.float64)
+    close = financial_data["Close"].to_numpy(dtype=np.float64)
+    indicators = _Indicators(close)
+
+    values = [[] for _ in windows]
+    for params in params_list:
+        all_params = dict(strategy.params._getitems())
+        all_params.update(params)
+        entry_signals, exit_signals, holding_period = signals(indicators, **all_params)
+        for window_values, (start, end) in zip(values, windows):
+            if end <= start:
+                continue
+            entries, exits, sizes = _trade(
+                entry_signals[start:end],
+                exit_signals[start:end] if exit_signals is not None else None,
+                holding_period,
+                open_[start:end],
+                close[start:end],
+                cash,
+                percent_size / 100,
+            )
+            value, _ = _value(open_[start:end], close[start:end], entries, exits, sizes, cash)
+            window_values.append(value)
+
+    metric_values = np.full((len(params_list), len(windows)), np.nan)
+    for window_idx, (window_values, (start, end)) in enumerate(zip(values, windows)):
+        if end <= start:
+            continue
+        metric_values[:, window_idx] = metrics.evaluate(
+            metric, np.stack(window_values), financial_data.index[start:end], cash, timeframe
+        )
+
+    return metric_values
+
+
+def _get_signals(strategy: bt.Strategy) -> Callable:
+    try:
+        return _SIGNALS[strategy]
+    except KeyError:
+        raise ValueError(
+            f'Strategy "{strategy.__name__}" is not supported by the vectorised engine.'
+        ) from None
+
+
+class _Indicators:
+    """Indicators of a price series, computed on first use so that backtests
+    with different parameters can share them."""
+
+    def __init__(self, close: npt.NDArray[np.float64]):
+        self.close = close
+        self._cache = {}
+
+    def rolling_mean(self, period: int) -> npt.NDArray[np.float64]:
+        key = ("mean", period)
+        if key not in self._cache:
+            self._cache[key] = _rolling_mean(self.close, period)
+        return self._cache[key]
+
+    def rolling_mean_std(
+        self, period: int, ddof: int = 0
+    ) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+        key = ("mean_std", period, ddof)
+        if key not in self._cache:
+            self._cache[key] = _rolling_mean_std(self.close, period, ddof)
+        return self._cache[key]
+
+
+def _naive_signals(indicators: _Indicators):
+    close = indicators.close
+    entry_signals = np.zeros(len(close), dtype=bool)
+    # The strategy waits for the closes of the two previous bars.
+    entry_signals[2:] = (close[2:] < close[1:-1]) & (close[1:-1] < close[:-2])
+
+    return entry_signals, None, 5
+
+
+def _mean_reverting_signals(indicators: _Indicators, k: int, num_std: float):
+    close = indicators.close
+    entry_signals = np.zeros(len(close), dtype=bool)
+    exit_signals = np.zeros(len(close), dtype=bool)
+    if len(close) < k:
+        return entry_signals, exit_signals, None
+
+    mean, std = indicators.rolling_mean_std(k, ddof=1)
+    current_price = close[k - 1 :]
+    deviation = np.abs(current_price - mean)
+    is_extreme = ~(deviation < num_std * std)
+    entry_signals[k - 1 :] = is_extreme & (current_price < mean)
+    exit_signals[k - 1 :] = is_extreme & (current_price > mean)
+
+    return entry_signals, exit_signals, None
+
+
+def _ma_crossover_signals(indicators: _Indicators, fast_length: int, slow_length: int):
+    close = indicators.close
+    entry_signals = np.zeros(len(close), dtype=bool)
+    exit_signals = np.zeros(len(close), dtype=bool)
+    # The crossover needs the moving averages of the previous bar too.
+    start = max(fast_length, slow_length)
+    if len(close) <= start:
+        return entry_signals, exit_signals, None
+
+    ma_fast = indicators.rolling_mean(fast_length)[start - fast_length :]
+    ma_slow = indicators.rolling_mean(slow_length)[start - slow_length :]
+    crossover = _crossover(ma_fast, ma_slow)
+    entry_signals[start:] = crossover > 0
+    exit_signals[start:] = crossover < 0
+
+    return entry_signals, exit_signals, None
+
+
+_SIGNALS: dict[type, Callable] = {
+    strategies.NaiveStrategy: _naive_signals,
+    strategies.MeanRevertingStrategy: _mean_reverting_signals,
+    strategies.MACrossoverStrategy: _ma_crossover_signals,
+}
+
+
+def _rolling_mean(x: npt.NDArray[np.float64], period: int) -> npt.NDArray[np.float64]:
+    """Means of every `period` consecutive elements."""
+    return np.lib.stride_tricks.sliding_window_view(x, period).mean(axis=-1)
+
+
+def _rolling_mean_std(
+    x: npt.NDArray[np.float64], period: int, ddof: int = 0, chunk_size: int = 2**20
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """Means and standard deviations of every `period` consecutive elements.
+
+    The windows are processed in chunks of about `chunk_size` elements to
+    bound the memory used for the deviations from the mean.
+    """
+    windows = np.lib.stride_tricks.sliding_window_view(x, period)
+    mean = np.empty(len(windows))
+    std = np.empty(len(windows))
+    step = max(1, chunk_size // period)
+    for start in range(0, len(windows), step):
+        chunk = windows[start : start + step]
+        mean[start : start + step] = chunk.mean(axis=-1)
+        std[start : start + step] = chunk.std(axis=-1, ddof=ddof)
+
+    return mean, std
+
+
+def _crossover(x: npt.NDArray[np.float64], y: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    """Replicates `bt.ind.CrossOver` of `x` and `y`, excluding the first bar
+    for which the indicator is not defined.
+
+    Returns:
+        `1` when `x` crosses `y` upwards, `-1` when downwards, otherwise `0`.
+    """
+    diff = x - y
+    # Last non-zero difference.
+    nonzero_idx = np.where(diff != 0.0, np.arange(len(diff)), 0)
+    nonzero_diff = diff[np.maximum.accumulate(nonzero_idx)]
+
+    upcross = (nonzero_diff[:-1] < 0.0) & (x[1:] > y[1:])
+    downcross = (nonzero_diff[:-1] > 0.0) & (x[1:] < y[1:])
+
+    return upcross.astype(np.float64) - downcross.astype(np.float64)
+
+
+def _trade(
+    entry_signals: npt.NDArray[np.bool_],
+    exit_signals: Optional[npt.NDArray[np.bool_]],
+    holding_period: Optional[int],
+    open_: npt.NDArray[np.float64],
+    close: npt.NDArray[np.float64],
+    cash: float,
+    fraction: float,
+) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.int64], npt.NDArray[np.float64]]:
+    """Opens a position at the bar following an entry signal while not
+    invested, and closes it at the bar following an exit signal or after
+    `holding_period` bars.
+
+    Only the bars with signals are visited, so the cost depends on the number
+    of signals rather than the number of bars.
+    """
+    num_bars = len(close)
+    entry_idxs = np.flatnonzero(entry_signals)
+    exit_idxs = np.flatnonzero(exit_signals) if exit_signals is not None else None
+    entries, exits, sizes = [], [], []
+
+    bar = 0
+    while True:
+        idx = np.searchsorted(entry_idxs, bar)
+        if idx == len(entry_idxs) or entry_idxs[idx] + 1 >= num_bars:
+            break
+        signal_bar = entry_idxs[idx]
+        entry = signal_bar + 1
+        size = cash * fraction / close[signal_bar]
+
+        if holding_period is not None:
+            exit_signal_bar = entry + holding_period
+        else:
+            idx = np.searchsorted(exit_idxs, entry)
+            exit_signal_bar = exit_idxs[idx] if idx < len(exit_idxs) else num_bars
+
+        entries.append(entry)
+        sizes.append(size)
+        if exit_signal_bar + 1 >= num_bars:
+            exits.append(-1)
+            break
+        exit_ = exit_signal_bar + 1
+        exits.append(exit_)
+        # Cash after closing the position, which determines the next one's size.
+        cash += size * (open_[exit_] - open_[entry])
+        bar = exit_
+
+    return np.array(entries, dtype=np.int64), np.array(exits, dtype=np.int64), np.array(sizes)
+
+
+def _value(
+    open_: npt.NDArray[np.float64],
+    close: npt.NDArray[np.float64],
+    entries: npt.NDArray[np.int64],
+    exits: npt.NDArray[np.int64],
+    sizes: npt.NDArray[np.float64],
+    cash: float,
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """Computes portfolio value and position at the close of each bar."""
+    num_bars = len(close)
+    closed = exits >= 0
+    cash_flow = np.zeros(num_bars)
+    position_change = np.zeros(num_bars)
+
+    np.add.at(cash_flow, entries, -sizes * open_[entries])
+    np.add.at(position_change, entries, sizes)
+    np.add.at(cash_flow, exits[closed], sizes[closed] * open_[exits[closed]])
+    np.add.at(position_change, exits[closed], -sizes[closed])
+
+    position = np.cumsum(position_change)
+    value = cash + np.cumsum(cash_flow) + position * close
+
+    return value, position
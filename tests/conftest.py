@@ -0,0 +1,9 @@
+import pytest
+from example_strategies import data
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Caches financial data in a temporary directory instead of `.data`."""
+    monkeypatch.setattr(data, "_data_dir_path", lambda: str(tmp_path))
+    return tmp_path
@@ -0,0 +1,45 @@
+"""Strategies shared by several test modules."""
+
+import numpy as np
+from example_strategies import strategies
+
+
+class CointegrationRecorder(strategies.CointegrationBollingerBandsStrategy):
+    """Records the z-score of every bar."""
+
+    def __init__(self):
+        strategies.CointegrationBollingerBandsStrategy.__init__(self)
+        self.zscores = []
+
+    def next(self):
+        strategies.CointegrationBollingerBandsStrategy.next(self)
+        self.zscores.append(self.zscore)
+
+
+class WindowMeanRevertingStrategy(strategies.BaseStrategy):
+    """`MeanRevertingStrategy` recomputing the statistics from the whole
+    window every bar, without any indicators."""
+
+    params = (("k", 50), ("num_std", 1.0))
+
+    def next(self):
+        if self.orders[0]:
+            return
+
+        if len(self) < self.params.k:
+            return
+
+        window = np.array(self.data.get(size=self.params.k))
+        std = np.std(window, ddof=1)
+        mean = np.mean(window)
+        current_price = window[-1]
+        deviation = np.abs(current_price - mean)
+
+        if deviation < self.params.num_std * std:
+            return
+
+        if current_price < mean and not self.position:
+            self.orders[0] = self.buy()
+
+        if current_price > mean and self.position:
+            self.orders[0] = self.sell()
@@ -1,10 +1,29 @@
 import datetime
+import os
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
 import pytest
 from example_strategies import data
 
 
+def _financial_data(num_days: int = 10) -> pd.DataFrame:
+    index = pd.date_range("2000-01-03", periods=num_days, freq="B", name="Date")
+    close = np.linspace(50.0, 60.0, num_days)
+    return pd.DataFrame(
+        {
+            "Open": close - 0.5,
+            "High": close + 1.0,
+            "Low": close - 1.0,
+            "Close": close,
+            "Adj Close": close,
+            "Volume": np.arange(num_days) * 1000,
+        },
+        index=index,
+    )
+
+
 def test_ticker_data_path():
     path = data.ticker_data_path("MSFT")
     parts = Path(path).parts
@@ -12,14 +31,22 @@ def test_ticker_data_path():
     assert parts[-2] == ".data"
     assert parts[-1][:6] == "MSFT__"
     # Attempt to convert to date
-    datetime.datetime.strptime(parts[-1][6:-4], "%Y-%m-%d").date()
-    assert parts[-1][-4:] == ".csv"
+    datetime.datetime.strptime(parts[-1][6:-5], "%Y-%m-%d").date()
+    assert parts[-1][-5:] == ".cols"
 
 
 def test_ticker_data_path_pattern():
     path = data.ticker_data_path_pattern("MSFT")
     parts = Path(path).parts
 
+    assert parts[-2] == ".data"
+    assert parts[-1] == "MSFT__*.cols"
+
+
+def test_legacy_ticker_data_path_pattern():
+    path = data.legacy_ticker_data_path_pattern("MSFT")
+    parts = Path(path).parts
+
     assert parts[-2] == ".data"
     assert parts[-1] == "MSFT__*.csv"
 
@@ -32,6 +59,38 @@ def test_ticker_data_path_metadata():
     assert date == datetime.date(2020, 1, 1)
 
 
+def test_write_read_columns(tmp_path):
+    financial_data = _financial_data()
+    path = os.path.join(tmp_path, "MSFT__2020-01-01.cols")
+    data._write_columns(financial_data, path)
+    read_data = data._read_columns(path)
+
+    assert list(read_data.columns) == list(financial_data.columns)
+    assert read_data.index.equals(financial_data.index)
+    np.testing.assert_array_equal(read_data.to_numpy(), financial_data.to_numpy(dtype=float))
+
+
+def test_write_columns_out_of_bounds(tmp_path):
+    index = pd.Index(["2262-04-08", "2262-04-09", "2262-04-12"], name="Date")
+    financial_data = pd.DataFrame({"Close": [1.0, 2.0, 3.0]}, index=index)
+
+    with pytest.raises(pd.errors.OutOfBoundsDatetime):
+        data._write_columns(financial_data, os.path.join(tmp_path, "MSFT__2020-01-01.cols"))
+    assert os.listdir(tmp_path) == []
+
+
+def test_migrate_csv_cache(data_dir):
+    financial_data = _financial_data()
+    financial_data.to_csv(os.path.join(data_dir, f"MSFT__{datetime.date.today()}.csv"))
+    financial_data.to_csv(os.path.join(data_dir, "AAPL__2020-01-01.csv"))
+
+    migrated_paths = data.migrate_csv_cache()
+
+    assert migrated_paths == [data.ticker_data_path("MSFT")]
+    assert os.listdir(data_dir) == [os.path.basename(data.ticker_data_path("MSFT"))]
+    np.testing.assert_allclose(data.load("MSFT")["Close"], financial_data["Close"])
+
+
 load_testdata = [
     (
         "MSFT",
@@ -94,3 +153,181 @@ def test_load(ticker, from_date, to_date, test_date, close_price):
     else:
         with pytest.raises(KeyError):
             financial_data.loc[test_date_str]["Close"]
+
+
+def test_load_mmap(data_dir):
+    financial_data = _financial_data()
+    data._write_columns(financial_data, data.ticker_data_path("MSFT"))
+
+    mapped_data = data.load(
+        "MSFT", datetime.date(2000, 1, 4), datetime.date(2000, 1, 10), mmap=True
+    )
+    close = mapped_data["Close"].to_numpy()
+
+    assert list(mapped_data.index) == list(financial_data.index[1:6])
+    np.testing.assert_array_equal(close, financial_data["Close"].iloc[1:6])
+    base = close
+    while base is not None and not isinstance(base, np.memmap):
+        base = base.base
+    assert isinstance(base, np.memmap)
+    assert not close.flags.writeable
+
+
+def test_load_columns(data_dir):
+    financial_data = _financial_data()
+    data._write_columns(financial_data, data.ticker_data_path("MSFT"))
+
+    arrays = data.load_columns("MSFT", from_date=datetime.date(2000, 1, 5))
+
+    assert set(arrays) == {"Date", *financial_data.columns}
+    assert isinstance(arrays["Close"], np.memmap)
+    assert not arrays["Close"].flags.writeable
+    assert arrays["Close"].flags.c_contiguous
+    np.testing.assert_array_equal(arrays["Date"], financial_data.index[2:])
+    np.testing.assert_array_equal(arrays["Close"], financial_data["Close"].iloc[2:])
+
+
+class FakeProvider:
+    def __init__(self, financial_data: pd.DataFrame):
+        self.financial_data = financial_data
+        self.starts = []
+
+    def __call__(self, ticker: str, start: datetime.date = None) -> pd.DataFrame:
+        self.starts.append(start)
+        if start is None:
+            return self.financial_data
+        return self.financial_data[self.financial_data.index >= pd.to_datetime(start)]
+
+
+@pytest.mark.parametrize(
+    "incremental,expected_start", [(True, datetime.date(2000, 1, 5)), (False, None)]
+)
+def test_load_refresh(data_dir, monkeypatch, incremental, expected_start):
+    financial_data = _financial_data()
+    provider = FakeProvider(financial_data)
+    monkeypatch.setitem(data._PROVIDERS, "fake", provider)
+    stale_path = os.path.join(data_dir, "fake", "MSFT__2020-01-01.cols")
+    # Last cached day is 2000-01-11.
+    data._write_columns(financial_data.iloc[:7], stale_path)
+
+    loaded_data = data.load("MSFT", source="fake", incremental=incremental)
+
+    assert provider.starts == [expected_start]
+    assert loaded_data.index.equals(financial_data.index)
+    np.testing.assert_array_equal(loaded_data["Close"], financial_data["Close"])
+    assert os.listdir(os.path.join(data_dir, "fake")) == [
+        os.path.basename(data.ticker_data_path("MSFT", "fake"))
+    ]
+
+    # Today's data is now cached.
+    data.load("MSFT", source="fake")
+    assert len(provider.starts) == 1
+
+
+@pytest.mark.parametrize("change", ["adjusted", "columns"])
+def test_load_refresh_changed(data_dir, monkeypatch, change):
+    financial_data = _financial_data()
+    stale_path = os.path.join(data_dir, "fake", "MSFT__2020-01-01.cols")
+    data._write_columns(financial_data.iloc[:7], stale_path)
+    if change == "adjusted":
+        # E.g. a 2:1 split after the data was cached.
+        financial_data = financial_data.copy()
+        financial_data[["Open", "High", "Low", "Close", "Adj Close"]] /= 2.0
+    else:
+        financial_data = financial_data.drop(columns="Adj Close")
+    provider = FakeProvider(financial_data)
+    monkeypatch.setitem(data._PROVIDERS, "fake", provider)
+
+    loaded_data = data.load("MSFT", source="fake")
+
+    # The whole history is fetched again.
+    assert provider.starts == [datetime.date(2000, 1, 5), None]
+    assert list(loaded_data.columns) == list(financial_data.columns)
+    np.testing.assert_array_equal(loaded_data, financial_data)
+
+
+def test_load_unknown_source():
+    with pytest.raises(ValueError):
+        data.load("MSFT", source="unknown")
+
+
+@pytest.mark.parametrize("file_format", ["csv", "cols"])
+def test_local_provider(tmp_path, file_format):
+    financial_data = _financial_data()
+    path = os.path.join(tmp_path, f"MSFT.{file_format}")
+    if file_format == "csv":
+        financial_data.to_csv(path)
+    else:
+        data._write_columns(financial_data, path)
+    provider = data.LocalProvider(str(tmp_path))
+
+    provided_data = provider("msft", datetime.date(2000, 1, 5))
+
+    assert provided_data.index.equals(financial_data.index[2:])
+    np.testing.assert_allclose(provided_data["Close"], financial_data["Close"].iloc[2:])
+    with pytest.raises(FileNotFoundError):
+        provider("AAPL")
+
+
+@pytest.mark.parametrize("model", ["gbm", "ou"])
+def test_synthetic_provider(model):
+    provider = data.SyntheticProvider(model, from_date=datetime.date(2000, 1, 1))
+
+    msft = provider("MSFT")
+    msft_recent = provider("MSFT", datetime.date(2010, 1, 1))
+    aapl = provider("AAPL")
+
+    assert msft.index[0] == pd.Timestamp(2000, 1, 3)
+    assert msft.index.is_monotonic_increasing
+    assert (msft["Low"] <= msft[["Open", "Close"]].min(axis=1)).all()
+    assert (msft["High"] >= msft[["Open", "Close"]].max(axis=1)).all()
+    assert msft_recent.equals(msft[msft.index >= pd.Timestamp(2010, 1, 1)])
+    assert not np.allclose(msft["Close"], aapl["Close"])
+
+
+def test_load_many(data_dir, monkeypatch):
+    financial_data = _financial_data()
+    provider = FakeProvider(financial_data)
+    monkeypatch.setitem(data._PROVIDERS, "fake", provider)
+    data._write_columns(financial_data.iloc[:5], data.ticker_data_path("MSFT", "fake"))
+
+    loaded_data = data.load_many(
+        ["MSFT", "AAPL", "GOOG", "AAPL"], to_date=datetime.date(2000, 1, 12), source="fake"
+    )
+
+    # Only the tickers that were not cached are fetched.
+    assert provider.starts == [None, None]
+    assert list(loaded_data) == ["MSFT", "AAPL", "GOOG"]
+    assert len(loaded_data["MSFT"]) == 5
+    assert loaded_data["AAPL"].index.equals(financial_data.index[:8])
+
+    panel = data.load_many(["MSFT", "AAPL"], source="fake", panel=True)
+
+    assert len(provider.starts) == 2
+    assert panel.index.equals(financial_data.index)
+    np.testing.assert_array_equal(panel["AAPL"]["Close"], financial_data["Close"])
+    assert panel["MSFT"]["Close"].isna().sum() == 5
+
+
+def test_cache_info(data_dir, monkeypatch):
+    monkeypatch.setattr(data, "_FRAME_CACHE", data._FrameCache(maxsize=1))
+    financial_data = _financial_data()
+    data._write_columns(financial_data, data.ticker_data_path("MSFT"))
+    data._write_columns(financial_data, data.ticker_data_path("AAPL"))
+
+    msft = data.load("MSFT", datetime.date(2000, 1, 4), datetime.date(2000, 1, 6))
+    data.load("MSFT", datetime.date(2000, 1, 5))
+    assert data.cache_info() == data.CacheInfo(1, 1, 0, 1, 1)
+
+    data.load("AAPL")
+    data.load("MSFT")
+    assert data.cache_info() == data.CacheInfo(1, 3, 2, 1, 1)
+
+    assert list(msft.index) == list(financial_data.index[1:4])
+    with pytest.raises(ValueError):
+        msft.to_numpy()[0, 0] = 0.0
+
+    data.set_cache_size(0)
+    assert data.cache_info().currsize == 0
+    data.cache_clear()
+    assert data.cache_info() == data.CacheInfo(0, 0, 0, 0, 0)
@@ -0,0 +1,140 @@
+import backtrader as bt
+import numpy as np
+import pandas as pd
+import pytest
+from example_strategies import data, indicators, stats, strategies, utils
+
+from tests.helpers import WindowMeanRevertingStrategy
+
+
+@pytest.mark.parametrize("period", [1, 2, 10, 100])
+def test_rolling_stats(period):
+    rng = np.random.default_rng(0)
+    # Large offset makes rounding errors more likely.
+    values = 1000.0 + np.cumsum(rng.normal(size=1000))
+    stats = indicators.RollingStats(period)
+
+    for idx, value in enumerate(values):
+        stats.push(value)
+        window = values[max(0, idx - period + 1) : idx + 1]
+        assert stats.is_full == (len(window) == period)
+        assert stats.mean == pytest.approx(np.mean(window), rel=1e-12)
+        assert stats.std() == pytest.approx(np.std(window), rel=1e-6, abs=1e-9)
+        if len(window) > 1:
+            assert stats.std(ddof=1) == pytest.approx(np.std(window, ddof=1), rel=1e-6)
+        else:
+            assert np.isnan(stats.std(ddof=1))
+
+
+def test_rolling_stats_zscore():
+    stats = indicators.RollingStats(4)
+    for value in [1.0, 2.0, 3.0, 4.0]:
+        stats.push(value)
+
+    assert stats.zscore(4.0) == pytest.approx(1.5 / np.std([1.0, 2.0, 3.0, 4.0]))
+    assert stats.zscore(2.5, ddof=1) == 0.0
+
+    for _ in range(4):
+        stats.push(1.0)
+
+    assert np.isnan(stats.zscore(1.0))
+
+
+class _RollingMeanStdRecorder(bt.Strategy):
+    params = (("period", 10),)
+
+    def __init__(self):
+        self.rolling = indicators.RollingMeanStd(period=self.params.period, ddof=1)
+        self.means = []
+        self.stds = []
+
+    def next(self):
+        self.means.append(self.rolling.mean[0])
+        self.stds.append(self.rolling.std[0])
+
+
+@pytest.mark.parametrize("runonce", [True, False])
+def test_rolling_mean_std(runonce):
+    period = 10
+    financial_data = data.synthetic_financial_data(pd.bdate_range("2000-01-01", periods=500))
+    cerebro = utils.get_cerebro(_RollingMeanStdRecorder, financial_data, 1.0, {"period": period})
+
+    recorder = cerebro.run(runonce=runonce)[0]
+
+    rolling = financial_data["Close"].rolling(period)
+    np.testing.assert_allclose(recorder.means, rolling.mean()[period - 1 :], rtol=1e-12)
+    np.testing.assert_allclose(recorder.stds, rolling.std()[period - 1 :], rtol=1e-9)
+
+
+class _StationarityRecorder(bt.Strategy):
+    params = (("period", 100),)
+
+    def __init__(self):
+        self.hurst = indicators.HurstExponent(period=self.params.period, num_lags=16)
+        self.adf = indicators.ADF(period=self.params.period)
+        self.values = []
+
+    def next(self):
+        self.values.append((self.hurst.hurst[0], self.adf.statistic[0], self.adf.p_value[0]))
+
+
+@pytest.mark.parametrize("runonce", [True, False])
+def test_stationarity_indicators(runonce):
+    period = 100
+    financial_data = data.synthetic_financial_data(pd.bdate_range("2000-01-01", periods=500))
+    cerebro = utils.get_cerebro(_StationarityRecorder, financial_data, 1.0, {"period": period})
+
+    recorder = cerebro.run(runonce=runonce)[0]
+
+    close = financial_data["Close"].to_numpy()
+    expected = np.stack(
+        [
+            stats.rolling_hurst_exponent(close, period, num_lags=16),
+            stats.rolling_adf_statistic(close, period),
+            stats.rolling_adf_p_val(close, period),
+        ],
+        axis=1,
+    )[period - 1 :]
+    np.testing.assert_allclose(recorder.values, expected, rtol=1e-9)
+
+
+class _ADFRecorder(bt.Strategy):
+    def __init__(self):
+        self.adf = indicators.ADF(period=256)
+        self.statistics = []
+
+    def next(self):
+        self.statistics.append(self.adf.statistic[0])
+
+
+def test_adf_long_history():
+    # Exponential growth from about 0.04 to thousands over 11,000 bars.
+    num_days = 11_000
+    rng = np.random.default_rng(0)
+    close = 0.04 * np.exp(np.cumsum(rng.normal(np.log(2600 / 0.04) / num_days, 0.02, num_days)))
+    dates = pd.bdate_range("1980-01-01", periods=num_days, name="Date")
+    financial_data = pd.DataFrame(
+        {"Open": close, "High": close, "Low": close, "Close": close, "Volume": 0.0}, index=dates
+    )
+
+    statistics = [
+        utils.get_cerebro(_ADFRecorder, financial_data, 1.0, {}).run(runonce=runonce)[0].statistics
+        for runonce in [True, False]
+    ]
+
+    np.testing.assert_allclose(statistics[0], statistics[1], rtol=1e-9)
+
+
+@pytest.mark.parametrize("k", [3, 10, 50])
+@pytest.mark.parametrize("runonce", [True, False])
+def test_mean_reverting_strategy_equivalence(k, runonce):
+    dates = pd.bdate_range("2000-01-01", periods=1000, name="Date")
+    financial_data = data.synthetic_financial_data(dates, model="ou", seed=4)
+    order_dates = []
+    for strategy in [WindowMeanRevertingStrategy, strategies.MeanRevertingStrategy]:
+        cerebro = utils.get_cerebro(strategy, financial_data, 1_000_000.00, {"k": k})
+        cerebro.run(runonce=runonce)
+        order_dates.append([order.created.dt for order in cerebro.broker.orders])
+
+    assert len(order_dates[0]) > 10
+    assert order_dates[1] == order_dates[0]
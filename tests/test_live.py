@@ -0,0 +1,90 @@
+import backtrader as bt
+import numpy as np
+import pandas as pd
+from example_strategies import data, live, strategies, utils
+
+from tests.helpers import CointegrationRecorder
+
+
+def test_mean_reverting_strategy_streaming():
+    dates = pd.bdate_range("2000-01-01", periods=1000, name="Date")
+    financial_data = data.synthetic_financial_data(dates, model="ou", seed=4)
+    params = {"k": 20}
+    cerebro = utils.get_cerebro(strategies.MeanRevertingStrategy, financial_data, 1e6, params)
+    expected = cerebro.run(runonce=False)[0]
+
+    strategy, latency = live.run(
+        strategies.MeanRevertingStrategy, live.dataframe_bars(financial_data), 1e6, params
+    )
+
+    assert len(expected.ledger) > 10
+    np.testing.assert_array_equal(strategy.ledger.records, expected.ledger.records)
+    assert strategy.broker.getvalue() == expected.broker.getvalue()
+    # Only the window of the moving average is kept.
+    assert strategy.datas[0].close.maxlen <= params["k"]
+    assert latency.count == len(financial_data)
+    assert 0.0 < latency.p50 <= latency.p90 <= latency.p99 <= latency.max
+
+
+def test_cointegration_bollinger_bands_strategy_streaming():
+    lookback = 15
+    dates = pd.bdate_range("2000-01-01", periods=300, name="Date")
+    ticker_data = {
+        ticker: data.synthetic_financial_data(dates, model="ou", seed=seed)
+        for seed, ticker in enumerate(["A", "B"])
+    }
+    params = {"lookback": lookback, "weights": [1.0, -0.5], "qty": 100}
+    cerebro = utils.get_cerebro(CointegrationRecorder, ticker_data, 1e6, params)
+    expected = cerebro.run(runonce=False)[0]
+
+    strategy, _ = live.run(
+        CointegrationRecorder,
+        {ticker: live.dataframe_bars(df) for ticker, df in ticker_data.items()},
+        1e6,
+        params,
+    )
+
+    # In the backtest, the previous close of the first bar wraps around to the
+    # last one, which cannot be known when streaming.
+    np.testing.assert_allclose(strategy.zscores[lookback:], expected.zscores[lookback:])
+    assert all(data.close.maxlen == 2 for data in strategy.datas)
+
+
+def test_tail_csv(tmp_path):
+    path = tmp_path / "bars.csv"
+    path.write_text(
+        "datetime,open,high,low,close,volume\n"
+        "2020-01-02T09:30:00,1.0,2.0,0.5,1.5,100\n"
+        "2020-01-02T09:31:00,1.5,2.5,1.0,2.0,200\n"
+        # Incomplete lines are not read.
+        "2020-01-02T09:32:00,2.0"
+    )
+
+    bars = list(live.tail_csv(str(path), poll_interval=0.01, timeout=0.1))
+
+    assert bars == [
+        live.Bar(pd.Timestamp("2020-01-02 09:30").to_pydatetime(), 1.0, 2.0, 0.5, 1.5, 100.0),
+        live.Bar(pd.Timestamp("2020-01-02 09:31").to_pydatetime(), 1.5, 2.5, 1.0, 2.0, 200.0),
+    ]
+
+
+def test_intraday_streaming(tmp_path):
+    path = tmp_path / "bars.csv"
+    dates = pd.date_range("2020-01-02 09:30", periods=100, freq="min")
+    financial_data = data.synthetic_financial_data(dates)
+    financial_data.to_csv(path, columns=["Open", "High", "Low", "Close", "Volume"], header=False)
+
+    strategy, latency = live.run(
+        strategies.NaiveStrategy,
+        live.tail_csv(str(path), poll_interval=0.01, timeout=0.1),
+        timeframe=bt.TimeFrame.Minutes,
+    )
+    cerebro = utils.get_cerebro(strategies.NaiveStrategy, financial_data, 1e6, {})
+    expected = cerebro.run(runonce=False)[0]
+
+    assert latency.count == len(financial_data)
+    assert bt.num2date(strategy.datas[0].datetime[0]) == dates[-1]
+    # `data[-2]` is read directly, so three bars are kept.
+    assert strategy.datas[0].close.maxlen == 3
+    assert len(expected.ledger) > 0
+    np.testing.assert_array_equal(strategy.ledger.records, expected.ledger.records)
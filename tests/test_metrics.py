@@ -0,0 +1,78 @@
+import backtrader as bt
+import numpy as np
+import pandas as pd
+import pytest
+from example_strategies import data, metrics, strategies, utils
+
+
+@pytest.mark.parametrize(
+    "timeframe", [bt.TimeFrame.Days, bt.TimeFrame.Weeks, bt.TimeFrame.Months, bt.TimeFrame.Years]
+)
+def test_backtrader_parity(timeframe):
+    dates = pd.bdate_range("2000-01-01", "2004-12-31", name="Date")
+    financial_data = data.synthetic_financial_data(dates, model="ou", seed=0)
+    cash = 1_000_000.00
+    cerebro = utils.get_cerebro(strategies.MeanRevertingStrategy, financial_data, cash, {"k": 20})
+    cerebro.addanalyzer(metrics.EquityCurve, _name="equity")
+    cerebro.addanalyzer(bt.analyzers.SharpeRatio, timeframe=timeframe, _name="sharpe")
+    cerebro.addanalyzer(bt.analyzers.Returns, timeframe=timeframe, _name="returns")
+    cerebro.addanalyzer(bt.analyzers.TimeReturn, timeframe=timeframe, _name="time_return")
+    cerebro.addanalyzer(bt.analyzers.DrawDown, _name="drawdown")
+
+    analyzers = cerebro.run()[0].analyzers
+    equity = analyzers.equity.get_analysis()
+    value, index = equity["value"], equity["index"]
+
+    assert list(index) == list(dates)
+    np.testing.assert_allclose(
+        metrics.period_returns(value, index, cash, timeframe),
+        list(analyzers.time_return.get_analysis().values()),
+        atol=1e-12,
+    )
+    assert metrics.sharpe_ratio(value, index, cash, timeframe) == pytest.approx(
+        analyzers.sharpe.get_analysis()["sharperatio"]
+    )
+    returns = analyzers.returns.get_analysis()
+    assert metrics.total_return(value, cash) == pytest.approx(returns["rtot"])
+    assert metrics.annualised_return(value, index, cash, timeframe) == pytest.approx(
+        returns["rnorm"]
+    )
+    assert metrics.max_drawdown(value) == pytest.approx(
+        analyzers.drawdown.get_analysis()["max"]["drawdown"] / 100
+    )
+
+
+@pytest.mark.parametrize("metric", metrics.METRICS)
+def test_evaluate_stacked(metric):
+    index = pd.bdate_range("2000-01-01", periods=300)
+    rng = np.random.default_rng(0)
+    value = 100.0 * np.exp(np.cumsum(rng.normal(scale=0.01, size=(3, 4, len(index))), axis=-1))
+
+    metric_values = metrics.evaluate(metric, value, index, 100.0, bt.TimeFrame.Months)
+
+    assert metric_values.shape == (3, 4)
+    for idx in np.ndindex(3, 4):
+        assert metric_values[idx] == pytest.approx(
+            metrics.evaluate(metric, value[idx], index, 100.0, bt.TimeFrame.Months)
+        )
+
+
+def test_metrics():
+    index = pd.DatetimeIndex(["2000-12-29", "2001-12-31", "2002-12-31", "2003-12-31"])
+    value = np.array([100.0, 110.0, 99.0, 121.0])
+    returns = np.array([0.0, 0.1, -0.1, 121.0 / 99.0 - 1.0])
+    excess_returns = returns - 0.01
+
+    np.testing.assert_allclose(metrics.period_returns(value, index, 100.0), returns)
+    assert metrics.sortino_ratio(value, index, 100.0) == pytest.approx(
+        np.mean(excess_returns) / np.sqrt(np.mean(np.square(np.minimum(excess_returns, 0.0))))
+    )
+    assert metrics.max_drawdown(value) == pytest.approx(0.1)
+    assert metrics.annualised_return(value, index, 100.0) == pytest.approx(1.21**0.25 - 1.0)
+    assert np.isnan(metrics.sharpe_ratio(np.full(4, 100.0), index, 100.0))
+    assert metrics.turnover(
+        np.array([0.0, 1.0, 1.0, 0.0]), np.array([10.0, 20.0, 30.0, 40.0]), np.full(4, 100.0)
+    ) == pytest.approx(0.6)
+
+    with pytest.raises(ValueError):
+        metrics.evaluate("unknown", value, index, 100.0)
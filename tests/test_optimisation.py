@@ -1,8 +1,13 @@
 import datetime
+import json
+import pstats
 import random
 
 import backtrader as bt
-from example_strategies import optimisation, strategies
+import numpy as np
+import pandas as pd
+import pytest
+from example_strategies import optimisation, profiling, results, strategies
 
 
 def test_grid_search():
@@ -31,3 +36,398 @@ def test_grid_search():
     assert "num_std" in optimal_params
     assert isinstance(train_avg_sharpe, float)
     assert isinstance(test_avg_sharpe, float)
+
+
+def test_grid_search_synthetic(data_dir):
+    """Runs the optimisation on synthetic data, without network access."""
+
+    optimal_params, train_avg_sharpe, test_avg_sharpe = optimisation.grid_search(
+        strategies.MeanRevertingStrategy,
+        ["A", "B", "C"],
+        ["D"],
+        {
+            "k": [5, 20],
+            "num_std": [0.5, 1.0],
+        },
+        from_=datetime.date(2000, 1, 1),
+        to=datetime.date(2004, 12, 31),
+        source="ou",
+    )
+
+    assert optimal_params["k"] in [5, 20]
+    assert optimal_params["num_std"] in [0.5, 1.0]
+    assert isinstance(train_avg_sharpe, float)
+    assert isinstance(test_avg_sharpe, float)
+
+
+def test_grid_search_parallel(data_dir):
+    """Parallel optimisation should give exactly the same results."""
+    args = (
+        strategies.MACrossoverStrategy,
+        ["A", "B", "C"],
+        ["D", "E"],
+        {
+            "fast_length": [2, 5],
+            "slow_length": [10, 20],
+        },
+    )
+    kwargs = {
+        "from_": datetime.date(2000, 1, 1),
+        "to": datetime.date(2002, 12, 31),
+        "metric": "returns",
+        "source": "gbm",
+    }
+
+    serial_results = optimisation.grid_search(*args, **kwargs)
+    parallel_results = optimisation.grid_search(*args, **kwargs, n_jobs=2)
+
+    assert parallel_results == serial_results
+
+
+def test_grid_search_vectorised(data_dir):
+    """The vectorised engine should give the same results as backtrader."""
+    args = (
+        strategies.MeanRevertingStrategy,
+        ["A", "B", "C"],
+        ["D", "E"],
+        {
+            "k": [5, 10, 20],
+            "num_std": [0.5, 1.0],
+        },
+    )
+    kwargs = {
+        "from_": datetime.date(2000, 1, 1),
+        "to": datetime.date(2002, 12, 31),
+        "timeframe": bt.TimeFrame.Months,
+        "source": "ou",
+    }
+
+    optimal_params, train_avg_sharpe, test_avg_sharpe = optimisation.grid_search(*args, **kwargs)
+    vectorised_results = optimisation.grid_search(*args, **kwargs, engine="vectorised")
+    parallel_results = optimisation.grid_search(*args, **kwargs, engine="vectorised", n_jobs=2)
+
+    assert vectorised_results[0] == optimal_params
+    assert vectorised_results[1] == pytest.approx(train_avg_sharpe)
+    assert vectorised_results[2] == pytest.approx(test_avg_sharpe)
+    assert parallel_results == vectorised_results
+
+
+def test_grid_search_portfolio(data_dir):
+    kwargs = {
+        "from_": datetime.date(2000, 1, 1),
+        "to": datetime.date(2004, 12, 31),
+        "metric": "returns",
+        "source": "gbm",
+    }
+    params_grid = {"fast_length": [2, 5], "slow_length": [20, 50]}
+
+    optimal_params, train_returns, test_returns = optimisation.grid_search(
+        strategies.MACrossoverStrategy,
+        ["A", "B", "C"],
+        ["D"],
+        params_grid,
+        portfolio=True,
+        **kwargs,
+    )
+
+    assert optimal_params["fast_length"] in [2, 5]
+    assert optimal_params["slow_length"] in [20, 50]
+    # A single ticker traded as a portfolio is equivalent to trading it alone.
+    assert test_returns == pytest.approx(
+        optimisation.grid_search(
+            strategies.MACrossoverStrategy,
+            ["D"],
+            ["D"],
+            {param: [value] for param, value in optimal_params.items()},
+            **kwargs,
+        )[2]
+    )
+    assert (optimal_params, train_returns, test_returns) == optimisation.grid_search(
+        strategies.MACrossoverStrategy,
+        ["A", "B", "C"],
+        ["D"],
+        params_grid,
+        portfolio=True,
+        n_jobs=2,
+        **kwargs,
+    )
+
+    with pytest.raises(ValueError):
+        optimisation.grid_search(
+            strategies.MACrossoverStrategy,
+            ["A"],
+            ["D"],
+            params_grid,
+            portfolio=True,
+            engine="vectorised",
+            **kwargs,
+        )
+
+
+def test_grid_search_checkpoint(data_dir, tmp_path, monkeypatch):
+    checkpoint = tmp_path / "checkpoint.jsonl"
+    args = (
+        strategies.MACrossoverStrategy,
+        ["A", "B"],
+        ["C"],
+        {"fast_length": [2, 5], "slow_length": [20, 50]},
+    )
+    kwargs = {
+        "from_": datetime.date(2000, 1, 1),
+        "to": datetime.date(2002, 12, 31),
+        "source": "gbm",
+    }
+    expected = optimisation.grid_search(*args, **kwargs)
+
+    assert optimisation.grid_search(*args, checkpoint=str(checkpoint), **kwargs) == expected
+    lines = checkpoint.read_text().splitlines(keepends=True)
+    # Header, training and test backtests.
+    assert len(lines) == 1 + 4 * 2 + 1
+
+    # Interrupted while writing the fifth backtest.
+    checkpoint.write_text("".join(lines[:4]) + lines[4][:10])
+    num_backtests = 0
+    run_backtrader = optimisation._Backtester._run_backtrader
+
+    def counting_run_backtrader(self, task):
+        nonlocal num_backtests
+        num_backtests += 1
+        return run_backtrader(self, task)
+
+    monkeypatch.setattr(optimisation._Backtester, "_run_backtrader", counting_run_backtrader)
+
+    assert optimisation.grid_search(*args, checkpoint=str(checkpoint), **kwargs) == expected
+    assert num_backtests == len(lines) - 4
+    assert checkpoint.read_text().splitlines() == [line.rstrip("\n") for line in lines]
+
+    with pytest.raises(ValueError):
+        optimisation.grid_search(*args, checkpoint=str(checkpoint), metric="returns", **kwargs)
+
+
+def test_grid_search_checkpoint_interrupted(data_dir, tmp_path, monkeypatch):
+    checkpoint = tmp_path / "checkpoint.jsonl"
+    num_backtests = 0
+    run_backtrader = optimisation._Backtester._run_backtrader
+
+    def failing_run_backtrader(self, task):
+        nonlocal num_backtests
+        num_backtests += 1
+        if num_backtests == 4:
+            raise KeyboardInterrupt
+        return run_backtrader(self, task)
+
+    monkeypatch.setattr(optimisation._Backtester, "_run_backtrader", failing_run_backtrader)
+
+    with pytest.raises(KeyboardInterrupt):
+        optimisation.grid_search(
+            strategies.MACrossoverStrategy,
+            ["A"],
+            ["C"],
+            {"fast_length": [2, 5], "slow_length": [20, 50]},
+            from_=datetime.date(2000, 1, 1),
+            to=datetime.date(2002, 12, 31),
+            source="gbm",
+            checkpoint=str(checkpoint),
+        )
+
+    # Each result is written as soon as it is known.
+    assert len(checkpoint.read_text().splitlines()) == 1 + 3
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_grid_search_profile(data_dir, tmp_path, n_jobs):
+    args = (
+        strategies.MeanRevertingStrategy,
+        ["A", "B"],
+        ["C"],
+        {"k": [5, 20], "num_std": [0.5, 1.0]},
+    )
+    kwargs = {
+        "from_": datetime.date(2000, 1, 1),
+        "to": datetime.date(2002, 12, 31),
+        "source": "ou",
+        "n_jobs": n_jobs,
+    }
+    profile = profiling.Profile(profile_dir=str(tmp_path / "profiles"))
+
+    expected = optimisation.grid_search(*args, **kwargs)
+    assert optimisation.grid_search(*args, **kwargs, profile=profile) == expected
+
+    report = profile.report()
+    num_backtests = 4 * 2 + 1
+    assert list(report["phases"]) == profiling.PHASES
+    assert report["phases"]["data loading"]["calls"] == 1
+    assert report["phases"]["backtest"]["calls"] == num_backtests
+    assert report["backtests"] == num_backtests
+    num_days = len(pd.bdate_range(kwargs["from_"], kwargs["to"]))
+    assert report["bars"] == num_backtests * num_days
+    # `next` is only called once the moving averages have enough history; each
+    # `k` is backtested with two `num_std` on two tickers.
+    assert report["strategies"]["MeanRevertingStrategy"]["next_calls"] == sum(
+        4 * (num_days - k + 1) for k in [5, 20]
+    ) + (num_days - expected[0]["k"] + 1)
+    assert 0.0 < report["engine_time"] < report["phases"]["backtest"]["time"]
+    assert report["search_time"] > report["phases"]["backtest"]["time"] / n_jobs
+    assert len(report["profiles"]) == num_backtests
+    pstats.Stats(report["profiles"][0]["path"])
+    json.dumps(report)
+    assert "MeanRevertingStrategy.next" in profile.summary()
+
+
+@pytest.mark.parametrize(
+    "optimiser,kwargs",
+    [
+        (optimisation.random_search, {"num_samples": 1000}),
+        (optimisation.successive_halving, {"eta": 2}),
+        (optimisation.bayesian_search, {"num_samples": 1000, "num_initial_samples": 3}),
+    ],
+)
+def test_adaptive_search(data_dir, optimiser, kwargs):
+    args = (
+        strategies.MeanRevertingStrategy,
+        ["A", "B", "C", "D"],
+        ["E"],
+        {"k": [5, 10, 20, 50], "num_std": [0.5, 1.0, 1.5]},
+    )
+    settings = {
+        "from_": datetime.date(2000, 1, 1),
+        "to": datetime.date(2004, 12, 31),
+        "source": "ou",
+        "engine": "vectorised",
+        "seed": 0,
+    }
+
+    optimal_params, train_avg_sharpe, test_avg_sharpe = optimiser(*args, **kwargs, **settings)
+
+    settings.pop("seed")
+    expected_params, expected_train_avg_sharpe, expected_test_avg_sharpe = optimisation.grid_search(
+        *args, **settings
+    )
+    if optimiser is optimisation.successive_halving:
+        # Only the training metric of the final candidates is averaged over all tickers.
+        assert optimal_params["k"] in [5, 10, 20, 50]
+        assert optimal_params["num_std"] in [0.5, 1.0, 1.5]
+        assert train_avg_sharpe <= expected_train_avg_sharpe
+    else:
+        # The whole grid is evaluated.
+        assert optimal_params == expected_params
+        assert train_avg_sharpe == pytest.approx(expected_train_avg_sharpe)
+        assert test_avg_sharpe == pytest.approx(expected_test_avg_sharpe)
+
+
+@pytest.mark.parametrize("optimiser", [optimisation.random_search, optimisation.bayesian_search])
+def test_adaptive_search_budget(data_dir, optimiser):
+    cache = results.ResultCache()
+    args = (
+        strategies.MACrossoverStrategy,
+        ["A", "B"],
+        [],
+        {"fast_length": list(range(2, 20)), "slow_length": list(range(20, 200, 10))},
+    )
+    settings = {
+        "from_": datetime.date(2000, 1, 1),
+        "to": datetime.date(2004, 12, 31),
+        "source": "gbm",
+        "engine": "vectorised",
+        "num_samples": 10,
+    }
+
+    result = optimiser(*args, seed=0, result_cache=cache, **settings)
+
+    # Each of the parameter combinations is backtested on each ticker.
+    assert cache.info().misses == 10 * 2
+    assert result == optimiser(*args, seed=0, **settings)
+    assert result[2] == 0.0
+
+
+def test_sample_params():
+    rng = np.random.default_rng(0)
+    params_grid = {"a": [1, 2, 3], "b": ["x", "y"], "c": list(range(1000))}
+
+    params_list = optimisation._sample_params(params_grid, 100, rng)
+
+    assert len(params_list) == 100
+    assert len({tuple(params.values()) for params in params_list}) == 100
+    for params in params_list:
+        assert params["a"] in params_grid["a"]
+        assert params["b"] in params_grid["b"]
+    assert len(optimisation._sample_params({"a": [1, 2, 3]}, 100, rng)) == 3
+
+
+def test_walk_forward(data_dir):
+    args = (
+        strategies.MeanRevertingStrategy,
+        ["A", "B"],
+        {"k": [5, 20], "num_std": [0.5, 1.0]},
+    )
+    kwargs = {
+        "from_": datetime.date(2000, 1, 1),
+        "to": datetime.date(2004, 12, 31),
+        "train_length": pd.DateOffset(years=2),
+        "test_length": pd.DateOffset(years=1),
+        "timeframe": bt.TimeFrame.Months,
+        "source": "ou",
+    }
+
+    windows = optimisation.walk_forward(*args, **kwargs)
+
+    assert [(window.train_from, window.test_from, window.test_to) for window in windows] == [
+        (datetime.date(2000, 1, 1), datetime.date(2002, 1, 1), datetime.date(2002, 12, 31)),
+        (datetime.date(2001, 1, 1), datetime.date(2003, 1, 1), datetime.date(2003, 12, 31)),
+        (datetime.date(2002, 1, 1), datetime.date(2004, 1, 1), datetime.date(2004, 12, 31)),
+    ]
+    for window in windows:
+        assert window.train_to == window.test_from - datetime.timedelta(days=1)
+        # Each window is backtested as if its data was loaded on its own.
+        _, train_avg_metric, _ = optimisation.grid_search(
+            args[0],
+            args[1],
+            args[1],
+            {param: [value] for param, value in window.optimal_params.items()},
+            from_=window.train_from,
+            to=window.train_to,
+            timeframe=kwargs["timeframe"],
+            source=kwargs["source"],
+        )
+        assert window.train_avg_metric == pytest.approx(train_avg_metric)
+        assert window.test_avg_metric == pytest.approx(
+            optimisation.grid_search(
+                args[0],
+                args[1],
+                args[1],
+                {param: [value] for param, value in window.optimal_params.items()},
+                from_=window.test_from,
+                to=window.test_to,
+                timeframe=kwargs["timeframe"],
+                source=kwargs["source"],
+            )[2]
+        )
+
+    assert optimisation.walk_forward(*args, n_jobs=2, **kwargs) == windows
+
+
+def test_walk_forward_vectorised(data_dir):
+    args = (
+        strategies.MACrossoverStrategy,
+        ["A", "B", "C"],
+        {"fast_length": [2, 5, 10], "slow_length": [20, 50]},
+    )
+    kwargs = {
+        "from_": datetime.date(2000, 1, 1),
+        "to": datetime.date(2009, 12, 31),
+        "train_length": pd.DateOffset(years=3),
+        "test_length": pd.DateOffset(months=6),
+        "metric": "returns",
+        "source": "gbm",
+        "engine": "vectorised",
+    }
+
+    windows = optimisation.walk_forward(*args, **kwargs)
+
+    assert len(windows) == 14
+    assert windows[-1].test_to == datetime.date(2009, 12, 31)
+    assert optimisation.walk_forward(*args, n_jobs=2, **kwargs) == windows
+    for window in windows:
+        assert window.optimal_params["fast_length"] in [2, 5, 10]
+        assert window.optimal_params["slow_length"] in [20, 50]
+        assert np.isfinite(window.test_avg_metric)
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+from example_strategies import pairs, stats
+
+
+def _prices(num_days: int = 1000) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    random_walks = 100.0 + np.cumsum(rng.normal(size=(3, num_days)), axis=1)
+    # "B" is cointegrated with "A".
+    noise = np.zeros(num_days)
+    for idx in range(1, num_days):
+        noise[idx] = 0.5 * noise[idx - 1] + rng.normal()
+    return pd.DataFrame(
+        {
+            "A": random_walks[0],
+            "B": 2.0 * random_walks[0] + noise,
+            "C": random_walks[1],
+            "D": random_walks[2],
+        }
+    )
+
+
+def test_hedge_ratios():
+    prices = _prices()
+    price_matrix = prices.to_numpy().T
+
+    betas = pairs.hedge_ratios(price_matrix)
+
+    for idx_1 in range(len(price_matrix)):
+        for idx_2 in range(len(price_matrix)):
+            assert betas[idx_1, idx_2] == pytest.approx(
+                stats.pairs_trading_hedge_ratio(price_matrix[idx_1], price_matrix[idx_2])
+            )
+    np.testing.assert_allclose(pairs.correlation_matrix(price_matrix), prices.corr())
+
+
+def test_scan():
+    prices = _prices()
+
+    table = pairs.scan(prices, min_correlation=-1.0)
+
+    assert list(table.columns) == pairs.COLUMNS
+    assert len(table) == 6
+    assert table["adf_p_value"].is_monotonic_increasing
+    best = table.iloc[0]
+    assert (best["ticker_1"], best["ticker_2"]) == ("A", "B")
+    residuals = prices["B"] - best["hedge_ratio"] * prices["A"]
+    assert best["adf_p_value"] == pytest.approx(stats.adf_p_val(residuals.to_numpy()))
+    assert best["hurst_exponent"] == pytest.approx(stats.hurst_exponent(residuals.to_numpy()))
+    assert best["hurst_exponent"] < 0.5
+
+    pd.testing.assert_frame_equal(pairs.scan(prices, min_correlation=-1.0, n_jobs=2), table)
+    filtered_table = pairs.scan(prices, min_correlation=0.9)
+    assert (filtered_table["correlation"] >= 0.9).all()
+    assert len(filtered_table) < len(table)
@@ -0,0 +1,148 @@
+import datetime
+import math
+
+import pandas as pd
+from example_strategies import data, optimisation, results, strategies
+
+
+def test_result_cache(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    cache = results.ResultCache(path)
+    keys = [
+        results.ResultCache.key(strategies.NaiveStrategy, {}, ticker, "fingerprint", amount=1.0)
+        for ticker in ["A", "B", "C"]
+    ]
+
+    assert len(set(keys)) == 3
+    assert cache.get_many(keys) == {}
+
+    cache.set_many(
+        [
+            (keys[0], "NaiveStrategy", "A", 1.5),
+            (keys[1], "NaiveStrategy", "B", None),
+            (keys[2], "NaiveStrategy", ("A", "C"), math.nan),
+        ]
+    )
+    # Results persist.
+    cache = results.ResultCache(path)
+    values = cache.get_many(keys)
+
+    assert values[keys[0]] == 1.5
+    assert values[keys[1]] is None
+    assert math.isnan(values[keys[2]])
+    assert cache.info()[:3] == (3, 0, 3)
+
+    assert cache.invalidate(strategy="MACrossoverStrategy") == 0
+    assert cache.invalidate(ticker="c") == 1
+    assert cache.evict(1) == 1
+    assert cache.info().entries == 1
+
+
+def test_result_cache_get_many_chunks(tmp_path):
+    cache = results.ResultCache(str(tmp_path / "results.sqlite"))
+    keys = [f"key{i}" for i in range(2 * results._MAX_VARIABLES + 1)]
+    cache.set_many([(key, "NaiveStrategy", "A", float(i)) for i, key in enumerate(keys[::2])])
+    values = cache.get_many(keys + keys[:1])
+
+    assert values == {key: float(i) for i, key in enumerate(keys[::2])}
+    assert cache.info()[:2] == (results._MAX_VARIABLES + 1, results._MAX_VARIABLES)
+
+
+def test_result_cache_invalidate_ticker(tmp_path):
+    cache = results.ResultCache(str(tmp_path / "results.sqlite"))
+    cache.set_many(
+        [(ticker, "NaiveStrategy", ticker, 1.0) for ticker in ["ABC", "A_C", "A%C", "XABC"]]
+        + [("pair", "NaiveStrategy", ("XYZ", "A_C"), 1.0)]
+    )
+
+    assert cache.invalidate(ticker="a_c") == 2
+    assert cache.invalidate(ticker="A%") == 0
+    assert set(cache.get_many(["ABC", "A_C", "A%C", "XABC", "pair"])) == {"ABC", "A%C", "XABC"}
+
+
+def test_result_cache_key():
+    key = results.ResultCache.key(
+        strategies.MACrossoverStrategy, {"fast_length": 5}, "A", "fingerprint", amount=1.0
+    )
+
+    assert key == results.ResultCache.key(
+        strategies.MACrossoverStrategy, {"fast_length": 5}, "A", "fingerprint", amount=1.0
+    )
+    assert key == results.ResultCache.key(
+        strategies.MACrossoverStrategy,
+        {"fast_length": 5},
+        "A",
+        "fingerprint",
+        source=results.source_hash(strategies.MACrossoverStrategy),
+        amount=1.0,
+    )
+    for other_key in [
+        results.ResultCache.key(
+            strategies.NaiveStrategy, {"fast_length": 5}, "A", "fingerprint", amount=1.0
+        ),
+        results.ResultCache.key(
+            strategies.MACrossoverStrategy, {"fast_length": 2}, "A", "fingerprint", amount=1.0
+        ),
+        results.ResultCache.key(
+            strategies.MACrossoverStrategy, {"fast_length": 5}, "B", "fingerprint", amount=1.0
+        ),
+        results.ResultCache.key(
+            strategies.MACrossoverStrategy, {"fast_length": 5}, "A", "other", amount=1.0
+        ),
+        results.ResultCache.key(
+            strategies.MACrossoverStrategy, {"fast_length": 5}, "A", "fingerprint", amount=2.0
+        ),
+    ]:
+        assert other_key != key
+
+
+def test_fingerprint():
+    financial_data = data.synthetic_financial_data(pd.bdate_range("2000-01-01", periods=10))
+    changed_data = financial_data.copy()
+    changed_data.iloc[-1, 0] += 0.01
+
+    assert results.fingerprint(financial_data) == results.fingerprint(financial_data.copy())
+    assert results.fingerprint(financial_data) != results.fingerprint(changed_data)
+
+
+def test_grid_search_result_cache(data_dir):
+    cache = results.ResultCache()
+    kwargs = {
+        "from_": datetime.date(2000, 1, 1),
+        "to": datetime.date(2002, 12, 31),
+        "source": "gbm",
+        "metric": "returns",
+    }
+    params_grid = {"fast_length": [2, 5], "slow_length": [20]}
+
+    uncached = optimisation.grid_search(
+        strategies.MACrossoverStrategy, ["A", "B"], ["C"], params_grid, **kwargs
+    )
+    assert cache.info().entries == 0
+
+    assert uncached == optimisation.grid_search(
+        strategies.MACrossoverStrategy, ["A", "B"], ["C"], params_grid, result_cache=cache, **kwargs
+    )
+    assert cache.info()[:3] == (0, 5, 5)
+
+    # Only the backtests of the new parameter value, and of the test ticker if
+    # it becomes optimal, are run.
+    params_grid["fast_length"].append(10)
+    optimal_params, _, _ = optimisation.grid_search(
+        strategies.MACrossoverStrategy, ["A", "B"], ["C"], params_grid, result_cache=cache, **kwargs
+    )
+    new_optimum = optimal_params != uncached[0]
+    info = cache.info()
+    assert info.hits == 5 - new_optimum
+    assert info.entries == 7 + new_optimum
+
+
+def test_main(tmp_path, capsys):
+    path = str(tmp_path / "results.sqlite")
+    results.ResultCache(path).set_many([("key", "NaiveStrategy", "A", 1.0)])
+
+    results.main(["--path", path, "info"])
+    assert capsys.readouterr().out.startswith("1 results")
+
+    results.main(["--path", path, "invalidate", "--strategy", "NaiveStrategy"])
+    assert capsys.readouterr().out == "Removed 1 results.\n"
@@ -1,4 +1,6 @@
 import numpy as np
+import pytest
+import statsmodels.tsa.stattools as ts
 from example_strategies import stats
 
 
@@ -17,3 +19,78 @@ def test_hurst_exponent():
     assert h_mr < h_gbm < h_tr
     assert h_mr < 0.5
     assert h_tr > 0.5
+
+
+def test_hurst_exponents():
+    rng = np.random.default_rng(0)
+    num_points = 10000
+    data = np.stack(
+        [
+            np.log(rng.normal(size=num_points) + 1000),
+            np.log(np.cumsum(rng.normal(size=num_points)) + 1000),
+            np.log(np.cumsum(rng.normal(size=num_points) + 1) + 1000),
+            np.cumsum(rng.normal(size=num_points)),
+        ]
+    )
+
+    for num_lags in [2, 16, 64]:
+        h = stats.hurst_exponents(data, num_lags=num_lags)
+
+        assert h.shape == (len(data),)
+        for series, series_h in zip(data, h):
+            assert series_h == pytest.approx(stats.hurst_exponent(series, num_lags=num_lags))
+
+
+@pytest.mark.parametrize("window, num_lags", [(20, 4), (100, 64)])
+def test_rolling_hurst_exponent(window, num_lags):
+    rng = np.random.default_rng(0)
+    data = 1000.0 + np.cumsum(rng.normal(size=500))
+    rolling = stats.RollingHurstExponent(window, num_lags)
+    incremental = []
+    for value in data:
+        rolling.push(value)
+        incremental.append(rolling.value)
+
+    h = stats.rolling_hurst_exponent(data, window, num_lags)
+
+    expected = [
+        stats.hurst_exponent(data[idx - window + 1 : idx + 1], num_lags=num_lags)
+        for idx in range(window - 1, len(data))
+    ]
+    assert np.all(np.isnan(h[: window - 1]))
+    assert np.all(np.isnan(incremental[: window - 1]))
+    np.testing.assert_allclose(h[window - 1 :], expected, rtol=1e-9)
+    np.testing.assert_allclose(incremental[window - 1 :], expected, rtol=1e-9)
+
+
+@pytest.mark.parametrize("num_lags", [0, 1, 3])
+def test_rolling_adf(num_lags):
+    rng = np.random.default_rng(0)
+    prices = 1000.0 + np.cumsum(rng.normal(size=500))
+    window = 50
+    rolling = stats.RollingADF(window, num_lags)
+    incremental = []
+    for price in prices:
+        rolling.push(price)
+        incremental.append((rolling.statistic, rolling.p_value))
+
+    statistics = stats.rolling_adf_statistic(prices, window, num_lags)
+    p_values = stats.rolling_adf_p_val(prices, window, num_lags)
+
+    expected = [
+        ts.adfuller(prices[idx - window + 1 : idx + 1], maxlag=num_lags, autolag=None)[:2]
+        for idx in range(window - 1, len(prices))
+    ]
+    assert np.all(np.isnan(statistics[: window - 1]))
+    assert np.all(np.isnan(p_values[: window - 1]))
+    assert np.all(np.isnan(incremental[: window - 1]))
+    np.testing.assert_allclose(statistics[window - 1 :], [s for s, _ in expected], rtol=1e-9)
+    np.testing.assert_allclose(p_values[window - 1 :], [p for _, p in expected], rtol=1e-9)
+    np.testing.assert_allclose(incremental[window - 1 :], expected, rtol=1e-9)
+
+
+def test_rolling_window_too_short():
+    with pytest.raises(ValueError):
+        stats.RollingHurstExponent(64, 64)
+    with pytest.raises(ValueError):
+        stats.rolling_adf_statistic(np.arange(10.0), 5, num_lags=1)
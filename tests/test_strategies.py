@@ -1,7 +1,13 @@
 import datetime
+import logging
 
 import backtrader as bt
-from example_strategies import data, strategies
+import numpy as np
+import pandas as pd
+import pytest
+from example_strategies import data, strategies, utils
+
+from tests.helpers import CointegrationRecorder
 
 
 def test_no_strategy():
@@ -125,3 +131,131 @@ def test_ma_crossover_strategy():
 
     assert orders[1].issell()
     assert bt.num2date(orders[1].created.dt) == datetime.datetime(2000, 1, 20)
+
+
+@pytest.mark.parametrize("runonce", [True, False])
+def test_cointegration_bollinger_bands_strategy(runonce):
+    lookback = 15
+    weights = [1.0, -0.5, 0.25]
+    dates = pd.bdate_range("2000-01-01", periods=300, name="Date")
+    closes = []
+    cerebro = bt.Cerebro()
+    cerebro.addstrategy(CointegrationRecorder, lookback=lookback, weights=weights, qty=100)
+    for seed in range(len(weights)):
+        financial_data = data.synthetic_financial_data(dates, model="ou", seed=seed)
+        closes.append(financial_data["Close"].to_numpy())
+        cerebro.adddata(bt.feeds.PandasData(dataname=financial_data))
+    cerebro.broker.setcash(1_000_000.00)
+
+    recorder = cerebro.run(runonce=runonce)[0]
+
+    # Previous closes are used; the first bar wraps around to the last one.
+    portfolio_value = pd.Series(np.roll(np.dot(weights, closes), 1))
+    rolling = portfolio_value.rolling(lookback)
+    # Deviations are relative to the mean of the window, not its first value.
+    expected = (portfolio_value - rolling.mean()) / rolling.std(ddof=0)
+
+    np.testing.assert_allclose(
+        recorder.zscores[lookback - 1 :], expected[lookback - 1 :], rtol=1e-6
+    )
+    assert np.all(np.isnan(recorder.zscores[: lookback - 1]))
+    assert len(cerebro.broker.orders) > 0
+
+
+def _created_dates(orders, data=None):
+    return [bt.num2date(order.created.dt) for order in orders if data is None or order.data is data]
+
+
+@pytest.mark.parametrize(
+    "strategy,params",
+    [
+        (strategies.NaiveStrategy, {}),
+        (strategies.MeanRevertingStrategy, {"k": 10, "num_std": 1.0}),
+        (strategies.MACrossoverStrategy, {"fast_length": 5, "slow_length": 20}),
+    ],
+)
+def test_portfolio(strategy, params):
+    dates = pd.bdate_range("2000-01-01", periods=500, name="Date")
+    ticker_data = {
+        ticker: data.synthetic_financial_data(dates, model="ou", seed=seed)
+        for seed, ticker in enumerate(["A", "B", "C"])
+    }
+
+    cerebro = utils.get_cerebro(strategy, ticker_data, 1_000_000.00, params)
+    cerebro.run()
+    portfolio_orders = cerebro.broker.orders
+
+    assert len(portfolio_orders) > 0
+    assert all(order.status == order.Completed for order in portfolio_orders)
+    # Each stock is traded as if it were the only one.
+    for data_feed, (ticker, financial_data) in zip(cerebro.datas, ticker_data.items()):
+        single = utils.get_cerebro(strategy, financial_data, 1_000_000.00, params)
+        single.run()
+        assert data_feed._name == ticker
+        assert _created_dates(portfolio_orders, data_feed) == _created_dates(single.broker.orders)
+
+    # A portfolio of a single stock is equivalent to the stock on its own.
+    single = utils.get_cerebro(strategy, ticker_data["A"], 1_000_000.00, params)
+    single.run()
+    portfolio = utils.get_cerebro(strategy, {"A": ticker_data["A"]}, 1_000_000.00, params)
+    portfolio.run()
+    assert _created_dates(portfolio.broker.orders) == _created_dates(single.broker.orders)
+    assert portfolio.broker.getvalue() == pytest.approx(single.broker.getvalue())
+
+
+def test_journal(caplog):
+    dates = pd.bdate_range("2000-01-01", periods=500, name="Date")
+    financial_data = data.synthetic_financial_data(dates, model="ou", seed=1)
+    logger_name = strategies.logger.name
+
+    with caplog.at_level(logging.WARNING, logger=logger_name):
+        strategy = utils.get_cerebro(
+            strategies.MeanRevertingStrategy, financial_data, 1_000_000.00, {"k": 20}
+        ).run()[0]
+    # Orders are completed and trades are logged at `INFO`.
+    assert caplog.records == []
+
+    with caplog.at_level(logging.INFO, logger=logger_name):
+        expected = utils.get_cerebro(
+            strategies.MeanRevertingStrategy, financial_data, 1_000_000.00, {"k": 20}
+        ).run()[0]
+    logged = [(record.levelno, record.getMessage()) for record in caplog.records]
+    caplog.clear()
+
+    # The journal is filled regardless of the level.
+    journal = strategy.journal.to_dataframe()
+    assert len(journal) > 10
+    assert len(journal) == len(expected.journal) == len(logged)
+    assert (journal["kind"] == "order").sum() == len(strategy.ledger)
+    assert (journal.loc[journal["kind"] == "order", "status"] == "Completed").all()
+    assert journal.loc[journal["kind"] == "trade", "pnl_comm"].sum() == pytest.approx(strategy.sum)
+    assert journal["datetime"].isin(financial_data.index).all()
+
+    with caplog.at_level(logging.INFO, logger=logger_name):
+        strategy.dump_journal()
+    assert [(record.levelno, record.getMessage()) for record in caplog.records] == logged
+
+
+def test_ledger():
+    dates = pd.bdate_range("2000-01-01", periods=500, name="Date")
+    ticker_data = {
+        ticker: data.synthetic_financial_data(dates, model="ou", seed=seed)
+        for seed, ticker in enumerate(["A", "B"])
+    }
+    cerebro = utils.get_cerebro(
+        strategies.MeanRevertingStrategy, ticker_data, 1_000_000.00, {"k": 20}
+    )
+    strategy = cerebro.run()[0]
+    orders = [order for order in cerebro.broker.orders if order.status == order.Completed]
+
+    ledger = strategy.ledger.to_dataframe()
+    assert len(ledger) == len(orders) > 10
+    assert list(ledger["datetime"]) == [bt.num2date(order.executed.dt) for order in orders]
+    data_idxs = {id(data_feed): idx for idx, data_feed in enumerate(cerebro.datas)}
+    assert list(ledger["data"]) == [data_idxs[id(order.data)] for order in orders]
+    assert list(ledger["side"]) == ["buy" if order.isbuy() else "sell" for order in orders]
+    np.testing.assert_allclose(ledger["size"], [abs(order.executed.size) for order in orders])
+    np.testing.assert_allclose(ledger["price"], [order.executed.price for order in orders])
+    np.testing.assert_allclose(ledger["commission"], [order.executed.comm for order in orders])
+    # Bars are counted from one.
+    assert (dates[ledger["bar"] - 1] == ledger["datetime"]).all()
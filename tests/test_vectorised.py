@@ -0,0 +1,113 @@
+import backtrader as bt
+import backtrader.analyzers as btanalyzers
+import numpy as np
+import pandas as pd
+import pytest
+from example_strategies import data, strategies, utils, vectorised
+
+backtest_testdata = [
+    (strategies.NaiveStrategy, {}),
+    (strategies.MeanRevertingStrategy, {"k": 5, "num_std": 0.5}),
+    (strategies.MeanRevertingStrategy, {"k": 20, "num_std": 1.5}),
+    (strategies.MACrossoverStrategy, {"fast_length": 2, "slow_length": 10}),
+    (strategies.MACrossoverStrategy, {"fast_length": 10, "slow_length": 50}),
+]
+
+
+@pytest.mark.parametrize("model", ["gbm", "ou"])
+@pytest.mark.parametrize("strategy,params", backtest_testdata)
+def test_backtest_parity(strategy, params, model):
+    """Results should match those of backtrader."""
+    cash = 100_000.00
+    dates = pd.bdate_range("2000-01-01", "2007-12-31", name="Date")
+    financial_data = data.synthetic_financial_data(dates, model=model, seed=1)
+
+    cerebro = utils.get_cerebro(strategy, financial_data, cash, params)
+    for timeframe in [bt.TimeFrame.Days, bt.TimeFrame.Weeks, bt.TimeFrame.Years]:
+        cerebro.addanalyzer(
+            btanalyzers.SharpeRatio, timeframe=timeframe, _name=f"sharpe{timeframe}"
+        )
+    cerebro.addanalyzer(btanalyzers.Returns, _name="returns")
+    analyzers = cerebro.run()[0].analyzers
+    executed_orders = [order for order in cerebro.broker.orders if order.status == order.Completed]
+
+    result = vectorised.backtest(strategy, financial_data, params, cash=cash)
+
+    trades = np.stack([result.entries, result.exits], axis=-1).flatten()
+    trades = trades[trades >= 0]
+    assert len(trades) > 10
+    assert [bt.num2date(order.executed.dt) for order in executed_orders] == list(
+        financial_data.index[trades]
+    )
+    np.testing.assert_allclose(
+        [order.executed.size for order in executed_orders if order.isbuy()],
+        result.position[result.entries],
+    )
+    np.testing.assert_allclose(cerebro.broker.getvalue(), result.value[-1])
+    np.testing.assert_allclose(analyzers.returns.get_analysis()["rtot"], result.total_return())
+    for timeframe in [bt.TimeFrame.Days, bt.TimeFrame.Weeks, bt.TimeFrame.Years]:
+        np.testing.assert_allclose(
+            getattr(analyzers, f"sharpe{timeframe}").get_analysis()["sharperatio"],
+            result.sharpe_ratio(timeframe),
+        )
+
+
+def test_backtest_unsupported_strategy():
+    financial_data = data.synthetic_financial_data(pd.bdate_range("2000-01-01", periods=100))
+
+    with pytest.raises(ValueError):
+        vectorised.backtest(strategies.CointegrationBollingerBandsStrategy, financial_data)
+
+
+@pytest.mark.parametrize("metric", ["sharpe", "returns"])
+def test_grid_metrics(metric):
+    dates = pd.bdate_range("2000-01-01", "2004-12-31", name="Date")
+    financial_data = data.synthetic_financial_data(dates, model="ou", seed=2)
+    params_list = [
+        {"fast_length": fast_length, "slow_length": slow_length}
+        for fast_length in [2, 5, 10]
+        for slow_length in [20, 50, 100]
+    ]
+
+    metric_values = vectorised.grid_metrics(
+        strategies.MACrossoverStrategy, financial_data, params_list, metric, bt.TimeFrame.Weeks
+    )
+
+    assert metric_values.shape == (len(params_list),)
+    for params, metric_value in zip(params_list, metric_values):
+        result = vectorised.backtest(strategies.MACrossoverStrategy, financial_data, params)
+        if metric == "sharpe":
+            assert metric_value == pytest.approx(result.sharpe_ratio(bt.TimeFrame.Weeks))
+        else:
+            assert metric_value == result.total_return()
+
+
+def test_window_metrics():
+    dates = pd.bdate_range("2000-01-01", "2004-12-31", name="Date")
+    financial_data = data.synthetic_financial_data(dates, model="ou", seed=3)
+    params_list = [{"k": 5, "num_std": 0.5}, {"k": 20, "num_std": 1.0}]
+    windows = [(0, len(dates)), (300, 800), (500, 500)]
+
+    metric_values = vectorised.window_metrics(
+        strategies.MeanRevertingStrategy, financial_data, params_list, windows, "returns"
+    )
+
+    assert metric_values.shape == (len(params_list), len(windows))
+    np.testing.assert_array_equal(
+        metric_values[:, 0],
+        vectorised.grid_metrics(
+            strategies.MeanRevertingStrategy, financial_data, params_list, "returns"
+        ),
+    )
+    # Only the bars just before a window are needed to warm up the indicators.
+    np.testing.assert_allclose(
+        metric_values[:, 1],
+        vectorised.window_metrics(
+            strategies.MeanRevertingStrategy,
+            financial_data.iloc[250:800],
+            params_list,
+            [(50, 550)],
+            "returns",
+        )[:, 0],
+    )
+    assert np.all(np.isnan(metric_values[:, 2]))